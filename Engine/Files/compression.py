@@ -0,0 +1,111 @@
+# Engine/Files/compression.py
+
+import os
+import gzip
+import json
+import base64
+from fnmatch import fnmatch
+from typing import Dict, Optional, Tuple
+
+from logger import logger
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is used instead
+    zstandard = None
+
+# =========================
+# Config
+# =========================
+#
+# STORAGE_COMPRESSION          : "off" | "gzip" | "zstd"
+# STORAGE_COMPRESSION_PATTERNS : comma-separated globs matched against the
+#                                relative Supabase path; only matching objects
+#                                are compressed on write. The default covers
+#                                internal state only (manifests, checkpoints,
+#                                event logs, streaming partials, stage cache);
+#                                never add folders whose files are moved or
+#                                copied to clients or downloaded directly.
+# Reads always detect compressed objects by their magic bytes, so turning
+# compression off (or narrowing the patterns) never breaks existing files.
+
+STORAGE_COMPRESSION = os.getenv("STORAGE_COMPRESSION", "off").strip().lower()
+STORAGE_COMPRESSION_PATTERNS = os.getenv(
+    "STORAGE_COMPRESSION_PATTERNS",
+    "*/manifest.json,*/checkpoint.json,*/Events/*,*/Partial/*,Cache/*",
+)
+STORAGE_COMPRESSION_MIN_BYTES = int(os.getenv("STORAGE_COMPRESSION_MIN_BYTES", "1024"))
+STORAGE_COMPRESSION_LEVEL = int(os.getenv("STORAGE_COMPRESSION_LEVEL", "6"))
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+_PATTERNS = [p.strip() for p in STORAGE_COMPRESSION_PATTERNS.split(",") if p.strip()]
+
+def _codec() -> Optional[str]:
+    if STORAGE_COMPRESSION == "zstd" and zstandard is None:
+        logger.warning("[Compression] zstandard is not installed; using gzip")
+        return "gzip"
+    if STORAGE_COMPRESSION in ("gzip", "zstd"):
+        return STORAGE_COMPRESSION
+    return None
+
+_CODEC = _codec()
+
+# =========================
+# Public API
+# =========================
+
+def should_compress(path: str) -> bool:
+    return _CODEC is not None and any(fnmatch(path, p) for p in _PATTERNS)
+
+def compress_for_path(path: str, data: bytes) -> Tuple[bytes, Optional[str]]:
+    """
+    (stored bytes, encoding) for an upload to `path`: compressed when the path
+    matches a pattern and the payload is large enough to benefit, else as-is.
+    """
+    if not should_compress(path) or len(data) < STORAGE_COMPRESSION_MIN_BYTES:
+        return data, None
+    if _CODEC == "zstd":
+        packed = zstandard.ZstdCompressor(level=STORAGE_COMPRESSION_LEVEL).compress(data)
+    else:
+        packed = gzip.compress(data, compresslevel=STORAGE_COMPRESSION_LEVEL, mtime=0)
+    if len(packed) >= len(data):
+        return data, None
+    logger.debug(f"[Compression] {path}: {len(data)} -> {len(packed)} bytes ({_CODEC})")
+    return packed, _CODEC
+
+def encoding_headers(encoding: Optional[str]) -> Dict[str, str]:
+    """Object metadata recording how the stored bytes are encoded (Supabase x-metadata)."""
+    if not encoding:
+        return {}
+    meta = json.dumps({"content-encoding": encoding}).encode("utf-8")
+    return {"x-metadata": base64.b64encode(meta).decode("ascii")}
+
+def detect_encoding(data: bytes) -> Optional[str]:
+    if data[:2] == GZIP_MAGIC:
+        return "gzip"
+    if data[:4] == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+TEXT_SUFFIXES = (".txt", ".csv", ".json", ".jsonl")
+
+def decoded_text_object(path: str, data: bytes) -> bytes:
+    """
+    Raw object bytes as the text they hold: a text object (by suffix) that was
+    stored compressed is decompressed; anything else passes through untouched.
+    For copies that bypass read_supabase_file (e.g. the move_files scripts).
+    """
+    return decompress(data) if path.lower().endswith(TEXT_SUFFIXES) else data
+
+def decompress(data: bytes) -> bytes:
+    """Transparent inverse of compress_for_path; plain bytes pass through."""
+    encoding = detect_encoding(data)
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed object found but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
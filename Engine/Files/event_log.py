@@ -0,0 +1,146 @@
+# Engine/Files/event_log.py
+
+import os
+import json
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from logger import logger
+from Engine.Files.auth import get_supabase_headers
+from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Files.write_supabase_file import write_supabase_file
+
+# =========================
+# Config
+# =========================
+#
+# Supabase Storage has no append, so an event log is a folder of small
+# objects, one JSON line each, named by sequence number:
+#     {folder}/000000.jsonl, {folder}/000001.jsonl, ...
+# Appending costs one small PUT no matter how long the log is. A compactor
+# concatenates the events into a single JSON Lines file next to the folder;
+# readers start from that file and only fetch the events written after it.
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_BUCKET = "panelitix"
+SUPABASE_ROOT_FOLDER = os.getenv("SUPABASE_ROOT_FOLDER", "The_Big_Question")
+
+EVENT_LOG_LIST_PAGE = 1000
+EVENT_LOG_READ_WORKERS = int(os.getenv("EVENT_LOG_READ_WORKERS", "8"))
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _event_name(seq: int) -> str:
+    return f"{seq:06d}.jsonl"
+
+def _parse_lines(text: str) -> List[Dict[str, Any]]:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+# =========================
+# Writer
+# =========================
+
+class EventLog:
+    """Appends events for one run. A log has a single writer; `start_seq` continues an existing log."""
+
+    def __init__(self, folder: str, start_seq: int = 0):
+        self.folder = folder.rstrip("/")
+        self._seq = start_seq
+        self._lock = threading.Lock()
+
+    @property
+    def next_seq(self) -> int:
+        return self._seq
+
+    def append(self, event_type: str, **fields: Any) -> int:
+        with self._lock:
+            seq = self._seq
+            self._seq += 1
+        event = {"seq": seq, "type": event_type, "ts": _now_iso(), **fields}
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        write_supabase_file(f"{self.folder}/{_event_name(seq)}", line, content_type="application/x-ndjson")
+        return seq
+
+# =========================
+# Readers
+# =========================
+
+def _list_event_seqs(folder: str) -> List[int]:
+    if not SUPABASE_URL:
+        raise ValueError("SUPABASE_URL not configured")
+
+    url = f"{SUPABASE_URL}/storage/v1/object/list/{SUPABASE_BUCKET}"
+    headers = get_supabase_headers()
+    headers["Content-Type"] = "application/json"
+    prefix = f"{SUPABASE_ROOT_FOLDER}/{folder.rstrip('/')}/"
+
+    seqs: List[int] = []
+    offset = 0
+    while True:
+        payload = {
+            "prefix": prefix,
+            "limit": EVENT_LOG_LIST_PAGE,
+            "offset": offset,
+            "sortBy": {"column": "name", "order": "asc"},
+        }
+        resp = requests.post(url, headers=headers, data=json.dumps(payload))
+        resp.raise_for_status()
+        page = resp.json() or []
+        for it in page:
+            name = it.get("name", "") if isinstance(it, dict) else ""
+            stem = name[:-len(".jsonl")] if name.endswith(".jsonl") else ""
+            if stem.isdigit():
+                seqs.append(int(stem))
+        if len(page) < EVENT_LOG_LIST_PAGE:
+            break
+        offset += EVENT_LOG_LIST_PAGE
+    return sorted(seqs)
+
+def next_event_seq(folder: str) -> int:
+    """Sequence number after the last event in `folder` (0 for a new log)."""
+    try:
+        seqs = _list_event_seqs(folder)
+    except Exception as e:
+        logger.warning(f"[EventLog] could not list {folder}: {e}; starting at 0")
+        return 0
+    return seqs[-1] + 1 if seqs else 0
+
+def read_events(folder: str, since: int = -1, compacted_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Events with seq > `since`, in order. Uses the compacted file when given and
+    present, then fetches only the per-event objects written after it.
+    """
+    folder = folder.rstrip("/")
+    events: List[Dict[str, Any]] = []
+    covered = since
+    if compacted_path:
+        try:
+            compacted = _parse_lines(read_supabase_file(compacted_path))
+        except Exception as e:
+            logger.debug(f"[EventLog] no compacted log at {compacted_path}: {e}")
+            compacted = []
+        events = [e for e in compacted if e["seq"] > since]
+        if compacted:
+            covered = max(covered, compacted[-1]["seq"])
+
+    pending = [s for s in _list_event_seqs(folder) if s > covered]
+    if pending:
+        with ThreadPoolExecutor(max_workers=EVENT_LOG_READ_WORKERS, thread_name_prefix="event-log") as pool:
+            texts = list(pool.map(lambda s: read_supabase_file(f"{folder}/{_event_name(s)}"), pending))
+        for text in texts:
+            events.extend(_parse_lines(text))
+    return events
+
+def compact_events(folder: str, compacted_path: str, events: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """Write the whole log as one JSON Lines file at `compacted_path`; returns the events."""
+    if events is None:
+        events = read_events(folder, compacted_path=compacted_path)
+    text = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+    write_supabase_file(compacted_path, text, content_type="application/x-ndjson")
+    logger.info(f"[EventLog] compacted {len(events)} event(s) into {compacted_path}")
+    return events
@@ -0,0 +1,42 @@
+# Engine/Files/latest_pointer.py
+
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from logger import logger
+from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Files.write_supabase_file import write_supabase_file
+
+# =========================
+# "Latest" pointers
+# =========================
+#
+# A pointer is a small JSON object naming the newest file written for a logical
+# input folder, so readers can fetch it directly instead of listing the folder:
+#     Elasticity/Supply_Report  ->  Elasticity/Latest/Supply_Report.json
+#     {"path": "Elasticity/Supply_Report/<file>", "updated_at": "...", ...}
+# Pointers live outside the folders they describe, so folder moves and
+# listings never see them.
+
+def pointer_path(folder: str) -> str:
+    parent, _, leaf = folder.strip("/").rpartition("/")
+    return f"{parent}/Latest/{leaf}.json" if parent else f"Latest/{leaf}.json"
+
+def write_latest_pointer(folder: str, path: str, **meta: Any) -> None:
+    """Record `path` as the newest file in `folder` (call after the upload completes)."""
+    record = {"path": path, "updated_at": datetime.utcnow().isoformat() + "Z", **meta}
+    write_supabase_file(pointer_path(folder), json.dumps(record), content_type="application/json")
+    logger.info(f"📌 Latest pointer for {folder} -> {path}")
+
+def read_latest_pointer(folder: str) -> Optional[Dict[str, Any]]:
+    """The pointer record for `folder`, or None if there is none (or it is unreadable)."""
+    try:
+        record = json.loads(read_supabase_file(pointer_path(folder)))
+    except Exception as e:
+        logger.info(f"📌 No latest pointer for {folder}: {e}")
+        return None
+    if not isinstance(record, dict) or not record.get("path"):
+        logger.warning(f"⚠️ Ignoring malformed latest pointer for {folder}: {record}")
+        return None
+    return record
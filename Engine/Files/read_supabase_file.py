@@ -1,6 +1,7 @@
 import os
 import requests
 from Engine.Files.auth import get_supabase_headers
+from Engine.Files.compression import decompress, should_compress
 from logger import logger
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -27,12 +28,14 @@ def read_supabase_file(path: str, binary: bool = False):
         response.raise_for_status()
 
         if binary:
-            logger.debug(f"✅ Binary file read successful, content size: {len(response.content)} bytes")
-            return response.content
+            # Only paths covered by the compression patterns can hold bytes we compressed
+            content = decompress(response.content) if should_compress(path) else response.content
+            logger.debug(f"✅ Binary file read successful, content size: {len(content)} bytes")
+            return content
 
-        # --- Decode text content ---
+        # --- Decode text content (compressed objects are detected by magic bytes) ---
         try:
-            text = response.content.decode("utf-8", errors="strict")
+            text = decompress(response.content).decode("utf-8", errors="strict")
             if path.endswith(".csv"):
                 logger.debug(f"🧾 CSV file detected. Text content decoded successfully, size: {len(text)} characters")
             elif path.endswith(".txt"):
@@ -1,6 +1,7 @@
 import os
 import requests
 from Engine.Files.auth import get_supabase_headers
+from Engine.Files.compression import compress_for_path, encoding_headers
 from logger import logger
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -12,7 +13,7 @@ logger.info(f"   SUPABASE_URL = {SUPABASE_URL}")
 logger.info(f"   SUPABASE_BUCKET = {SUPABASE_BUCKET}")
 logger.info(f"   SUPABASE_ROOT_FOLDER = {SUPABASE_ROOT_FOLDER}")
 
-def write_supabase_file(path, content, content_type=None):
+def _check_config(path, caller):
     if not SUPABASE_URL:
         logger.error("❌ SUPABASE_URL is not set in environment variables.")
         raise ValueError("SUPABASE_URL not configured")
@@ -22,9 +23,25 @@ def write_supabase_file(path, content, content_type=None):
         raise ValueError("SUPABASE_ROOT_FOLDER not configured")
 
     if not path:
-        logger.error("❌ No path provided to write_supabase_file")
+        logger.error(f"❌ No path provided to {caller}")
         raise ValueError("File path must be provided")
 
+def _resolve_content_type(path, content_type=None):
+    if content_type:
+        logger.debug(f"🧾 Custom Content-Type provided: {content_type}")
+        return content_type
+    if path.endswith(".csv"):
+        logger.debug("🧾 CSV file detected. Using Content-Type: text/csv")
+        return "text/csv; charset=utf-8"
+    if path.endswith(".txt"):
+        logger.debug("📑 TXT file detected. Using Content-Type: text/plain")
+        return "text/plain; charset=utf-8"
+    logger.debug("📦 Unknown file type. Defaulting to application/octet-stream")
+    return "application/octet-stream"
+
+def write_supabase_file(path, content, content_type=None):
+    _check_config(path, "write_supabase_file")
+
     # 🔹 Compose full Supabase path
     full_path = f"{SUPABASE_ROOT_FOLDER}/{path}"
     url = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{full_path}"
@@ -53,21 +70,17 @@ def write_supabase_file(path, content, content_type=None):
         logger.error("❌ Content must be either str or bytes.")
         raise TypeError("Content must be str or bytes")
 
-    logger.info(f"📏 Upload size: {len(data)} bytes")
+    # --- Optional compression (STORAGE_COMPRESSION + path patterns) ---
+    raw_size = len(data)
+    data, encoding = compress_for_path(path, data)
+    headers.update(encoding_headers(encoding))
+    if encoding:
+        logger.info(f"📏 Upload size: {len(data)} bytes ({encoding}, {raw_size} uncompressed)")
+    else:
+        logger.info(f"📏 Upload size: {len(data)} bytes")
 
     # --- Determine Content-Type ---
-    if content_type:
-        headers["Content-Type"] = content_type
-        logger.debug(f"🧾 Custom Content-Type provided: {content_type}")
-    elif path.endswith(".csv"):
-        headers["Content-Type"] = "text/csv; charset=utf-8"
-        logger.debug("🧾 CSV file detected. Using Content-Type: text/csv")
-    elif path.endswith(".txt"):
-        headers["Content-Type"] = "text/plain; charset=utf-8"
-        logger.debug("📑 TXT file detected. Using Content-Type: text/plain")
-    else:
-        headers["Content-Type"] = "application/octet-stream"
-        logger.debug("📦 Unknown file type. Defaulting to application/octet-stream")
+    headers["Content-Type"] = _resolve_content_type(path, content_type)
 
     logger.debug(f"📦 Final headers: {headers}")
 
@@ -93,3 +106,78 @@ def write_supabase_file(path, content, content_type=None):
     except requests.exceptions.RequestException as e:
         logger.error(f"❌ Supabase write failed: {e}")
         raise
+
+class _ChunkReader:
+    """
+    File-like view over an iterator of byte chunks. Exposing __len__ lets
+    requests send a Content-Length instead of a chunked body.
+    """
+
+    def __init__(self, chunks, length):
+        self._chunks = iter(chunks)
+        self._length = length
+        self._buf = b""
+        self.bytes_read = 0
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buf) < size:
+            try:
+                self._buf += next(self._chunks)
+            except StopIteration:
+                break
+        if size < 0:
+            out, self._buf = self._buf, b""
+        else:
+            out, self._buf = self._buf[:size], self._buf[size:]
+        self.bytes_read += len(out)
+        return out
+
+def write_supabase_stream(path, chunks, content_type=None, content_length=None):
+    """
+    Upload an iterable of byte chunks to Supabase without buffering the whole
+    file. If the iterable raises mid-stream the upload is aborted and nothing
+    is written. Returns the number of bytes sent.
+    """
+    _check_config(path, "write_supabase_stream")
+
+    full_path = f"{SUPABASE_ROOT_FOLDER}/{path}"
+    url = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{full_path}"
+
+    logger.info("📁 Supabase Stream Write Initiated:")
+    logger.info(f"   → Relative Path: {path}")
+    logger.info(f"   → Full Path: {full_path}")
+    logger.info(f"   → Declared size: {content_length if content_length is not None else 'unknown (chunked)'}")
+
+    headers = get_supabase_headers()
+    headers["Content-Type"] = _resolve_content_type(path, content_type)
+
+    if content_length is not None:
+        body = _ChunkReader(chunks, int(content_length))
+    else:
+        counted = {"n": 0}
+
+        def _counting(it):
+            for chunk in it:
+                counted["n"] += len(chunk)
+                yield chunk
+
+        body = _counting(chunks)
+
+    try:
+        logger.info(f"🚀 Initiating streamed PUT request to Supabase at: {url}")
+        response = requests.put(url, headers=headers, data=body)
+
+        logger.info(f"📡 Supabase response status: {response.status_code}")
+        logger.debug(f"📨 Supabase raw response: {response.text}")
+        response.raise_for_status()
+
+        sent = body.bytes_read if content_length is not None else counted["n"]
+        logger.info(f"✅ Streamed {sent} bytes to Supabase at: {full_path}")
+        return sent
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"❌ Supabase stream write failed: {e}")
+        raise
@@ -0,0 +1,223 @@
+# Engine/Links/link_store.py
+
+import os
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from logger import logger
+from Engine.Store.sqlite_store import get_store, rows_to_dicts
+
+# =========================
+# Config
+# =========================
+
+LINK_STORE = os.getenv("LINK_STORE", "on").strip().lower()  # "on" | "off"
+LINK_STORE_PATH = os.getenv("LINK_STORE_PATH") or None       # default: <LOCAL_STATE_DIR>/link_store.sqlite3
+
+# Auto-flag a domain once it has failed at least this many times…
+DOMAIN_FLAG_MIN_FAILURES = int(os.getenv("DOMAIN_FLAG_MIN_FAILURES", "3"))
+# …and at least this share of its validations failed
+DOMAIN_FLAG_FAIL_RATIO = float(os.getenv("DOMAIN_FLAG_FAIL_RATIO", "0.75"))
+# A flag lapses after this long: flagged domains are blacklisted, so nothing
+# new is learned about them while flagged. Once lapsed, the domain is validated
+# again and judged on fresh counts.
+DOMAIN_FLAG_TTL = float(os.getenv("DOMAIN_FLAG_TTL", str(7 * 24 * 3600)))
+
+# Failures that say nothing about the domain (network errors, timeouts,
+# throttling, server errors) never count towards a flag
+TRANSIENT_REASON_PREFIXES = ("exception=", "validation_timeout", "status=429", "status=5")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_verdicts (
+    url         TEXT PRIMARY KEY,
+    ok          INTEGER NOT NULL,
+    reason      TEXT NOT NULL,
+    final_url   TEXT,
+    rdomain     TEXT NOT NULL,
+    checked_at  REAL NOT NULL,
+    expires_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_url_verdicts_rdomain ON url_verdicts (rdomain);
+
+CREATE TABLE IF NOT EXISTS domain_reputation (
+    rdomain         TEXT PRIMARY KEY,
+    domain          TEXT NOT NULL,
+    ok_count        INTEGER NOT NULL DEFAULT 0,
+    fail_count      INTEGER NOT NULL DEFAULT 0,
+    last_reason     TEXT,
+    last_ok_at      REAL,
+    last_failed_at  REAL,
+    flagged         INTEGER NOT NULL DEFAULT 0,
+    flagged_at      REAL,
+    updated_at      REAL NOT NULL
+);
+"""
+
+# =========================
+# Reversed-label domain matching
+# =========================
+
+def normalise_host(host: str) -> str:
+    h = (host or "").strip().lower().rstrip(".")
+    return h[4:] if h.startswith("www.") else h
+
+def reverse_labels(host: str) -> str:
+    """'news.example.co.uk' -> 'uk.co.example.news' (suffix match becomes prefix match)."""
+    return ".".join(reversed(normalise_host(host).split("."))) if host else ""
+
+class DomainSuffixIndex:
+    """
+    Set of domains keyed by reversed labels. A host matches when any of its
+    label suffixes is present: O(number of labels) lookups, independent of
+    the number of domains indexed.
+    """
+
+    def __init__(self, domains: Iterable[str] = ()):
+        self._keys: Dict[str, str] = {}
+        for d in domains:
+            self.add(d)
+
+    def add(self, domain: str) -> None:
+        d = normalise_host(domain)
+        if d:
+            self._keys[reverse_labels(d)] = d
+
+    def match(self, host: str) -> Optional[str]:
+        """Return the indexed domain covering `host`, or None."""
+        labels = normalise_host(host).split(".")[::-1]
+        key = ""
+        for label in labels:
+            key = f"{key}.{label}" if key else label
+            hit = self._keys.get(key)
+            if hit:
+                return hit
+        return None
+
+    def __contains__(self, host: str) -> bool:
+        return bool(host) and self.match(host) is not None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def domains(self) -> List[str]:
+        return sorted(self._keys.values())
+
+# =========================
+# Store
+# =========================
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+def _store():
+    global _STORE
+    if LINK_STORE == "off":
+        return None
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = get_store("link_store", _SCHEMA, path=LINK_STORE_PATH)
+    return _STORE
+
+def get_url_verdict(url_key: str) -> Optional[Tuple[bool, str, str]]:
+    """Return an unexpired (ok, reason, final_url) for a canonical URL, or None."""
+    store = _store()
+    if store is None:
+        return None
+    try:
+        row = store.query_one(
+            "SELECT ok, reason, final_url FROM url_verdicts WHERE url = ? AND expires_at > ?",
+            (url_key, time.time()),
+        )
+    except Exception as e:
+        logger.warning(f"[link_store] verdict lookup failed: {e}")
+        return None
+    if row is None:
+        return None
+    return bool(row["ok"]), row["reason"], row["final_url"] or url_key
+
+def is_transient_reason(reason: str) -> bool:
+    return (reason or "").startswith(TRANSIENT_REASON_PREFIXES)
+
+def record_url_verdict(url_key: str, host: str, verdict: Tuple[bool, str, str], ttl: float) -> None:
+    """Persist a URL verdict and fold it into the domain's reputation (transient failures excepted)."""
+    store = _store()
+    if store is None:
+        return
+    ok, reason, final_url = verdict
+    now = time.time()
+    rdomain = reverse_labels(host)
+    try:
+        with store.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO url_verdicts (url, ok, reason, final_url, rdomain, checked_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url_key, int(ok), reason, final_url, rdomain, now, now + ttl),
+            )
+            if not rdomain or (not ok and is_transient_reason(reason)):
+                return
+            conn.execute(
+                "INSERT OR IGNORE INTO domain_reputation (rdomain, domain, updated_at) VALUES (?, ?, ?)",
+                (rdomain, normalise_host(host), now),
+            )
+            # A lapsed flag starts the domain over on fresh counts
+            conn.execute(
+                "UPDATE domain_reputation SET ok_count = 0, fail_count = 0, flagged = 0, flagged_at = NULL "
+                "WHERE rdomain = ? AND flagged = 1 AND flagged_at < ?",
+                (rdomain, now - DOMAIN_FLAG_TTL),
+            )
+            if ok:
+                conn.execute(
+                    "UPDATE domain_reputation SET ok_count = ok_count + 1, last_ok_at = ?, updated_at = ? "
+                    "WHERE rdomain = ?",
+                    (now, now, rdomain),
+                )
+            else:
+                conn.execute(
+                    "UPDATE domain_reputation SET fail_count = fail_count + 1, last_reason = ?, "
+                    "last_failed_at = ?, updated_at = ? WHERE rdomain = ?",
+                    (reason, now, now, rdomain),
+                )
+            # (Re)evaluate the auto-flag; a domain that recovers is un-flagged
+            conn.execute(
+                "UPDATE domain_reputation SET "
+                "flagged = CASE WHEN fail_count >= ? AND fail_count >= ? * (ok_count + fail_count) THEN 1 ELSE 0 END, "
+                "flagged_at = CASE WHEN fail_count >= ? AND fail_count >= ? * (ok_count + fail_count) "
+                "THEN COALESCE(flagged_at, ?) ELSE NULL END "
+                "WHERE rdomain = ?",
+                (DOMAIN_FLAG_MIN_FAILURES, DOMAIN_FLAG_FAIL_RATIO,
+                 DOMAIN_FLAG_MIN_FAILURES, DOMAIN_FLAG_FAIL_RATIO, now, rdomain),
+            )
+    except Exception as e:
+        logger.warning(f"[link_store] failed to record verdict for host={host}: {e}")
+
+def flagged_domains() -> List[str]:
+    """Domains auto-flagged for repeatedly failing validation within the last DOMAIN_FLAG_TTL."""
+    store = _store()
+    if store is None:
+        return []
+    try:
+        rows = store.query(
+            "SELECT domain FROM domain_reputation WHERE flagged = 1 AND flagged_at >= ? ORDER BY domain",
+            (time.time() - DOMAIN_FLAG_TTL,),
+        )
+    except Exception as e:
+        logger.warning(f"[link_store] flagged domain lookup failed: {e}")
+        return []
+    return [r["domain"] for r in rows]
+
+def domain_reputation(host: str) -> Optional[Dict[str, object]]:
+    """Reputation row for the closest recorded suffix of `host`, or None."""
+    store = _store()
+    if store is None or not host:
+        return None
+    labels = normalise_host(host).split(".")[::-1]
+    keys = [".".join(labels[:i]) for i in range(len(labels), 0, -1)]
+    placeholders = ",".join("?" for _ in keys)
+    rows = rows_to_dicts(store.query(
+        f"SELECT * FROM domain_reputation WHERE rdomain IN ({placeholders})", keys
+    ))
+    if not rows:
+        return None
+    return max(rows, key=lambda r: len(r["rdomain"]))
@@ -0,0 +1,259 @@
+# Engine/Links/url_shortener.py
+
+import os
+import time
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.utils import requote_uri
+from logger import logger
+from Engine.Store.sqlite_store import get_store
+from Engine.Links.url_validator import hostname
+
+# =========================
+# Config
+# =========================
+
+SHORTENER_CACHE_PATH = os.getenv("SHORTENER_CACHE_PATH") or None  # default: <LOCAL_STATE_DIR>/url_shortener.sqlite3
+SHORTENER_BATCH_SIZE = int(os.getenv("SHORTENER_BATCH_SIZE", "20"))
+SHORTENER_CONCURRENCY = int(os.getenv("SHORTENER_CONCURRENCY", "2"))  # be polite to is.gd
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS short_urls (
+    long_url    TEXT PRIMARY KEY,
+    short_url   TEXT NOT NULL,
+    provider    TEXT NOT NULL,
+    created_at  REAL NOT NULL
+);
+"""
+
+_HTTP_SESSION = requests.Session()
+
+OnShortened = Callable[[str], None]
+
+# =========================
+# is.gd
+# =========================
+
+def shorten_url_isgd(long_url: str) -> Optional[str]:
+    """
+    Shorten via is.gd using POST, retries, and backoff.
+    Logs all failures to Render logs only. Returns short URL or None.
+    """
+    if not long_url:
+        return None
+
+    enc_url = requote_uri(long_url)
+    max_tries = 4
+    timeout_s = 8.0
+    backoff_base = 0.75
+    jitter_s = 0.35
+
+    for attempt in range(1, max_tries + 1):
+        try:
+            r = _HTTP_SESSION.post(
+                "https://is.gd/create.php",
+                data={"format": "simple", "url": enc_url},
+                timeout=timeout_s,
+            )
+            txt = (r.text or "").strip()
+
+            if r.status_code == 200 and txt.startswith("http"):
+                if attempt > 1:
+                    logger.info(f"[shorten:is.gd] success after retries attempt={attempt}")
+                return txt
+
+            body_preview = txt[:160].replace("\n", " ")
+            logger.warning(
+                f"[shorten:is.gd] attempt={attempt}/{max_tries} "
+                f"status={r.status_code} body_preview='{body_preview}'"
+            )
+
+        except Exception as e:
+            logger.warning(f"[shorten:is.gd] attempt={attempt}/{max_tries} error={e}")
+
+        sleep_s = backoff_base * (2 ** (attempt - 1)) + random.uniform(0, jitter_s)
+        time.sleep(min(sleep_s, 5.0))
+
+    logger.info(
+        f"[shorten:is.gd] giving up after {max_tries} attempts "
+        f"host={hostname(long_url)} url_len={len(long_url)}"
+    )
+    return None
+
+# =========================
+# Persistent long→short cache
+# =========================
+
+def _store():
+    return get_store("url_shortener", _SCHEMA, path=SHORTENER_CACHE_PATH)
+
+def cached_short_url(long_url: str) -> Optional[str]:
+    try:
+        row = _store().query_one("SELECT short_url FROM short_urls WHERE long_url = ?", (long_url,))
+    except Exception as e:
+        logger.warning(f"[shorten] cache lookup failed: {e}")
+        return None
+    return row["short_url"] if row else None
+
+def _remember(long_url: str, short_url: str, provider: str) -> None:
+    try:
+        _store().execute(
+            "INSERT OR REPLACE INTO short_urls (long_url, short_url, provider, created_at) VALUES (?, ?, ?, ?)",
+            (long_url, short_url, provider, time.time()),
+        )
+    except Exception as e:
+        logger.warning(f"[shorten] cache write failed: {e}")
+
+# =========================
+# Background stage
+# =========================
+
+class _ShortenStage:
+    """
+    Single daemon worker draining a queue of (long_url, callback, group, token)
+    jobs in batches. Duplicate URLs within a batch are shortened once; every
+    callback for a URL is invoked with the short link once it exists.
+
+    A group whose flush times out is cancelled: its token is retired, so jobs
+    still queued for it are drained without calling back, and flush only
+    returns once callbacks already running for it have finished.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Tuple[str, OnShortened, str, object]]" = queue.Queue()
+        self._pending: Dict[str, int] = {}
+        self._tokens: Dict[str, object] = {}
+        self._running: Dict[object, int] = {}
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=SHORTENER_CONCURRENCY, thread_name_prefix="url-shorten")
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self) -> None:
+        if self._worker and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name="url-shorten-stage", daemon=True)
+            self._worker.start()
+
+    def submit(self, long_url: str, on_done: OnShortened, group: str) -> None:
+        with self._cond:
+            token = self._tokens.setdefault(group, object())
+            self._pending[group] = self._pending.get(group, 0) + 1
+        self._queue.put((long_url, on_done, group, token))
+        self._ensure_worker()
+
+    def flush(self, group: str, timeout: float) -> bool:
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._pending.get(group, 0) > 0:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._cancel(group)
+                    return False
+                self._cond.wait(remaining)
+            self._pending.pop(group, None)
+            self._tokens.pop(group, None)
+        return True
+
+    def _cancel(self, group: str) -> None:
+        """Retire the group (caller holds the condition) and wait out its running callbacks."""
+        token = self._tokens.pop(group, None)
+        dropped = self._pending.pop(group, 0)
+        logger.info(f"[shorten] group cancelled; {dropped} queued shortening(s) will not call back")
+        while self._running.get(token, 0) > 0:
+            self._cond.wait()
+
+    def _claim(self, group: str, token: object) -> bool:
+        """Mark a callback as running, unless its group has been cancelled."""
+        with self._cond:
+            if self._tokens.get(group) is not token:
+                return False
+            self._running[token] = self._running.get(token, 0) + 1
+            return True
+
+    def _done(self, group: str, token: object, claimed: bool = False) -> None:
+        with self._cond:
+            if claimed:
+                self._running[token] -= 1
+                if not self._running[token]:
+                    del self._running[token]
+            if self._tokens.get(group) is token:
+                self._pending[group] = max(self._pending.get(group, 0) - 1, 0)
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Tuple[str, OnShortened, str, object]] = [self._queue.get()]
+            while len(batch) < SHORTENER_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._process(batch)
+            except Exception:
+                logger.exception("[shorten] batch failed")
+                for _, _, group, token in batch:
+                    self._done(group, token)
+
+    def _process(self, batch: List[Tuple[str, OnShortened, str, object]]) -> None:
+        by_url: Dict[str, List[Tuple[OnShortened, str, object]]] = {}
+        for long_url, cb, group, token in batch:
+            by_url.setdefault(long_url, []).append((cb, group, token))
+
+        def _one(long_url: str) -> Tuple[str, Optional[str]]:
+            short = cached_short_url(long_url)
+            if not short:
+                short = shorten_url_isgd(long_url)
+                if short:
+                    _remember(long_url, short, "isgd")
+            return long_url, short
+
+        logger.info(f"[shorten] batch size={len(batch)} distinct_urls={len(by_url)}")
+        for long_url, short in self._pool.map(_one, list(by_url)):
+            for cb, group, token in by_url[long_url]:
+                claimed = bool(short) and self._claim(group, token)
+                try:
+                    if claimed:
+                        cb(short)
+                except Exception:
+                    logger.exception(f"[shorten] callback failed host={hostname(long_url)}")
+                finally:
+                    self._done(group, token, claimed)
+
+_STAGE = _ShortenStage()
+
+# =========================
+# Public API
+# =========================
+
+def request_short_url(long_url: str, on_done: OnShortened, group: str = "default") -> Optional[str]:
+    """
+    Non-blocking. Returns the short URL immediately on a cache hit; otherwise
+    queues the URL for the background stage, which calls `on_done(short_url)`
+    later (not at all if shortening fails), and returns None.
+    """
+    if not long_url or not long_url.lower().startswith("https://"):
+        logger.info(f"[shorten] skip: non-https or empty url='{long_url}'")
+        return None
+    hit = cached_short_url(long_url)
+    if hit:
+        return hit
+    _STAGE.submit(long_url, on_done, group)
+    return None
+
+def flush_short_urls(group: str = "default", timeout: float = 60.0) -> bool:
+    """
+    Wait until every shortening queued for `group` has finished. On timeout the
+    group is cancelled: callbacks still queued for it never run, so outputs the
+    caller finalises afterwards are not rewritten behind its back.
+    """
+    return _STAGE.flush(group, timeout)
@@ -0,0 +1,493 @@
+# Engine/Links/url_validator.py
+
+import os
+import codecs
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Tuple, Optional
+from urllib.parse import urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from logger import logger
+from Engine.Links import link_store
+
+# =========================
+# Config
+# =========================
+
+HTTP_UA = os.getenv(
+    "HTTP_VALIDATION_UA",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+HTTP_TIMEOUT = float(os.getenv("HTTP_VALIDATION_TIMEOUT", "8.0"))
+
+# Persistent HTTP session & connection pool (shared by every validation)
+HTTP_POOL_CONNS = int(os.getenv("HTTP_POOL_CONNS", "50"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "50"))
+
+# Worker threads used to run the independent probes of a validation concurrently
+VALIDATION_WORKERS = int(os.getenv("HTTP_VALIDATION_WORKERS", "16"))
+
+# Streaming fetch: read at most HTTP_VALIDATION_MAX_BYTES of each page and stop
+# as soon as a failure is certain ("off" reads whole bodies)
+HTTP_VALIDATION_STREAMING = os.getenv("HTTP_VALIDATION_STREAMING", "on").strip().lower()  # "on" | "off"
+HTTP_VALIDATION_MAX_BYTES = int(os.getenv("HTTP_VALIDATION_MAX_BYTES", "524288"))  # 512 KB
+HTTP_VALIDATION_CHUNK_BYTES = int(os.getenv("HTTP_VALIDATION_CHUNK_BYTES", "16384"))
+PROBE_MAX_BYTES = 4096
+
+# Verdict cache: positive and negative verdicts expire independently
+VERDICT_TTL_OK = float(os.getenv("HTTP_VALIDATION_TTL_OK", "86400"))      # 24h
+VERDICT_TTL_FAIL = float(os.getenv("HTTP_VALIDATION_TTL_FAIL", "3600"))   # 1h
+VERDICT_CACHE_MAX = int(os.getenv("HTTP_VALIDATION_CACHE_MAX", "5000"))
+
+UA_DESKTOP_CHROME = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+UA_DESKTOP_SAFARI = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
+UA_MOBILE_SAFARI = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+
+PROBE_UAS = (UA_DESKTOP_CHROME, UA_DESKTOP_SAFARI, UA_MOBILE_SAFARI)
+
+WAF_COOKIES = ("_abck", "bm_sv", "bm_sz", "bm_mi", "ak_bmsc", "akavpwr_", "aka_")
+
+DENY_PHRASES = (
+    "access denied","forbidden","not authorized","not authorised","authorization required","authorisation required",
+    "you don't have permission","you do not have permission","you don't have authorization","you do not have authorization",
+    "was denied","enable cookies","captcha","unusual traffic","reference #","page not found","404 not found",
+    "cannot be found","can't find","does not exist","error 404","regional restrictions","your location or country",
+    "not available in your region","geographic restrictions",
+)
+
+_HTTP_SESSION = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(pool_connections=HTTP_POOL_CONNS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+_HTTP_SESSION.mount("http://", _HTTP_ADAPTER)
+_HTTP_SESSION.mount("https://", _HTTP_ADAPTER)
+
+_PROBE_POOL = ThreadPoolExecutor(max_workers=VALIDATION_WORKERS, thread_name_prefix="url-validate")
+
+Verdict = Tuple[bool, str, str]
+
+# =========================
+# Helpers
+# =========================
+
+def hostname(url: str) -> str:
+    try:
+        return urlparse(url).netloc.split(":")[0].lower()
+    except Exception:
+        return ""
+
+def canonical_url(url: str) -> str:
+    """
+    Cache key for a URL: lower-case scheme/host, default ports and fragments
+    dropped, path and query kept verbatim.
+    """
+    try:
+        p = urlparse((url or "").strip())
+    except Exception:
+        return (url or "").strip()
+    scheme = (p.scheme or "").lower()
+    host = (p.hostname or "").lower()
+    port = p.port
+    if port and not ((scheme == "https" and port == 443) or (scheme == "http" and port == 80)):
+        host = f"{host}:{port}"
+    return urlunparse((scheme, host, p.path or "/", p.params, p.query, ""))
+
+def _html_headers(ua: str) -> Dict[str, str]:
+    return {
+        "User-Agent": ua,
+        "Accept": "text/html,application/xhtml+xml",
+        "Accept-Language": "en-GB,en;q=0.9",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache",
+    }
+
+def _is_html_ctype(ct: str) -> bool:
+    ct = (ct or "").lower()
+    return ("text/html" in ct) or ("application/xhtml+xml" in ct)
+
+# =========================
+# Verdict cache
+# =========================
+
+class VerdictCache:
+    """
+    Thread-safe, bounded TTL cache of validation verdicts keyed by canonical URL.
+    Concurrent validations of the same URL are collapsed into one live check.
+    """
+
+    def __init__(self, ttl_ok: float, ttl_fail: float, max_entries: int):
+        self.ttl_ok = ttl_ok
+        self.ttl_fail = ttl_fail
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Verdict, float]]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Verdict]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if not hit:
+                return None
+            verdict, expires_at = hit
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return verdict
+
+    def put(self, key: str, verdict: Verdict) -> None:
+        ttl = self.ttl_ok if verdict[0] else self.ttl_fail
+        with self._lock:
+            self._entries[key] = (verdict, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def claim(self, key: str) -> Tuple[bool, threading.Event]:
+        """Return (owner, event). Non-owners wait on the event, then re-read the cache."""
+        with self._lock:
+            ev = self._inflight.get(key)
+            if ev is not None:
+                return False, ev
+            ev = threading.Event()
+            self._inflight[key] = ev
+            return True, ev
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            ev = self._inflight.pop(key, None)
+        if ev is not None:
+            ev.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+_VERDICTS = VerdictCache(VERDICT_TTL_OK, VERDICT_TTL_FAIL, VERDICT_CACHE_MAX)
+
+# =========================
+# Live checks
+# =========================
+
+class HtmlScan:
+    """
+    Incremental WAF/interstitial/structure signals over decoded body chunks.
+    Tokens that straddle a chunk boundary are caught via a short carry-over tail.
+    """
+
+    TOKENS = {
+        "html": "<html",
+        "article": "<article",
+        "h1": "<h1",
+        "p": "<p",
+        "a": "<a ",
+        "refresh": 'http-equiv="refresh"',
+    }
+    BLOCK_TAGS = ("accessdenied", "denied", "forbidden")
+
+    def __init__(self):
+        self.counts = {name: 0 for name in self.TOKENS}
+        self.chars = 0
+        self.deny_hit = False
+        self.block_tag_hit = False
+        self.complete = False
+        self._carry = ""
+        self._carry_len = max(len(t) for t in (*self.TOKENS.values(), *DENY_PHRASES, *self.BLOCK_TAGS)) - 1
+
+    def feed(self, text: str) -> None:
+        if not text:
+            return
+        self.chars += len(text)
+        window = self._carry + text.lower()
+        for name, tok in self.TOKENS.items():
+            self.counts[name] += window.count(tok) - self._carry.count(tok)
+        if not self.deny_hit:
+            self.deny_hit = any(ph in window for ph in DENY_PHRASES)
+        if not self.block_tag_hit:
+            self.block_tag_hit = any(tag in window for tag in self.BLOCK_TAGS)
+        self._carry = window[-self._carry_len:]
+
+    def has(self, name: str) -> bool:
+        return self.counts[name] > 0
+
+    def verdict(self) -> Tuple[Optional[bool], str]:
+        """
+        (False, reason) once a failure is certain, (None, "") while more body
+        could change it, and the full verdict once the body is complete. Only
+        the meta-refresh block page is certain mid-body (its signals only
+        grow); a pass has to see the whole (capped) body, since a refresh tag
+        anywhere in it can still turn the page into a block page.
+        """
+        has_article = self.has("article")
+        p_count = self.counts["p"]
+        body_len = self.chars
+
+        html_ok = self.has("html")
+        # Meta refresh block pages (refresh tag anywhere + denial wording)
+        blockpage = self.has("refresh") and self.block_tag_hit
+        if html_ok and blockpage:
+            return False, "meta_refresh_blockpage"
+        if not self.complete:
+            return None, ""
+
+        structure_ok = has_article or (self.has("h1") and p_count >= 2 and body_len >= 1500)
+        minimum_ok = has_article or (p_count >= 2 and body_len >= 5000)
+        links_ok = self.counts["a"] >= 3 or p_count >= 3
+
+        if not html_ok:
+            return False, "no_html_marker"
+        if blockpage:
+            return False, "meta_refresh_blockpage"
+        if not structure_ok:
+            return False, "insufficient_article_signals"
+        if not minimum_ok:
+            return False, "too_short_or_placeholder"
+        if self.deny_hit and not has_article and (p_count < 2 or body_len < 5000):
+            return False, "access_or_error_interstitial"
+        if not links_ok:
+            return False, "no_links_low_content"
+        return True, "ok"
+
+def _decoder_for(r: requests.Response):
+    try:
+        return codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+def _scan_body(r: requests.Response, scan: HtmlScan, settled: Callable[[HtmlScan], bool],
+               max_bytes: Optional[int] = None) -> HtmlScan:
+    """
+    Feed the response body through `scan` chunk by chunk. Stops once `settled(scan)`
+    is true or the byte budget is spent; a budget cut is treated as end-of-body.
+    """
+    streaming = HTTP_VALIDATION_STREAMING != "off"
+    budget = (max_bytes or HTTP_VALIDATION_MAX_BYTES) if streaming else None
+    decoder = _decoder_for(r)
+    read = 0
+    try:
+        for chunk in r.iter_content(chunk_size=HTTP_VALIDATION_CHUNK_BYTES):
+            if not chunk:
+                continue
+            if budget is not None:
+                chunk = chunk[:budget - read]
+            read += len(chunk)
+            scan.feed(decoder.decode(chunk))
+            if streaming and settled(scan):
+                return scan
+            if budget is not None and read >= budget:
+                break
+        scan.feed(decoder.decode(b"", final=True))
+        scan.complete = True
+        return scan
+    finally:
+        r.close()
+
+def _check_headers(r: requests.Response) -> Optional[str]:
+    """Header/URL-level checks on the primary GET (no body needed)."""
+    final_url = r.url
+
+    # 1) HTTP OK
+    if r.status_code != 200:
+        return f"status={r.status_code}"
+
+    # 2) HTML OK (content type; the <html marker is checked while streaming)
+    ctype = (r.headers.get("Content-Type") or "").lower()
+    if "text/html" not in ctype:
+        return f"content_type={ctype or 'unknown'}"
+
+    # 3) Not AMP / Proxy
+    ful = final_url.lower()
+    if "/amp" in ful or ful.startswith("https://amp.") or "amp." in hostname(final_url):
+        return "amp_or_proxy_url"
+
+    # ---- WAF/CDN cookie / header detection (domain-agnostic) ----
+    set_cookie = "; ".join([v.lower() for k, v in r.headers.items() if k.lower() == "set-cookie"])
+    if any(tok in set_cookie for tok in WAF_COOKIES):
+        return "waf_cookie_present"
+
+    server_header = (r.headers.get("Server") or "").lower()
+    via_header = (r.headers.get("Via") or "").lower()
+    x_ak_err = (r.headers.get("X-Akamai-Error") or "").lower()
+    if ("akamai" in (server_header + via_header)) and any(t in (server_header + via_header + x_ak_err) for t in ("error", "deny", "denied", "blocked")):
+        return "header_block_server"
+
+    return None
+
+def _check_primary(r: requests.Response) -> Tuple[Optional[str], int]:
+    """
+    Structural checks on the primary GET. Returns (failure reason or None,
+    decoded body length). The body is streamed and abandoned as soon as a
+    failure is certain; a pass reads it to the end (or the byte budget), so
+    the length handed to the cross-UA check is the whole capped body.
+    """
+    reason = _check_headers(r)
+    if reason:
+        r.close()
+        return reason, 0
+
+    scan = _scan_body(r, HtmlScan(), lambda s: s.verdict()[0] is False)
+    ok, reason = scan.verdict()
+    if not ok:
+        if reason == "no_html_marker":
+            reason = f"content_type={(r.headers.get('Content-Type') or '').lower() or 'unknown'}"
+        return reason, scan.chars
+    return None, scan.chars
+
+def _cross_ua_check(final_url: str, body_len: int) -> Tuple[Optional[str], str]:
+    """Cross-UA GET consistency (detect WAF serving different content to browsers)."""
+    try:
+        r2 = _HTTP_SESSION.get(
+            final_url,
+            headers=_html_headers(UA_DESKTOP_SAFARI),
+            timeout=HTTP_TIMEOUT,
+            allow_redirects=True,
+            stream=True,
+        )
+        ctype2 = (r2.headers.get("Content-Type") or "").lower()
+        if r2.status_code != 200 or "text/html" not in ctype2:
+            r2.close()
+            return "ua_inconsistent_blocked", r2.url
+
+        # Enough body to rule out both a missing <html marker and a >50% shrink.
+        # Both bodies are read under the same HTTP_VALIDATION_MAX_BYTES cap, so
+        # the lengths compare like for like.
+        min_len = 0.5 * body_len
+        scan = _scan_body(r2, HtmlScan(), lambda s: s.has("html") and s.chars >= min_len)
+    except Exception as exc:
+        return f"exception={type(exc).__name__}", final_url
+
+    if not scan.has("html"):
+        return "ua_inconsistent_blocked", r2.url
+    if scan.chars < min_len:
+        return "ua_inconsistent_body_shrink", r2.url
+    return None, r2.url
+
+def _probe_ok(u: str, ua: str) -> bool:
+    """Public reachability probe: HEAD first, tiny ranged GET fallback."""
+    try:
+        rr = _HTTP_SESSION.head(
+            u,
+            headers={"User-Agent": ua, "Accept-Language": "en-GB,en;q=0.9"},
+            timeout=HTTP_TIMEOUT,
+            allow_redirects=True,
+        )
+        if rr.status_code == 200 and _is_html_ctype(rr.headers.get("Content-Type")):
+            return True
+
+        if rr.status_code in (403, 405, 406, 429) or not _is_html_ctype(rr.headers.get("Content-Type")):
+            headers = _html_headers(ua)
+            headers["Range"] = f"bytes=0-{PROBE_MAX_BYTES - 1}"
+            rg = _HTTP_SESSION.get(u, headers=headers, timeout=HTTP_TIMEOUT, allow_redirects=True, stream=True)
+            if rg.status_code != 200:
+                rg.close()
+                return False
+            ctg = (rg.headers.get("Content-Type") or "").lower()
+            if _is_html_ctype(ctg):
+                rg.close()
+                return True
+            # Servers that ignore Range still only cost PROBE_MAX_BYTES here
+            scan = _scan_body(rg, HtmlScan(), lambda s: s.has("html"), max_bytes=PROBE_MAX_BYTES)
+            return scan.has("html")
+        return False
+    except Exception:
+        return False
+
+def _validate_live(url: str) -> Verdict:
+    """
+    Primary GET + structural checks, then the cross-UA GET and the three
+    reachability probes concurrently. Returns as soon as the verdict is settled:
+    any cross-UA failure, or a 2-of-3 probe majority either way.
+    """
+    try:
+        r = _HTTP_SESSION.get(url, headers=_html_headers(HTTP_UA), timeout=HTTP_TIMEOUT, allow_redirects=True, stream=True)
+        final_url = r.url
+        reason, body_len = _check_primary(r)
+        if reason:
+            return False, reason, final_url
+    except Exception as exc:
+        return False, f"exception={type(exc).__name__}", url
+
+    cross = _PROBE_POOL.submit(_cross_ua_check, final_url, body_len)
+    probes = {_PROBE_POOL.submit(_probe_ok, final_url, ua) for ua in PROBE_UAS}
+    need = len(PROBE_UAS) // 2 + 1
+
+    pending = set(probes) | {cross}
+    probes_ok = probes_failed = 0
+    cross_done = False
+
+    while pending:
+        done, pending = wait(pending, timeout=HTTP_TIMEOUT * 3, return_when=FIRST_COMPLETED)
+        if not done:
+            return False, "validation_timeout", final_url
+        for fut in done:
+            if fut is cross:
+                reason, cross_url = fut.result()
+                if reason:
+                    return False, reason, cross_url
+                cross_done = True
+            elif fut.result():
+                probes_ok += 1
+            else:
+                probes_failed += 1
+
+        if probes_failed >= need:
+            return False, "unreachable_for_common_UA", final_url
+        if cross_done and probes_ok >= need:
+            return True, "ok", final_url
+
+    return False, "unreachable_for_common_UA", final_url
+
+# =========================
+# Public API
+# =========================
+
+def validate_url(url: str, use_cache: bool = True) -> Verdict:
+    """
+    Structural + reachability validator for public HTML article pages.
+    Returns (ok, reason, final_url). Verdicts are cached by canonical URL.
+    """
+    key = canonical_url(url)
+    if not use_cache:
+        return _validate_live(url)
+
+    cached = _VERDICTS.get(key)
+    if cached is not None:
+        logger.debug(f"[url_validator] cache hit ok={cached[0]} reason={cached[1]} url={url}")
+        return cached
+
+    # Cross-run verdicts from the persistent link store
+    stored = link_store.get_url_verdict(key)
+    if stored is not None:
+        logger.debug(f"[url_validator] store hit ok={stored[0]} reason={stored[1]} url={url}")
+        _VERDICTS.put(key, stored)
+        return stored
+
+    owner, ev = _VERDICTS.claim(key)
+    if not owner:
+        ev.wait(HTTP_TIMEOUT * 5)
+        cached = _VERDICTS.get(key)
+        if cached is not None:
+            return cached
+        return _validate_live(url)
+
+    try:
+        t0 = time.time()
+        verdict = _validate_live(url)
+        _VERDICTS.put(key, verdict)
+        if verdict[0] and verdict[2]:
+            _VERDICTS.put(canonical_url(verdict[2]), verdict)
+        ttl = VERDICT_TTL_OK if verdict[0] else VERDICT_TTL_FAIL
+        link_store.record_url_verdict(key, hostname(url), verdict, ttl)
+        logger.info(
+            f"[url_validator] ok={verdict[0]} reason={verdict[1]} "
+            f"host={hostname(url)} elapsed={time.time() - t0:.2f}s"
+        )
+        return verdict
+    finally:
+        _VERDICTS.release(key)
+
+def clear_verdict_cache() -> None:
+    _VERDICTS.clear()
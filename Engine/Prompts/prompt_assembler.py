@@ -0,0 +1,201 @@
+# Engine/Prompts/prompt_assembler.py
+
+import re
+import math
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional
+
+# =========================
+# Token estimation
+# =========================
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_SIM_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local estimate of BPE token count: words cost ~1 token per 4 letters
+    (min 1), digit runs ~1 per 3 digits, each punctuation mark 1. Close enough
+    to tiktoken on English prose/JSON to size prompt sections; no dependency.
+    """
+    if not text:
+        return 0
+    n = 0
+    for piece in _TOKEN_RE.findall(text):
+        c = piece[0]
+        if c.isalpha():
+            n += max(1, math.ceil(len(piece) / 4))
+        elif c.isdigit():
+            n += max(1, math.ceil(len(piece) / 3))
+        else:
+            n += 1
+    return n
+
+_OMITTED_NOTE_TOKENS = estimate_tokens("[+99999 more entries not shown]")
+
+def similarity_words(text: str) -> FrozenSet[str]:
+    return frozenset(_SIM_WORD_RE.findall((text or "").lower()))
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter) if inter else 0.0
+
+# =========================
+# Budgeted block
+# =========================
+
+class _Entry:
+    __slots__ = ("text", "tokens", "words")
+
+    def __init__(self, text: str, tokens: int):
+        self.text = text
+        self.tokens = tokens
+        self.words: Optional[FrozenSet[str]] = None
+
+class BudgetedBlock:
+    """
+    Insertion-ordered, de-duplicated collection of prompt lines that renders
+    itself within a token budget.
+
+    Works as a drop-in for the `set`s it replaces (`add`, `in`, `len`, iteration),
+    but keeps per-entry token estimates and the rendered lines incrementally, so
+    adding an entry is O(1) and nothing is re-sorted or re-measured per render.
+    Over budget, entries are kept by priority: the newest entries first (up to
+    `recent_share` of the budget), then those most similar to the query, then
+    the next newest; the survivors are emitted in their original order.
+
+    `budget_tokens <= 0` disables truncation. `max_entries` caps how many
+    entries are emitted regardless of budget.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[str] = (),
+        budget_tokens: int = 0,
+        sep: str = "\n",
+        recent_share: float = 0.5,
+        use_similarity: bool = True,
+        max_entries: int = 0,
+        unique: bool = True,
+    ):
+        self.budget_tokens = budget_tokens
+        self.sep = sep
+        self.recent_share = recent_share
+        self.use_similarity = use_similarity
+        self.max_entries = max_entries
+        self.unique = unique
+        self._sep_tokens = estimate_tokens(sep) or 1
+        self._entries: List[_Entry] = []
+        self._index: Dict[str, int] = {}
+        self._total_tokens = 0
+        self._parts: List[str] = []
+        self.last_omitted = 0
+        for item in items:
+            self.add(item)
+
+    # --- set-like interface ---
+
+    def add(self, item: str) -> None:
+        if not item:
+            return
+        if self.unique and item in self._index:
+            return
+        entry = _Entry(item, estimate_tokens(item) + self._sep_tokens)
+        self._index[item] = len(self._entries)
+        self._entries.append(entry)
+        self._total_tokens += entry.tokens
+        self._parts.append(item)
+
+    # alias so the block can stand in for a list of history entries
+    append = add
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._index
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return (e.text for e in self._entries)
+
+    def entries_since(self, start: int) -> List[str]:
+        """Entries added after the first `start` (e.g. a previous `len()`)."""
+        return self._parts[start:]
+
+    @property
+    def total_tokens(self) -> int:
+        return self._total_tokens
+
+    # --- rendering ---
+
+    def _fits_whole(self) -> bool:
+        within_budget = self.budget_tokens <= 0 or self._total_tokens <= self.budget_tokens
+        within_count = self.max_entries <= 0 or len(self._entries) <= self.max_entries
+        return within_budget and within_count
+
+    def _words(self, entry: _Entry) -> FrozenSet[str]:
+        if entry.words is None:
+            entry.words = similarity_words(entry.text)
+        return entry.words
+
+    def select(self, query: str = "") -> List[int]:
+        """Indices (ascending) of the entries kept for `query`."""
+        n = len(self._entries)
+        if self._fits_whole():
+            self.last_omitted = 0
+            return list(range(n))
+
+        budget = self.budget_tokens if self.budget_tokens > 0 else self._total_tokens
+        budget = max(0, budget - _OMITTED_NOTE_TOKENS - self._sep_tokens)  # room for the omission note
+        cap = self.max_entries if self.max_entries > 0 else n
+        chosen: Dict[int, None] = {}
+        used = 0
+
+        def take(i: int, limit: int) -> bool:
+            nonlocal used
+            t = self._entries[i].tokens
+            if len(chosen) >= cap or used + t > limit:
+                return False
+            chosen[i] = None
+            used += t
+            return True
+
+        # 1) most recent, up to recent_share of the budget
+        recent_limit = int(budget * self.recent_share)
+        for i in range(n - 1, -1, -1):
+            if not take(i, recent_limit):
+                break
+
+        # 2) most similar to the query
+        if self.use_similarity and query and len(chosen) < cap:
+            q = similarity_words(query)
+            scored = [
+                (_jaccard(q, self._words(self._entries[i])), i)
+                for i in range(n) if i not in chosen
+            ]
+            scored.sort(reverse=True)
+            for score, i in scored:
+                if score <= 0.0 or len(chosen) >= cap:
+                    break
+                take(i, budget)
+
+        # 3) backfill with the next most recent
+        for i in range(n - 1, -1, -1):
+            if len(chosen) >= cap:
+                break
+            if i not in chosen:
+                take(i, budget)
+
+        self.last_omitted = n - len(chosen)
+        return sorted(chosen)
+
+    def render(self, query: str = "") -> str:
+        if self._fits_whole():
+            self.last_omitted = 0
+            return self.sep.join(self._parts)
+        kept = self.select(query)
+        text = self.sep.join(self._entries[i].text for i in kept)
+        if self.last_omitted:
+            text += f"{self.sep}[+{self.last_omitted} more entries not shown]"
+        return text
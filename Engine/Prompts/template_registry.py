@@ -0,0 +1,143 @@
+# Engine/Prompts/template_registry.py
+
+import os
+import time
+import hashlib
+import string
+import threading
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from logger import logger
+
+# =========================
+# Config
+# =========================
+
+# Seconds between mtime checks for a template (0 = stat on every lookup)
+TEMPLATE_RELOAD_INTERVAL = float(os.getenv("TEMPLATE_RELOAD_INTERVAL", "2.0"))
+
+_FORMATTER = string.Formatter()
+
+# (literal_text, field_name | None, format_spec, conversion | None), as string.Formatter.parse
+Segment = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+# =========================
+# Compiled template
+# =========================
+
+class CompiledTemplate:
+    """
+    A `str.format` template pre-parsed into literal/placeholder segments.
+    `render(**values)` joins the segments and inserts each value verbatim, so
+    callers no longer need to brace-escape their inputs. The output is the
+    same as `text.format(**values)`.
+    """
+
+    __slots__ = ("text", "version", "segments", "fields", "_simple")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.version = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        self.segments: List[Segment] = list(_FORMATTER.parse(text))
+        self.fields: FrozenSet[str] = frozenset(
+            field for _, field, _, _ in self.segments if field is not None
+        )
+        # Fast path: every placeholder is a bare keyword with no conversion/spec
+        self._simple = all(
+            field is None or (field.isidentifier() and not conv and not spec)
+            for _, field, spec, conv in self.segments
+        )
+
+    def render(self, **values: Any) -> str:
+        if not self._simple:
+            return self.text.format(**values)
+        parts: List[str] = []
+        append = parts.append
+        for literal, field, _, _ in self.segments:
+            if literal:
+                append(literal)
+            if field is not None:
+                value = values[field]  # KeyError on a missing field, as str.format
+                append(value if type(value) is str else format(value, ""))
+        return "".join(parts)
+
+    def missing(self, values: Dict[str, Any]) -> List[str]:
+        return sorted(f for f in self.fields if f not in values)
+
+@lru_cache(maxsize=2048)
+def compile_template(text: str) -> CompiledTemplate:
+    """Compile an inline template string (e.g. one line of questions.txt), memoised."""
+    return CompiledTemplate(text)
+
+# =========================
+# Registry
+# =========================
+
+class _Entry:
+    __slots__ = ("template", "mtime_ns", "size", "checked_at")
+
+    def __init__(self, template: CompiledTemplate, mtime_ns: int, size: int, checked_at: float):
+        self.template = template
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.checked_at = checked_at
+
+class TemplateRegistry:
+    """
+    Loads each template file once, keeps it compiled, and reloads it when the
+    file's mtime/size changes (checked at most every TEMPLATE_RELOAD_INTERVAL).
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, path: str, st: os.stat_result, now: float) -> _Entry:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        entry = _Entry(CompiledTemplate(text), st.st_mtime_ns, st.st_size, now)
+        logger.info(f"📝 Template loaded: {path} (len={len(text)}, version={entry.template.version})")
+        return entry
+
+    def get(self, path: str) -> CompiledTemplate:
+        now = time.time()
+        entry = self._entries.get(path)
+        if entry is not None and now - entry.checked_at < TEMPLATE_RELOAD_INTERVAL:
+            return entry.template
+
+        st = os.stat(path)  # FileNotFoundError propagates, as open() did
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                entry.checked_at = now
+                return entry.template
+            if entry is not None:
+                logger.info(f"🔄 Template changed on disk, reloading: {path}")
+            entry = self._load(path, st, now)
+            self._entries[path] = entry
+            return entry.template
+
+    def versions(self) -> Dict[str, str]:
+        with self._lock:
+            return {path: e.template.version for path, e in self._entries.items()}
+
+_REGISTRY = TemplateRegistry()
+
+# =========================
+# Public API
+# =========================
+
+def get_template(path: str) -> CompiledTemplate:
+    """Compiled template for a file path (relative to the working directory, like open())."""
+    return _REGISTRY.get(path)
+
+def render_template(path: str, **values: Any) -> str:
+    return _REGISTRY.get(path).render(**values)
+
+def template_version(path: str) -> str:
+    """Short content hash of the current template, for cache keys and provenance."""
+    return _REGISTRY.get(path).version
+
+def loaded_template_versions() -> Dict[str, str]:
+    return _REGISTRY.versions()
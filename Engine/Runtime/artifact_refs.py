@@ -0,0 +1,57 @@
+# Engine/Runtime/artifact_refs.py
+
+import importlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from logger import logger
+from prompt_routing import ARTIFACT_PATHS, ARTIFACT_READ_PROMPTS, PROMPT_MODULES
+from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Runtime.artifacts import final_artifact, publish_artifact
+
+class ArtifactReferenceError(ValueError):
+    """A referenced artifact is unknown or could not be read."""
+
+def _reference(data: Dict[str, Any], field: str) -> Optional[Tuple[str, str]]:
+    """(artifact, run_id) when `field` is given by reference; inline text always wins."""
+    value = data.get(field)
+    if isinstance(value, dict):
+        if not value.get("run_id"):
+            raise ArtifactReferenceError(f"Reference for '{field}' has no run_id")
+        return value.get("artifact") or field, value["run_id"]
+    ref_run_id = data.get(f"{field}_run_id")
+    if not value and ref_run_id:
+        return field, ref_run_id
+    return None
+
+def load_artifact(artifact: str, run_id: str) -> str:
+    """Text of `artifact` for `run_id`, from the artifact bus or Supabase."""
+    read_prompt = ARTIFACT_READ_PROMPTS.get(artifact)
+    if read_prompt:
+        result = importlib.import_module(PROMPT_MODULES[read_prompt]).run_prompt({"run_id": run_id}) or {}
+        if result.get("status") != "success" or artifact not in result:
+            raise ArtifactReferenceError(f"{artifact} for run_id {run_id}: {result.get('message', 'not available')}")
+        return result[artifact]
+
+    path = ARTIFACT_PATHS.get(artifact)
+    if not path:
+        raise ArtifactReferenceError(f"Unknown artifact: {artifact}")
+    path = path.format(run_id=run_id)
+    content = final_artifact(path)
+    if content is None:
+        try:
+            content = read_supabase_file(path)
+        except Exception as e:
+            raise ArtifactReferenceError(f"{artifact} for run_id {run_id}: {e}") from e
+        publish_artifact(path, content, final=True)  # later stages referencing it skip the GET
+    return content.strip()
+
+def resolve_artifact_refs(data: Dict[str, Any], fields: Iterable[str]) -> Dict[str, Any]:
+    """Replace each referenced field in `data` with the artifact text, in place."""
+    for field in fields:
+        ref = _reference(data, field)
+        if ref is None:
+            continue
+        artifact, run_id = ref
+        data[field] = load_artifact(artifact, run_id)
+        logger.info(f"[ArtifactRefs] {field} <- {artifact} ({run_id}, {len(data[field])} chars)")
+    return data
@@ -0,0 +1,174 @@
+# Engine/Runtime/artifacts.py
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from logger import logger
+from Engine.Files.read_supabase_file import read_supabase_file
+
+# =========================
+# Config
+# =========================
+
+ARTIFACT_BUS_MAX_KEYS = int(os.getenv("ARTIFACT_BUS_MAX_KEYS", "500"))
+ARTIFACT_POLL_INTERVAL = float(os.getenv("ARTIFACT_POLL_INTERVAL", "2.0"))  # Supabase fallback polling
+
+Snapshot = Dict[str, Any]
+Subscriber = Callable[[Snapshot], None]
+
+# =========================
+# In-process bus
+# =========================
+
+class ArtifactBus:
+    """
+    Latest version of each artifact (keyed by its Supabase path) plus waiters
+    and push subscribers. A snapshot is:
+        {"key", "version", "content", "members", "final", "updated_at"}
+    where `members` holds the top-level JSON members completed so far.
+    """
+
+    def __init__(self):
+        self._latest: "OrderedDict[str, Snapshot]" = OrderedDict()
+        self._subs: Dict[str, List[Subscriber]] = {}
+        self._cond = threading.Condition()
+
+    def publish(self, key: str, content: str, final: bool = False, members: Optional[Dict[str, Any]] = None) -> int:
+        with self._cond:
+            prev = self._latest.get(key)
+            version = (prev["version"] + 1) if prev else 1
+            snap = {
+                "key": key,
+                "version": version,
+                "content": content,
+                "members": dict(members or (prev["members"] if prev else {})),
+                "final": final,
+                "updated_at": time.time(),
+            }
+            self._latest[key] = snap
+            self._latest.move_to_end(key)
+            while len(self._latest) > ARTIFACT_BUS_MAX_KEYS:
+                old_key, _ = self._latest.popitem(last=False)
+                self._subs.pop(old_key, None)
+            subs = list(self._subs.get(key, ()))
+            if final:
+                self._subs.pop(key, None)
+            self._cond.notify_all()
+
+        for cb in subs:
+            try:
+                cb(dict(snap))
+            except Exception:
+                logger.exception(f"[Artifacts] subscriber failed for {key}")
+        return version
+
+    def latest(self, key: str) -> Optional[Snapshot]:
+        with self._cond:
+            snap = self._latest.get(key)
+            return dict(snap) if snap else None
+
+    def subscribe(self, key: str, callback: Subscriber) -> None:
+        """Call `callback(snapshot)` on every new version (immediately if one exists)."""
+        with self._cond:
+            self._subs.setdefault(key, []).append(callback)
+            snap = self._latest.get(key)
+        if snap:
+            callback(dict(snap))
+
+    def unsubscribe(self, key: str, callback: Subscriber) -> None:
+        with self._cond:
+            subs = self._subs.get(key)
+            if subs and callback in subs:
+                subs.remove(callback)
+                if not subs:
+                    del self._subs[key]
+
+    def wait(self, key: str, ready: Callable[[Snapshot], bool], timeout: float) -> Optional[Snapshot]:
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                snap = self._latest.get(key)
+                if snap and ready(snap):
+                    return dict(snap)
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+_BUS = ArtifactBus()
+
+# =========================
+# Public API
+# =========================
+
+def publish_artifact(key: str, content: str, final: bool = False, members: Optional[Dict[str, Any]] = None) -> int:
+    """Publish a new (partial or final) version of `key`; returns the version number."""
+    return _BUS.publish(key, content, final=final, members=members)
+
+def latest_artifact(key: str) -> Optional[Snapshot]:
+    return _BUS.latest(key)
+
+def subscribe_artifact(key: str, callback: Subscriber) -> None:
+    _BUS.subscribe(key, callback)
+
+def unsubscribe_artifact(key: str, callback: Subscriber) -> None:
+    _BUS.unsubscribe(key, callback)
+
+def final_artifact(key: str) -> Optional[str]:
+    """Content of `key` if its final version was published in this process."""
+    snap = _BUS.latest(key)
+    return snap["content"] if snap and snap["final"] else None
+
+def wait_for_final_artifact(key: str, timeout: float) -> Optional[str]:
+    """
+    Drop-in for a polling sleep: returns the final content as soon as it is
+    published in this process, or None once `timeout` elapses.
+    """
+    snap = _BUS.wait(key, lambda s: s["final"], timeout)
+    return snap["content"] if snap else None
+
+def wait_for_members(
+    key: str,
+    partial_path: Optional[str],
+    ready: Callable[[Dict[str, Any], bool], bool],
+    timeout: float,
+    parse_final: Callable[[str], Dict[str, Any]] = json.loads,
+) -> Optional[Dict[str, Any]]:
+    """
+    Wait until `ready(members, final)` holds for the artifact at `key` and return
+    its members. Uses the in-process bus when the producer runs here; otherwise
+    polls the partial snapshot at `partial_path` and the final file in Supabase.
+    Returns None on timeout.
+    """
+    deadline = time.time() + timeout
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return None
+
+        snap = _BUS.wait(
+            key,
+            lambda s: ready(s["members"], s["final"]),
+            min(remaining, ARTIFACT_POLL_INTERVAL),
+        )
+        if snap:
+            if snap["final"] and not snap["members"]:
+                return parse_final(snap["content"])
+            return snap["members"]
+
+        # Producer may live in another worker: fall back to storage
+        try:
+            return parse_final(read_supabase_file(key))
+        except Exception:
+            pass
+        if partial_path:
+            try:
+                members = json.loads(read_supabase_file(partial_path))
+                if ready(members, False):
+                    return members
+            except Exception:
+                pass
@@ -0,0 +1,152 @@
+# Engine/Runtime/batch.py
+
+import os
+import copy
+import uuid
+import importlib
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from logger import logger
+from prompt_routing import BLOCKING_PROMPTS, PROMPT_MODULES, PROMPT_EXECUTION_CLASSES
+from Engine.Runtime.executors import ExecutorSaturated, execution_class_for, submit_to_class
+from Engine.Webhooks.idempotency import dispatch_key
+
+# =========================
+# Config
+# =========================
+#
+# A batch is one request naming several independent prompts plus the payload
+# they share, e.g.
+#     {"prompts": ["write_prompt_3_report_assets", "write_prompt_4_tables"],
+#      "payload": {...shared fields...},
+#      "overrides": {"write_prompt_4_tables": {"tables_mode": "local"}}}
+# Without "payload", every top-level field other than "prompts"/"overrides" is
+# shared. Members are dispatched exactly as POST / would dispatch them, all at
+# once; the response carries each member's run_id (or result, for blocking
+# prompts) and, separately, each member's error.
+
+BATCH_MAX_PROMPTS = int(os.getenv("BATCH_MAX_PROMPTS", "16"))
+
+_RESERVED_KEYS = ("prompts", "payload", "overrides", "prompt")
+
+class BatchRequestError(ValueError):
+    """The batch request itself is malformed (400); member failures never raise this."""
+
+# =========================
+# Members
+# =========================
+
+class BatchMember:
+    """One prompt of a batch, with its own copy of the shared payload."""
+
+    def __init__(self, prompt: str, data: Dict[str, Any]):
+        self.prompt = prompt
+        self.data = data
+        self.blocking = prompt in BLOCKING_PROMPTS
+        self.exec_class = execution_class_for(prompt, PROMPT_EXECUTION_CLASSES.get(prompt), self.blocking)
+        self.future: Optional[Future] = None
+        self.result: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        if not self.blocking:
+            self.data["run_id"] = self.data.get("run_id") or str(uuid.uuid4())
+
+    @property
+    def run_id(self) -> Optional[str]:
+        return self.data.get("run_id")
+
+    def fail(self, message: str) -> None:
+        self.error = message
+
+    def submit(self) -> None:
+        """Hand the member to its execution class (inline members run here)."""
+        if self.error:
+            return
+        try:
+            module = importlib.import_module(PROMPT_MODULES[self.prompt])
+            self.future = submit_to_class(self.exec_class, self._run, module)
+        except ExecutorSaturated as e:
+            self.fail(str(e))
+        except Exception as e:
+            logger.exception(f"[Batch] could not dispatch {self.prompt}")
+            self.fail(f"Failed to dispatch: {e}")
+
+    def _run(self, module) -> None:
+        try:
+            self.result.update(module.run_prompt(self.data) or {})
+        except Exception as e:
+            logger.exception(f"[Batch] {self.prompt} failed")
+            self.fail(str(e))
+
+    def wait(self) -> None:
+        if self.blocking and self.future is not None:
+            self.future.result()
+
+    def outcome(self) -> Dict[str, Any]:
+        if self.error:
+            return {"status": "error", "run_id": self.run_id, "message": self.error}
+        if self.blocking:
+            return dict(self.result)
+        return {
+            "status": "processing",
+            "message": "Script launched, run_id will be available via follow-up.",
+            "run_id": self.run_id,
+        }
+
+# =========================
+# Public API
+# =========================
+
+def parse_batch(data: Dict[str, Any]) -> List[BatchMember]:
+    prompts = data.get("prompts")
+    if not isinstance(prompts, list) or not prompts or not all(isinstance(p, str) for p in prompts):
+        raise BatchRequestError("'prompts' must be a non-empty list of prompt names")
+    if len(prompts) > BATCH_MAX_PROMPTS:
+        raise BatchRequestError(f"At most {BATCH_MAX_PROMPTS} prompts per batch")
+    if len(set(prompts)) != len(prompts):
+        raise BatchRequestError("Each prompt may appear only once per batch")
+    unknown = [p for p in prompts if p not in PROMPT_MODULES]
+    if unknown:
+        raise BatchRequestError(f"Unknown prompt(s): {', '.join(unknown)}")
+
+    shared = data.get("payload")
+    if shared is None:
+        shared = {k: v for k, v in data.items() if k not in _RESERVED_KEYS}
+    overrides = data.get("overrides") or {}
+    if not isinstance(shared, dict) or not isinstance(overrides, dict):
+        raise BatchRequestError("'payload' and 'overrides' must be objects")
+
+    members = []
+    for prompt in prompts:
+        member_data = copy.deepcopy(shared)
+        member_data.update(copy.deepcopy(overrides.get(prompt) or {}))
+        member_data["prompt"] = prompt
+        members.append(BatchMember(prompt, member_data))
+    return members
+
+def batch_key(members: List[BatchMember], header_key: Optional[str]) -> Optional[str]:
+    """Only an explicit Idempotency-Key deduplicates a batch; members get their own run_ids."""
+    if not header_key:
+        return None
+    return dispatch_key("batch:" + "+".join(m.prompt for m in members), {}, header_key)
+
+def batch_response(members: List[BatchMember]) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for m in members:
+        outcome = m.outcome()
+        if outcome.get("status") == "error":
+            errors[m.prompt] = outcome.get("message") or "Unknown error"
+        else:
+            results[m.prompt] = outcome
+    if not errors:
+        status = "processing" if any(not m.blocking for m in members) else "success"
+    else:
+        status = "partial" if results else "error"
+    logger.info(f"[Batch] {len(members)} prompt(s): {len(results)} dispatched, {len(errors)} failed")
+    return {
+        "status": status,
+        "run_ids": {m.prompt: m.run_id for m in members if m.prompt in results and m.run_id},
+        "results": results,
+        "errors": errors,
+    }
@@ -0,0 +1,201 @@
+# Engine/Runtime/cpu_pool.py
+
+import os
+import mmap
+import tempfile
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from logger import logger
+
+# =========================
+# Config
+# =========================
+
+CPU_POOL = os.getenv("CPU_POOL", "off").strip().lower()                # "on" | "off"
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+CPU_POOL_START_METHOD = os.getenv("CPU_POOL_START_METHOD", "forkserver")
+# Inputs/outputs below this many characters are pickled; larger ones go through a spool file
+CPU_POOL_SPOOL_MIN_CHARS = int(os.getenv("CPU_POOL_SPOOL_MIN_CHARS", "65536"))
+# Payloads smaller than this run in the calling thread (process handoff costs more)
+CPU_POOL_MIN_CHARS = int(os.getenv("CPU_POOL_MIN_CHARS", "16384"))
+_DEFAULT_SPOOL_DIR = "/dev/shm" if os.access("/dev/shm", os.W_OK) else tempfile.gettempdir()
+CPU_POOL_SPOOL_DIR = os.getenv("CPU_POOL_SPOOL_DIR", _DEFAULT_SPOOL_DIR)
+
+# =========================
+# Registry
+# =========================
+#
+# name -> "module:function". Each function is pure CPU work: it takes its text
+# inputs as keyword arguments and returns a str or a dict. Modules are imported
+# once per worker, so module-level dictionaries/regexes are already loaded when
+# a task arrives.
+
+CPU_TRANSFORMS: Dict[str, str] = {
+    "format_combine": "Scripts.Predictive_Report.format_combine:format_combine_text",
+    "csv_content": "Scripts.Predictive_Report.csv_content:build_csv_text",
+    "merge_questions": "Scripts.Explainer_Report.merge_questions:convert_ae_to_be",
+    "combine": "Scripts.Predictive_Report.combine:combine_blocks",
+}
+
+def _resolve(target: str) -> Callable[..., Any]:
+    module_name, _, func_name = target.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+# =========================
+# Spool files (large text handoff)
+# =========================
+#
+# Large strings are written once to a file on tmpfs and mapped by the other
+# side, instead of being pickled through the pool's pipe in chunks.
+
+class _Spooled:
+    __slots__ = ("path", "size")
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+
+def _spool(text: str) -> _Spooled:
+    data = text.encode("utf-8")
+    fd, path = tempfile.mkstemp(prefix="cpu-", suffix=".txt", dir=CPU_POOL_SPOOL_DIR)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return _Spooled(path, len(data))
+
+def _unspool(spooled: _Spooled, delete: bool) -> str:
+    try:
+        if spooled.size == 0:
+            return ""
+        with open(spooled.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return str(memoryview(mm), "utf-8")
+    finally:
+        if delete:
+            _discard(spooled)
+
+def _discard(value: Any) -> None:
+    if isinstance(value, _Spooled):
+        try:
+            os.unlink(value.path)
+        except FileNotFoundError:
+            pass
+
+def _pack(value: Any) -> Any:
+    if isinstance(value, str) and len(value) >= CPU_POOL_SPOOL_MIN_CHARS:
+        return _spool(value)
+    if isinstance(value, dict):
+        return {k: _pack(v) for k, v in value.items()}
+    return value
+
+def _unpack(value: Any, delete: bool) -> Any:
+    if isinstance(value, _Spooled):
+        return _unspool(value, delete)
+    if isinstance(value, dict):
+        return {k: _unpack(v, delete) for k, v in value.items()}
+    return value
+
+def _discard_all(value: Any) -> None:
+    if isinstance(value, dict):
+        for v in value.values():
+            _discard_all(v)
+    else:
+        _discard(value)
+
+# =========================
+# Worker side
+# =========================
+
+def _warm_worker(targets) -> None:
+    for target in targets:
+        try:
+            _resolve(target)
+        except Exception as e:
+            logger.warning(f"[CPUPool] could not preload {target}: {e}")
+
+def _ping() -> int:
+    return os.getpid()
+
+def _run_in_worker(target: str, packed_kwargs: Dict[str, Any]) -> Any:
+    # Inputs belong to the parent, which deletes them; outputs are ours to create
+    kwargs = _unpack(packed_kwargs, delete=False)
+    return _pack(_resolve(target)(**kwargs))
+
+# =========================
+# Pool
+# =========================
+
+class _CpuPool:
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _create(self) -> ProcessPoolExecutor:
+        targets = tuple(CPU_TRANSFORMS.values())
+        ctx = multiprocessing.get_context(CPU_POOL_START_METHOD)
+        if CPU_POOL_START_METHOD == "forkserver":
+            # Load the transform modules once in the fork server; workers inherit them
+            ctx.set_forkserver_preload(sorted({t.partition(":")[0] for t in targets}))
+        pool = ProcessPoolExecutor(
+            max_workers=CPU_POOL_WORKERS,
+            mp_context=ctx,
+            initializer=_warm_worker,
+            initargs=(targets,),
+        )
+        logger.info(f"[CPUPool] 🧮 started {CPU_POOL_WORKERS} worker(s) via {CPU_POOL_START_METHOD}")
+        return pool
+
+    def get(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = self._create()
+            return self._pool
+
+    def reset(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+_POOL = _CpuPool()
+
+# =========================
+# Public API
+# =========================
+
+def cpu_pool_enabled() -> bool:
+    return CPU_POOL == "on"
+
+def start_cpu_pool() -> None:
+    """Start and warm the worker processes (no-op unless CPU_POOL=on)."""
+    if not cpu_pool_enabled():
+        return
+    pool = _POOL.get()
+    pids = {f.result() for f in [pool.submit(_ping) for _ in range(CPU_POOL_WORKERS)]}
+    logger.info(f"[CPUPool] warm workers: {sorted(pids)}")
+
+def run_cpu_transform(name: str, **kwargs: Any) -> Any:
+    """
+    Run registered transform `name` with keyword inputs. Uses the process pool
+    when CPU_POOL=on and the text is large enough to be worth it; otherwise,
+    or if the pool breaks, runs it in the calling thread.
+    """
+    target = CPU_TRANSFORMS[name]
+    size = sum(len(v) for v in kwargs.values() if isinstance(v, str))
+    if not cpu_pool_enabled() or size < CPU_POOL_MIN_CHARS:
+        return _resolve(target)(**kwargs)
+
+    pool = _POOL.get()
+    packed = _pack(kwargs)
+    try:
+        result = pool.submit(_run_in_worker, target, packed).result()
+    except BrokenProcessPool:
+        logger.warning(f"[CPUPool] pool broken while running {name}; restarting and running inline")
+        _POOL.reset(pool)
+        return _resolve(target)(**kwargs)
+    finally:
+        _discard_all(packed)
+    return _unpack(result, delete=True)
@@ -0,0 +1,168 @@
+# Engine/Runtime/executors.py
+
+import os
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from logger import logger
+
+# =========================
+# Config
+# =========================
+#
+# inline : run on the request thread, no handoff (sub-millisecond formatters)
+# io     : LLM / Supabase-bound prompts
+# long   : multi-minute pipelines (question/explainer/image generation, file moves)
+# poll   : read_* prompts that sleep-poll for a file another prompt writes; kept
+#          out of io so waiting reads can never occupy the workers the writes
+#          they wait for need (their threads mostly sleep, so the pool is wide)
+#
+# Each class has its own worker count and bounded queue; when a class is full,
+# new work for it is rejected (503) instead of queueing behind the other classes.
+
+INLINE = "inline"
+IO = "io"
+LONG = "long"
+POLL = "poll"
+
+EXEC_INLINE_LIMIT = int(os.getenv("EXEC_INLINE_LIMIT", "64"))    # concurrent inline calls
+EXEC_IO_WORKERS = int(os.getenv("EXEC_IO_WORKERS", "16"))
+EXEC_IO_QUEUE = int(os.getenv("EXEC_IO_QUEUE", "64"))
+EXEC_LONG_WORKERS = int(os.getenv("EXEC_LONG_WORKERS", "2"))
+EXEC_LONG_QUEUE = int(os.getenv("EXEC_LONG_QUEUE", "8"))
+EXEC_POLL_WORKERS = int(os.getenv("EXEC_POLL_WORKERS", "32"))
+EXEC_POLL_QUEUE = int(os.getenv("EXEC_POLL_QUEUE", "64"))
+# Per-prompt overrides, e.g. "question_assets=long,combine=io"
+EXEC_CLASS_OVERRIDES = os.getenv("EXEC_CLASS_OVERRIDES", "")
+
+class ExecutorSaturated(Exception):
+    """Raised when an execution class has no free worker or queue slot."""
+
+    def __init__(self, class_name: str, capacity: int):
+        super().__init__(f"Execution class '{class_name}' is at capacity ({capacity} running + queued)")
+        self.class_name = class_name
+        self.capacity = capacity
+
+# =========================
+# Execution classes
+# =========================
+
+class ExecutionClass:
+    """
+    A bounded pool: at most `workers` tasks run and `queue` more wait. With
+    `workers == 0` tasks run on the caller's thread, capped at `queue`
+    concurrent calls.
+    """
+
+    def __init__(self, name: str, workers: int, queue: int):
+        self.name = name
+        self.workers = workers
+        self.capacity = max(1, workers + queue)
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"exec-{name}") if workers > 0 else None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_wait = 0.0
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning(f"[Executors] 🚦 {self.name} saturated ({self.capacity}); rejecting")
+            raise ExecutorSaturated(self.name, self.capacity)
+        with self._lock:
+            self._in_flight += 1
+        enqueued_at = time.time()
+
+        if self._pool is None:
+            future: Future = Future()
+            try:
+                future.set_result(self._run(enqueued_at, fn, args, kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            return future
+
+        try:
+            return self._pool.submit(self._run, enqueued_at, fn, args, kwargs)
+        except Exception:
+            self._finish()
+            raise
+
+    def _run(self, enqueued_at: float, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        waited = time.time() - enqueued_at
+        with self._lock:
+            self._running += 1
+            self._max_wait = max(self._max_wait, waited)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._finish(ran=True)
+
+    def _finish(self, ran: bool = False) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if ran:
+                self._running -= 1
+                self._completed += 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers or "caller",
+                "capacity": self.capacity,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "max_queue_wait_seconds": round(self._max_wait, 3),
+            }
+
+_CLASSES: Dict[str, ExecutionClass] = {
+    INLINE: ExecutionClass(INLINE, 0, EXEC_INLINE_LIMIT),
+    IO: ExecutionClass(IO, EXEC_IO_WORKERS, EXEC_IO_QUEUE),
+    LONG: ExecutionClass(LONG, EXEC_LONG_WORKERS, EXEC_LONG_QUEUE),
+    POLL: ExecutionClass(POLL, EXEC_POLL_WORKERS, EXEC_POLL_QUEUE),
+}
+
+def _parse_overrides(raw: str) -> Dict[str, str]:
+    overrides = {}
+    for item in raw.split(","):
+        name, _, cls = item.partition("=")
+        name, cls = name.strip(), cls.strip().lower()
+        if not name:
+            continue
+        if cls not in _CLASSES:
+            logger.warning(f"[Executors] ignoring override '{item.strip()}': unknown class")
+            continue
+        overrides[name] = cls
+    return overrides
+
+_OVERRIDES = _parse_overrides(EXEC_CLASS_OVERRIDES)
+
+# =========================
+# Public API
+# =========================
+
+def execution_class_for(prompt_name: str, declared: Optional[str], blocking: bool) -> str:
+    """
+    Resolve a prompt's class: env override, then the declaration, then IO.
+    Inline only applies to blocking prompts; a fire-and-forget prompt must not
+    hold the request thread, so it is promoted to IO.
+    """
+    cls = _OVERRIDES.get(prompt_name) or declared or IO
+    if cls == INLINE and not blocking:
+        return IO
+    return cls
+
+def submit_to_class(cls: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """Run `fn` in execution class `cls`; raises ExecutorSaturated when it is full."""
+    return _CLASSES[cls].submit(fn, *args, **kwargs)
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cls.stats() for name, cls in _CLASSES.items()}
@@ -0,0 +1,118 @@
+# Engine/Runtime/jobs.py
+
+import os
+import json
+import time
+import uuid
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from logger import logger
+from Engine.Store.sqlite_store import get_store, row_to_dict
+
+# =========================
+# Config
+# =========================
+
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH") or None               # default: <LOCAL_STATE_DIR>/jobs.sqlite3
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    kind         TEXT NOT NULL,
+    status       TEXT NOT NULL,          -- queued | running | succeeded | failed
+    result       TEXT,
+    error        TEXT,
+    host         TEXT NOT NULL,
+    pid          INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    started_at   REAL,
+    finished_at  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+"""
+
+_HOST = socket.gethostname()
+_POOL = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+# =========================
+# Helpers
+# =========================
+
+def _store():
+    return get_store("jobs", _SCHEMA, path=JOB_STORE_PATH)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _set(job_id: str, **fields: Any) -> None:
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    _store().execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+def _prune() -> None:
+    try:
+        _store().execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (time.time() - JOB_RETENTION_SECONDS,),
+        )
+    except Exception as e:
+        logger.warning(f"[Jobs] prune failed: {e}")
+
+def _run(job_id: str, kind: str, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+    _set(job_id, status="running", started_at=time.time())
+    logger.info(f"[Jobs] ▶️ {kind} job {job_id} started")
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        logger.exception(f"[Jobs] ❌ {kind} job {job_id} failed")
+        _set(job_id, status="failed", error=str(e), finished_at=time.time())
+        return
+    try:
+        result_json = json.dumps(result, default=str) if result is not None else None
+    except Exception:
+        result_json = json.dumps(str(result))
+    _set(job_id, status="succeeded", result=result_json, finished_at=time.time())
+    logger.info(f"[Jobs] ✅ {kind} job {job_id} succeeded")
+
+# =========================
+# Public API
+# =========================
+
+def submit_job(kind: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> str:
+    """
+    Record a queued job and run `fn(*args, **kwargs)` on the job pool.
+    Returns the job id immediately; the return value (JSON-serialisable) or
+    the exception message is stored when the job finishes.
+    """
+    _prune()
+    job_id = uuid.uuid4().hex
+    _store().execute(
+        "INSERT INTO jobs (id, kind, status, host, pid, created_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+        (job_id, kind, _HOST, os.getpid(), time.time()),
+    )
+    _POOL.submit(_run, job_id, kind, fn, args, kwargs)
+    logger.info(f"[Jobs] 📝 Queued {kind} job {job_id}")
+    return job_id
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Job status, or None if unknown. A queued/running job whose owning process
+    on this host has exited is reported as 'lost'.
+    """
+    job = row_to_dict(_store().query_one("SELECT * FROM jobs WHERE id = ?", (job_id,)))
+    if job is None:
+        return None
+    if job["result"] is not None:
+        job["result"] = json.loads(job["result"])
+    if job["status"] in ("queued", "running") and job["host"] == _HOST and not _pid_alive(job["pid"]):
+        job["status"] = "lost"
+    return job
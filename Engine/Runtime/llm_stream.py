@@ -0,0 +1,185 @@
+# Engine/Runtime/llm_stream.py
+
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from logger import logger
+from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Runtime.artifacts import publish_artifact
+
+# =========================
+# Config
+# =========================
+
+LLM_STREAMING = os.getenv("LLM_STREAMING", "off").strip().lower()  # "on" | "off" (payload "stream" overrides)
+# Minimum seconds between progressive Supabase snapshots (bus updates are not throttled)
+STREAM_PARTIAL_MIN_INTERVAL = float(os.getenv("STREAM_PARTIAL_MIN_INTERVAL", "1.0"))
+# Seconds between in-process text snapshots while no member completes
+STREAM_PUBLISH_INTERVAL = float(os.getenv("STREAM_PUBLISH_INTERVAL", "0.5"))
+
+def streaming_enabled(data: Dict[str, Any]) -> bool:
+    flag = data.get("stream")
+    if flag is None:
+        return LLM_STREAMING == "on"
+    return str(flag).strip().lower() in ("1", "true", "yes", "on")
+
+def partial_path_for(path: str) -> str:
+    """'X/Prompt_1_Thinking/<run_id>.txt' -> 'X/Prompt_1_Thinking/Partial/<run_id>.json'"""
+    folder, _, name = path.rpartition("/")
+    stem = name.rsplit(".", 1)[0]
+    return f"{folder}/Partial/{stem}.json" if folder else f"Partial/{stem}.json"
+
+# =========================
+# Incremental JSON member scanner
+# =========================
+
+class JsonMemberScanner:
+    """
+    Fed a JSON object a chunk at a time (leading ``` fences/prose ignored),
+    reports each top-level member as soon as its value is complete. Tracks
+    only string/escape state and nesting depth, and keeps just the text of the
+    member in progress, so each character is scanned once.
+    """
+
+    def __init__(self):
+        self._text = ""        # text from the start of the member in progress
+        self._pos = 0          # next unscanned index within _text
+        self._started = False
+        self._closed = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._member_start = 0
+        self.members: Dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        completed: List[Tuple[str, Any]] = []
+        if self._closed:
+            return completed
+        text = self._text + chunk
+        i = self._pos
+        n = len(text)
+        while i < n:
+            c = text[i]
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._member_start = i + 1
+            elif self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif c == "\\":
+                    self._esc = True
+                elif c == '"':
+                    self._in_str = False
+            elif c == '"':
+                self._in_str = True
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_member(text[self._member_start:i], completed)
+                    self._closed = True  # ignore anything after the object
+                    self._text, self._pos = "", 0
+                    return completed
+            elif c == "," and self._depth == 1:
+                self._close_member(text[self._member_start:i], completed)
+                self._member_start = i + 1
+            i += 1
+
+        # Keep only the member in progress
+        cut = self._member_start if self._started else n
+        self._text = text[cut:]
+        self._pos = n - cut
+        self._member_start -= cut
+        return completed
+
+    def _close_member(self, raw: str, completed: List[Tuple[str, Any]]) -> None:
+        raw = raw.strip()
+        if not raw:
+            return
+        try:
+            (key, value), = json.loads("{" + raw + "}").items()
+        except Exception:
+            return
+        self.members[key] = value
+        completed.append((key, value))
+
+# =========================
+# Streaming completion
+# =========================
+
+def stream_chat_completion(
+    client,
+    *,
+    model: str,
+    temperature: float,
+    messages: List[Dict[str, str]],
+    artifact_key: str,
+    partial_path: Optional[str] = None,
+) -> str:
+    """
+    Stream a chat completion, publishing progressive versions of `artifact_key`
+    on the artifact bus as text arrives, and a JSON snapshot of the completed
+    top-level members to `partial_path` each time one completes. Returns the
+    full response text; the caller writes/publishes the final artifact.
+    """
+    scanner = JsonMemberScanner()
+    parts: List[str] = []
+    t0 = time.time()
+    first_token_at: Optional[float] = None
+    last_partial_write = 0.0
+    last_publish = 0.0
+    pending_partial = False
+
+    def _write_partial() -> None:
+        nonlocal last_partial_write, pending_partial
+        if not partial_path:
+            return
+        try:
+            write_supabase_file(partial_path, json.dumps(scanner.members, indent=2))
+            last_partial_write = time.time()
+            pending_partial = False
+        except Exception as e:
+            logger.warning(f"[Stream] partial write failed for {partial_path}: {e}")
+
+    stream = client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=messages,
+        stream=True,
+    )
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content or ""
+        if not delta:
+            continue
+        if first_token_at is None:
+            first_token_at = time.time()
+            logger.info(f"[Stream] first token for {artifact_key} after {first_token_at - t0:.2f}s")
+        parts.append(delta)
+
+        completed = scanner.feed(delta)
+        now = time.time()
+        if completed or now - last_publish >= STREAM_PUBLISH_INTERVAL:
+            publish_artifact(artifact_key, "".join(parts), final=False, members=scanner.members)
+            last_publish = now
+        if completed:
+            logger.info(f"[Stream] {artifact_key}: member(s) complete {[k for k, _ in completed]}")
+            pending_partial = True
+        if pending_partial and time.time() - last_partial_write >= STREAM_PARTIAL_MIN_INTERVAL:
+            _write_partial()
+
+    if pending_partial:
+        _write_partial()
+
+    logger.info(
+        f"[Stream] {artifact_key} complete in {time.time() - t0:.2f}s "
+        f"({len(scanner.members)} top-level members)"
+    )
+    return "".join(parts)
@@ -0,0 +1,123 @@
+# Engine/Runtime/stage_cache.py
+
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from logger import logger
+from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Files.write_supabase_file import write_supabase_file
+
+# =========================
+# Config
+# =========================
+
+STAGE_CACHE = os.getenv("STAGE_CACHE", "off").strip().lower()    # "on" | "off" (payload "use_cache" overrides)
+STAGE_CACHE_FOLDER = os.getenv("STAGE_CACHE_FOLDER", "Cache/Stages")
+STAGE_CACHE_MEMORY_ENTRIES = int(os.getenv("STAGE_CACHE_MEMORY_ENTRIES", "256"))
+
+# =========================
+# Keys
+# =========================
+
+def content_hash(value: Any) -> str:
+    if not isinstance(value, (str, bytes)):
+        value = json.dumps(value, sort_keys=True, default=str)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return hashlib.sha256(value).hexdigest()
+
+def stage_cache_key(stage: str, template_version: str, inputs: Dict[str, Any], params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Hash of everything that determines a stage's output: the stage name, its
+    prompt template version, each input (upstream artifact text, hashed) and
+    model parameters. Unchanged upstream output => unchanged downstream key,
+    so only the invalidated part of the pipeline recomputes.
+    """
+    manifest = {
+        "stage": stage,
+        "template": template_version,
+        "inputs": {name: content_hash(value) for name, value in sorted(inputs.items())},
+        "params": params or {},
+    }
+    return content_hash(manifest)
+
+# =========================
+# Store
+# =========================
+
+class _StageCache:
+    """Outputs stored as Supabase objects under STAGE_CACHE_FOLDER, fronted by a small LRU."""
+
+    def __init__(self):
+        self._mem: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _path(stage: str, key: str) -> str:
+        return f"{STAGE_CACHE_FOLDER}/{stage}/{key}.txt"
+
+    def _remember(self, path: str, output: str) -> None:
+        with self._lock:
+            self._mem[path] = output
+            self._mem.move_to_end(path)
+            while len(self._mem) > STAGE_CACHE_MEMORY_ENTRIES:
+                self._mem.popitem(last=False)
+
+    def get(self, stage: str, key: str) -> Optional[str]:
+        path = self._path(stage, key)
+        with self._lock:
+            if path in self._mem:
+                self._mem.move_to_end(path)
+                return self._mem[path]
+        try:
+            output = read_supabase_file(path)
+        except Exception:
+            return None
+        self._remember(path, output)
+        return output
+
+    def put(self, stage: str, key: str, output: str) -> None:
+        path = self._path(stage, key)
+        try:
+            write_supabase_file(path, output)
+        except Exception as e:
+            logger.warning(f"[StageCache] failed to store {path}: {e}")
+            return
+        self._remember(path, output)
+
+_CACHE = _StageCache()
+
+# =========================
+# Public API
+# =========================
+
+def _flag(value: Any) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+def stage_cache_enabled(data: Dict[str, Any]) -> bool:
+    flag = data.get("use_cache")
+    if flag is None:
+        return STAGE_CACHE == "on"
+    return _flag(flag)
+
+def cached_stage_output(stage: str, key: str, data: Dict[str, Any]) -> Optional[str]:
+    """Previous output for `key`, unless caching is off or the payload sets force_regenerate."""
+    if not stage_cache_enabled(data):
+        return None
+    if _flag(data.get("force_regenerate", False)):
+        logger.info(f"[StageCache] force_regenerate: recomputing {stage}")
+        return None
+    output = _CACHE.get(stage, key)
+    if output is not None:
+        logger.info(f"[StageCache] ♻️ hit for {stage} ({key[:12]})")
+    else:
+        logger.info(f"[StageCache] miss for {stage} ({key[:12]})")
+    return output
+
+def store_stage_output(stage: str, key: str, output: str, data: Dict[str, Any]) -> None:
+    if stage_cache_enabled(data):
+        _CACHE.put(stage, key, output)
@@ -0,0 +1,101 @@
+# Engine/Store/sqlite_store.py
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from logger import logger
+
+# Root folder for local, process-persistent state (caches, queues, indexes)
+LOCAL_STATE_DIR = os.getenv("LOCAL_STATE_DIR", "/tmp/the_big_question")
+
+_STORES: Dict[str, "SqliteStore"] = {}
+_STORES_LOCK = threading.Lock()
+
+class SqliteStore:
+    """
+    One shared SQLite connection per database file, serialised by a lock.
+    WAL mode so a reader in another process never blocks the writer.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        logger.info(f"🗄️ SQLite store opened: {path}")
+
+    def executescript(self, script: str) -> None:
+        with self._lock:
+            self._conn.executescript(script)
+
+    def execute(self, sql: str, params: Iterable[Any] = ()) -> int:
+        with self._lock:
+            cur = self._conn.execute(sql, tuple(params))
+            return cur.rowcount
+
+    def executemany(self, sql: str, rows: Iterable[Iterable[Any]]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, [tuple(r) for r in rows])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def query_one(self, sql: str, params: Iterable[Any] = ()) -> Optional[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchone()
+
+    def transaction(self) -> "_Transaction":
+        return _Transaction(self)
+
+class _Transaction:
+    """`with store.transaction() as conn:` — BEGIN IMMEDIATE … COMMIT/ROLLBACK under the store lock."""
+
+    def __init__(self, store: SqliteStore):
+        self._store = store
+
+    def __enter__(self) -> sqlite3.Connection:
+        self._store._lock.acquire()
+        self._store._conn.execute("BEGIN IMMEDIATE")
+        return self._store._conn
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        try:
+            self._store._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._store._lock.release()
+        return False
+
+def get_store(name: str, schema: str, path: Optional[str] = None) -> SqliteStore:
+    """
+    Return the process-wide store for `name` (file `<LOCAL_STATE_DIR>/<name>.sqlite3`
+    unless `path` is given), creating it and applying `schema` on first use.
+    """
+    db_path = path or os.path.join(LOCAL_STATE_DIR, f"{name}.sqlite3")
+    with _STORES_LOCK:
+        store = _STORES.get(db_path)
+        if store is None:
+            store = SqliteStore(db_path)
+            store.executescript(schema)
+            _STORES[db_path] = store
+        return store
+
+def row_to_dict(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+    return dict(row) if row is not None else None
+
+def rows_to_dicts(rows: Iterable[sqlite3.Row]) -> List[Dict[str, Any]]:
+    return [dict(r) for r in rows]
@@ -0,0 +1,250 @@
+# Engine/Webhooks/idempotency.py
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from logger import logger
+from Engine.Store.sqlite_store import get_store
+
+# =========================
+# Config
+# =========================
+
+IDEMPOTENCY_PERSIST = os.getenv("IDEMPOTENCY_PERSIST", "on").strip().lower()  # "on" | "off"
+IDEMPOTENCY_STORE_PATH = os.getenv("IDEMPOTENCY_STORE_PATH") or None          # default: <LOCAL_STATE_DIR>/idempotency.sqlite3
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", str(24 * 3600)))         # how long a completed response is replayed
+IDEMPOTENCY_LEASE = float(os.getenv("IDEMPOTENCY_LEASE", "3600"))             # in-progress claims older than this are reclaimable
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))        # in-memory bound
+IDEMPOTENCY_PRUNE_INTERVAL = 300.0
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key          TEXT PRIMARY KEY,
+    state        TEXT NOT NULL,          -- in_progress | completed
+    status_code  INTEGER,
+    body         TEXT,
+    expires_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_idempotency_expires ON idempotency_keys (expires_at);
+"""
+
+# =========================
+# Key builders
+# =========================
+
+def typeform_key(kind: str, data: Dict[str, Any]) -> Optional[str]:
+    """Typeform redelivers with the same form_response.token / event_id."""
+    token = (data.get("form_response") or {}).get("token") or data.get("event_id")
+    return f"{kind}:{token}" if token else None
+
+def dispatch_key(
+    prompt_name: str,
+    data: Dict[str, Any],
+    header_key: Optional[str] = None,
+    run_id_dedupe: bool = True,
+) -> Optional[str]:
+    """
+    An explicit Idempotency-Key header wins; otherwise a caller-supplied run_id
+    identifies a repeat of the same stage. Without either there is nothing to
+    deduplicate on (a fresh run_id is generated per request).
+
+    `run_id_dedupe=False` is for prompts whose repeats are meant to run again
+    with the same run_id (reads that poll or tail a run); a `resume` request
+    is never a duplicate of the run it resumes.
+    """
+    if header_key:
+        return f"dispatch:{prompt_name}:key:{header_key}"
+    if not run_id_dedupe or data.get("resume"):
+        return None
+    run_id = data.get("run_id")
+    return f"dispatch:{prompt_name}:{run_id}" if run_id else None
+
+# =========================
+# Store
+# =========================
+
+class _IdempotencyStore:
+    """
+    Bounded LRU of idempotency records in memory, optionally backed by SQLite
+    so claims are atomic across worker processes and survive restarts.
+    """
+
+    def __init__(self):
+        self._mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._last_prune = 0.0
+
+    def _db(self):
+        if IDEMPOTENCY_PERSIST == "off":
+            return None
+        return get_store("idempotency", _SCHEMA, path=IDEMPOTENCY_STORE_PATH)
+
+    # --- memory ---
+
+    def _mem_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        rec = self._mem.get(key)
+        if rec is None:
+            return None
+        if rec["expires_at"] <= now:
+            del self._mem[key]
+            return None
+        self._mem.move_to_end(key)
+        return rec
+
+    def _mem_put(self, key: str, rec: Dict[str, Any]) -> None:
+        self._mem[key] = rec
+        self._mem.move_to_end(key)
+        while len(self._mem) > IDEMPOTENCY_MAX_KEYS:
+            self._mem.popitem(last=False)
+
+    # --- persistence ---
+
+    @staticmethod
+    def _from_row(row) -> Dict[str, Any]:
+        return {
+            "state": row["state"],
+            "status_code": row["status_code"],
+            "body": json.loads(row["body"]) if row["body"] is not None else None,
+            "expires_at": row["expires_at"],
+        }
+
+    def _maybe_prune(self, db, now: float) -> None:
+        if now - self._last_prune < IDEMPOTENCY_PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        try:
+            db.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+        except Exception as e:
+            logger.warning(f"[Idempotency] prune failed: {e}")
+
+    def _lookup(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        rec = self._mem_get(key, now)
+        if rec is not None and rec["state"] == COMPLETED:
+            return rec
+        db = self._db()
+        if db is None:
+            return rec
+        row = db.query_one("SELECT * FROM idempotency_keys WHERE key = ? AND expires_at > ?", (key, now))
+        if row is None:
+            return None
+        rec = self._from_row(row)
+        if rec["state"] == COMPLETED:
+            self._mem_put(key, rec)
+        return rec
+
+    # --- public ---
+
+    def claim(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        fresh = {"state": IN_PROGRESS, "status_code": None, "body": None, "expires_at": now + IDEMPOTENCY_LEASE}
+        with self._cond:
+            rec = self._mem_get(key, now)
+            if rec is not None:
+                return dict(rec)
+            db = self._db()
+            if db is not None:
+                self._maybe_prune(db, now)
+                with db.transaction() as conn:
+                    row = conn.execute(
+                        "SELECT * FROM idempotency_keys WHERE key = ? AND expires_at > ?", (key, now)
+                    ).fetchone()
+                    if row is not None:
+                        existing = self._from_row(row)
+                        if existing["state"] == COMPLETED:
+                            self._mem_put(key, existing)
+                        return dict(existing)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO idempotency_keys (key, state, status_code, body, expires_at) "
+                        "VALUES (?, ?, NULL, NULL, ?)",
+                        (key, IN_PROGRESS, fresh["expires_at"]),
+                    )
+            self._mem_put(key, fresh)
+            return None
+
+    def complete(self, key: str, body: Any, status_code: int) -> None:
+        rec = {"state": COMPLETED, "status_code": status_code, "body": body, "expires_at": time.time() + IDEMPOTENCY_TTL}
+        with self._cond:
+            self._mem_put(key, rec)
+            db = self._db()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO idempotency_keys (key, state, status_code, body, expires_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, COMPLETED, status_code, json.dumps(body, default=str), rec["expires_at"]),
+                    )
+                except Exception as e:
+                    logger.warning(f"[Idempotency] failed to persist response for {key}: {e}")
+            self._cond.notify_all()
+
+    def release(self, key: str) -> None:
+        with self._cond:
+            rec = self._mem.get(key)
+            if rec is not None and rec["state"] == IN_PROGRESS:
+                del self._mem[key]
+            db = self._db()
+            if db is not None:
+                try:
+                    db.execute("DELETE FROM idempotency_keys WHERE key = ? AND state = ?", (key, IN_PROGRESS))
+                except Exception as e:
+                    logger.warning(f"[Idempotency] failed to release {key}: {e}")
+            self._cond.notify_all()
+
+    def wait(self, key: str, timeout: float) -> Optional[Dict[str, Any]]:
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                now = time.time()
+                rec = self._lookup(key, now)
+                if rec is None or rec["state"] == COMPLETED or now >= deadline:
+                    return dict(rec) if rec else None
+                # Poll as well, in case another process owns the claim
+                self._cond.wait(min(deadline - now, 0.5))
+
+_STORE = _IdempotencyStore()
+
+# =========================
+# Public API
+# =========================
+
+def claim_idempotency_key(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Try to become the single executor for `key`. Returns None when the caller
+    now owns it (and must later call complete_/release_idempotency_key);
+    otherwise returns the existing record: {"state": "in_progress"} or
+    {"state": "completed", "status_code": ..., "body": ...}.
+    """
+    rec = _STORE.claim(key)
+    if rec is not None:
+        logger.info(f"[Idempotency] 🔁 Duplicate delivery for {key} (state={rec['state']})")
+    return rec
+
+def complete_idempotency_key(key: str, body: Any, status_code: int = 200) -> None:
+    """Store the original response so repeats of `key` replay it."""
+    _STORE.complete(key, body, status_code)
+
+def settle_idempotency_key(key: str, result: Any, body: Any = None, status_code: int = 200) -> None:
+    """
+    Complete `key` with `body` (default: the prompt's `result`) when the prompt
+    succeeded. An error result releases the key instead, so the retry that
+    follows an error actually runs again rather than replaying it.
+    """
+    if isinstance(result, dict) and result.get("status") == "error":
+        _STORE.release(key)
+    else:
+        _STORE.complete(key, result if body is None else body, status_code)
+
+def release_idempotency_key(key: str) -> None:
+    """Drop an in-progress claim after a failure so a retry can run again."""
+    _STORE.release(key)
+
+def wait_for_idempotency_key(key: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """Block up to `timeout` seconds for an in-progress `key` to complete; returns the latest record."""
+    return _STORE.wait(key, timeout)
@@ -0,0 +1,237 @@
+# Engine/Webhooks/outbound.py
+
+import os
+import json
+import time
+import uuid
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from logger import logger
+from Engine.Store.sqlite_store import get_store, row_to_dict
+
+# =========================
+# Config
+# =========================
+
+WEBHOOK_QUEUE_PATH = os.getenv("WEBHOOK_QUEUE_PATH") or None      # default: <LOCAL_STATE_DIR>/webhook_queue.sqlite3
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "8"))
+WEBHOOK_BASE_BACKOFF = float(os.getenv("WEBHOOK_BASE_BACKOFF", "2.0"))  # seconds
+WEBHOOK_MAX_BACKOFF = float(os.getenv("WEBHOOK_MAX_BACKOFF", "300"))    # seconds
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_ENDPOINT_CONCURRENCY = int(os.getenv("WEBHOOK_ENDPOINT_CONCURRENCY", "2"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "1.0"))
+
+# A claimed delivery whose lease lapses (process died mid-POST) becomes due again
+LEASE_SECONDS = WEBHOOK_TIMEOUT * 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id                TEXT PRIMARY KEY,
+    endpoint          TEXT NOT NULL,
+    url               TEXT NOT NULL,
+    body              BLOB NOT NULL,
+    headers           TEXT NOT NULL,
+    status            TEXT NOT NULL,          -- pending | in_flight | delivered | failed
+    attempts          INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at   REAL NOT NULL,
+    lease_until       REAL,
+    last_status_code  INTEGER,
+    last_error        TEXT,
+    created_at        REAL NOT NULL,
+    updated_at        REAL NOT NULL,
+    delivered_at      REAL
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (status, next_attempt_at);
+"""
+
+_HTTP_SESSION = requests.Session()
+
+# =========================
+# Helpers
+# =========================
+
+def _store():
+    return get_store("webhook_queue", _SCHEMA, path=WEBHOOK_QUEUE_PATH)
+
+def endpoint_key(url: str) -> str:
+    """Concurrency limits apply per host (all Zapier catch hooks share one)."""
+    try:
+        return urlparse(url).netloc.lower() or url
+    except Exception:
+        return url
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with equal jitter (half fixed, half random)."""
+    cap = min(WEBHOOK_MAX_BACKOFF, WEBHOOK_BASE_BACKOFF * (2 ** max(attempts - 1, 0)))
+    return random.uniform(cap / 2, cap)
+
+# =========================
+# Scheduler
+# =========================
+
+class _DeliveryScheduler:
+    """
+    Polls the persisted queue for due deliveries and POSTs them on a worker pool,
+    never running more than WEBHOOK_ENDPOINT_CONCURRENCY at once per endpoint.
+    Claims are leased, so rows held by a crashed process are retried.
+    """
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=WEBHOOK_WORKERS, thread_name_prefix="webhook-delivery")
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._slots_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def ensure_running(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="webhook-scheduler", daemon=True)
+            self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _slot(self, endpoint: str) -> threading.BoundedSemaphore:
+        with self._slots_lock:
+            sem = self._slots.get(endpoint)
+            if sem is None:
+                sem = threading.BoundedSemaphore(WEBHOOK_ENDPOINT_CONCURRENCY)
+                self._slots[endpoint] = sem
+            return sem
+
+    def _run(self) -> None:
+        logger.info("📮 Webhook delivery scheduler started")
+        while True:
+            try:
+                self._dispatch_due()
+            except Exception:
+                logger.exception("[Webhook] scheduler pass failed")
+            self._wake.wait(WEBHOOK_POLL_INTERVAL)
+            self._wake.clear()
+
+    def _dispatch_due(self) -> None:
+        now = time.time()
+        store = _store()
+        rows = store.query(
+            "SELECT id, endpoint FROM deliveries "
+            "WHERE (status = 'pending' AND next_attempt_at <= ?) "
+            "   OR (status = 'in_flight' AND lease_until < ?) "
+            "ORDER BY next_attempt_at LIMIT ?",
+            (now, now, WEBHOOK_WORKERS * 4),
+        )
+        for row in rows:
+            sem = self._slot(row["endpoint"])
+            if not sem.acquire(blocking=False):
+                continue  # endpoint saturated; try again next pass
+            claimed = store.execute(
+                "UPDATE deliveries SET status = 'in_flight', lease_until = ?, updated_at = ? "
+                "WHERE id = ? AND (status = 'pending' OR (status = 'in_flight' AND lease_until < ?))",
+                (now + LEASE_SECONDS, now, row["id"], now),
+            )
+            if claimed != 1:
+                sem.release()
+                continue
+            self._pool.submit(self._deliver, row["id"], sem)
+
+    def _deliver(self, delivery_id: str, sem: threading.BoundedSemaphore) -> None:
+        store = _store()
+        try:
+            row = store.query_one("SELECT * FROM deliveries WHERE id = ?", (delivery_id,))
+            if row is None:
+                return
+            attempt = row["attempts"] + 1
+            status_code, error = None, None
+            try:
+                r = _HTTP_SESSION.post(
+                    row["url"],
+                    data=row["body"],
+                    headers=json.loads(row["headers"]),
+                    timeout=WEBHOOK_TIMEOUT,
+                )
+                status_code = r.status_code
+                if 200 <= r.status_code < 300:
+                    now = time.time()
+                    store.execute(
+                        "UPDATE deliveries SET status = 'delivered', attempts = ?, last_status_code = ?, "
+                        "last_error = NULL, lease_until = NULL, delivered_at = ?, updated_at = ? WHERE id = ?",
+                        (attempt, status_code, now, now, delivery_id),
+                    )
+                    logger.info(f"[Webhook] Delivered {delivery_id} (attempt {attempt}) status={status_code}")
+                    return
+                error = f"non_2xx body={r.text[:200]}"
+            except Exception as e:
+                error = str(e)
+
+            now = time.time()
+            if attempt >= WEBHOOK_MAX_ATTEMPTS:
+                store.execute(
+                    "UPDATE deliveries SET status = 'failed', attempts = ?, last_status_code = ?, "
+                    "last_error = ?, lease_until = NULL, updated_at = ? WHERE id = ?",
+                    (attempt, status_code, error, now, delivery_id),
+                )
+                logger.error(f"[Webhook] Giving up on {delivery_id} after {attempt} attempts: {error}")
+                return
+
+            delay = retry_delay(attempt)
+            store.execute(
+                "UPDATE deliveries SET status = 'pending', attempts = ?, last_status_code = ?, last_error = ?, "
+                "lease_until = NULL, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (attempt, status_code, error, now + delay, now, delivery_id),
+            )
+            logger.warning(
+                f"[Webhook] Attempt {attempt}/{WEBHOOK_MAX_ATTEMPTS} for {delivery_id} failed "
+                f"status={status_code} error={error}; retrying in {delay:.1f}s"
+            )
+        except Exception:
+            logger.exception(f"[Webhook] delivery {delivery_id} crashed")
+        finally:
+            sem.release()
+            self._wake.set()
+
+_SCHEDULER = _DeliveryScheduler()
+
+# =========================
+# Public API
+# =========================
+
+def enqueue_webhook(url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> str:
+    """
+    Persist a JSON POST for background delivery and return its delivery id
+    immediately. Delivery is retried with jittered backoff across restarts.
+    """
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    hdrs = {"Content-Type": "application/json"}
+    hdrs.update(headers or {})
+    delivery_id = uuid.uuid4().hex
+    now = time.time()
+    _store().execute(
+        "INSERT INTO deliveries (id, endpoint, url, body, headers, status, attempts, next_attempt_at, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, 'pending', 0, ?, ?, ?)",
+        (delivery_id, endpoint_key(url), url, body, json.dumps(hdrs), now, now, now),
+    )
+    _SCHEDULER.ensure_running()
+    _SCHEDULER.wake()
+    logger.info(f"[Webhook] Queued {delivery_id} for {endpoint_key(url)} ({len(body)} bytes)")
+    return delivery_id
+
+def get_delivery_status(delivery_id: str) -> Optional[Dict[str, Any]]:
+    return row_to_dict(_store().query_one(
+        "SELECT id, endpoint, status, attempts, next_attempt_at, last_status_code, last_error, "
+        "created_at, updated_at, delivered_at FROM deliveries WHERE id = ?",
+        (delivery_id,),
+    ))
+
+def start_delivery_scheduler() -> None:
+    """Resume delivery of anything left queued by a previous process."""
+    _SCHEDULER.ensure_running()
@@ -1,6 +1,6 @@
-import time
 from logger import logger
 from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Runtime.artifacts import final_artifact, wait_for_final_artifact
 
 MAX_RETRIES = 6
 RETRY_DELAY_SECONDS = 2  # Exponential backoff: 2, 4, 8, 16, 32, 64 seconds
@@ -17,7 +17,7 @@ def run_prompt(data):
         while retries < MAX_RETRIES:
             try:
                 logger.info(f"Attempting to read Supabase file: {supabase_path} (Attempt {retries + 1})")
-                content = read_supabase_file(supabase_path)
+                content = final_artifact(supabase_path) or read_supabase_file(supabase_path)
                 logger.info(f"✅ File retrieved successfully from Supabase for run_id: {run_id}")
                 
                 return {
@@ -28,7 +28,7 @@ def run_prompt(data):
 
             except Exception as e:
                 logger.warning(f"File not yet available. Retry {retries + 1} of {MAX_RETRIES}. Error: {str(e)}")
-                time.sleep(RETRY_DELAY_SECONDS * (2 ** retries))
+                wait_for_final_artifact(supabase_path, RETRY_DELAY_SECONDS * (2 ** retries))  # wakes early on an in-process publish
                 retries += 1
 
         logger.error(f"❌ Max retries exceeded. File not found for run_id: {run_id}")
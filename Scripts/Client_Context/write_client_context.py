@@ -3,9 +3,8 @@ import json
 from openai import OpenAI
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
-
-def safe_escape(value):
-    return str(value).replace("{", "{{").replace("}", "}}")
+from Engine.Runtime.artifacts import publish_artifact
+from Engine.Prompts.template_registry import get_template
 
 def run_prompt(data):
     try:
@@ -15,14 +14,13 @@ def run_prompt(data):
         client_name = data["client"]
         website = data["client_website_url"]
 
-        # Load prompt template
-        with open("Prompts/Client_Context/client_context.txt", "r", encoding="utf-8") as f:
-            template = f.read()
+        # Load prompt template (compiled once, reloaded on change)
+        template = get_template("Prompts/Client_Context/client_context.txt")
 
-        # Format prompt with escaped input
-        prompt = template.format(
-            client=safe_escape(client_name),
-            client_website_url=safe_escape(website)
+        # Format prompt (values are inserted verbatim)
+        prompt = template.render(
+            client=client_name,
+            client_website_url=website
         )
 
         # Send prompt to OpenAI
@@ -47,6 +45,7 @@ def run_prompt(data):
 
         supabase_path = f"Predictive_Report/Ai_Responses/Client_Context/{run_id}.txt"
         write_supabase_file(supabase_path, formatted_result)
+        publish_artifact(supabase_path, formatted_result, final=True)
         logger.info(f"AI response written to Supabase at {supabase_path}")
 
     except Exception:
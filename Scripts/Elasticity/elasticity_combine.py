@@ -2,6 +2,7 @@ import uuid
 import re
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Runtime.artifact_refs import resolve_artifact_refs
 
 def deindent(text):
     return re.sub(r'(?m)^ {2,}', '', text)
@@ -53,6 +54,7 @@ def split_key_value_lines(text):
 def run_prompt(data):
     try:
         run_id = str(uuid.uuid4())
+        resolve_artifact_refs(data, ("prompt_1_elasticity", "elasticity_calculation"))
         prompt_raw = data.get("prompt_1_elasticity", "").strip()
         client = data.get("client", "").strip()
         elasticity_change = data.get("elasticity_change", "").strip()
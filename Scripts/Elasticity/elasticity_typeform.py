@@ -1,10 +1,12 @@
 import os
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from logger import logger
-from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Files.write_supabase_file import write_supabase_stream
+from Engine.Files.latest_pointer import write_latest_pointer
 
 # --- ENV VARS ---
 supply_field_id = os.getenv("SUPPLY_FIELD_ID")
@@ -18,9 +20,13 @@ logger.info(f"   DEMAND_FIELD_ID = {demand_field_id}")
 logger.info(f"   SUPABASE_ROOT_FOLDER = {SUPABASE_ROOT_FOLDER}")
 logger.info(f"   SUPABASE_URL = {SUPABASE_URL}")
 
+# --- CONFIG ---
+DOWNLOAD_TIMEOUT = float(os.getenv("TYPEFORM_DOWNLOAD_TIMEOUT", "10"))  # connect / per-read seconds
+DOWNLOAD_CHUNK_BYTES = int(os.getenv("TYPEFORM_DOWNLOAD_CHUNK_BYTES", "65536"))
+
 # --- HELPERS ---
-def download_file(url: str, retries: int = 3, delay: int = 2) -> bytes:
-    """Download with optional Typeform token."""
+def stream_file_to_supabase(url: str, path: str, retries: int = 3, delay: int = 2) -> int:
+    """Stream a download (optional Typeform token) straight into Supabase; returns bytes written."""
     headers = {}
     if "api.typeform.com/responses/files" in url:
         typeform_token = os.getenv("TYPEFORM_TOKEN")
@@ -30,11 +36,17 @@ def download_file(url: str, retries: int = 3, delay: int = 2) -> bytes:
 
     for attempt in range(1, retries + 1):
         try:
-            logger.info(f"🌐 Attempt {attempt} download: {url}")
-            res = requests.get(url, headers=headers, timeout=10)
-            res.raise_for_status()
-            logger.info(f"📥 Downloaded {len(res.content)} bytes")
-            return res.content
+            logger.info(f"🌐 Attempt {attempt} streamed download: {url}")
+            with requests.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True) as res:
+                res.raise_for_status()
+                length = res.headers.get("Content-Length")
+                if res.headers.get("Content-Encoding") or not (length and length.isdigit()):
+                    length = None
+                size = write_supabase_stream(
+                    path, res.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES), content_length=length
+                )
+            logger.info(f"📥 Streamed {size} bytes")
+            return size
         except requests.RequestException as e:
             logger.warning(f"⚠️ Attempt {attempt} failed: {e}")
             if attempt == retries:
@@ -78,16 +90,33 @@ def process_typeform_submission(data):
         logger.info(f"   Supply: {supply_path}")
         logger.info(f"   Demand: {demand_path}")
 
-        # Download & write files
-        logger.info(f"⬇️ Downloading supply file")
-        supply_data = download_file(supply_url)
-        write_supabase_file(supply_path, supply_data)
-
-        logger.info(f"⬇️ Downloading demand file")
-        demand_data = download_file(demand_url)
-        write_supabase_file(demand_path, demand_data)
+        # Download & write files (concurrent, streamed)
+        logger.info("⬇️ Streaming supply and demand files")
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="elasticity-dl") as pool:
+            supply_future = pool.submit(stream_file_to_supabase, supply_url, supply_path)
+            demand_future = pool.submit(stream_file_to_supabase, demand_url, demand_path)
+            supply_size = supply_future.result()
+            demand_size = demand_future.result()
 
         logger.info("✅ Files uploaded successfully to Supabase.")
 
+        # Point readers at the new files (they fall back to listing if this fails)
+        for folder, path, size in (
+            ("Elasticity/Supply_Report", supply_path, supply_size),
+            ("Elasticity/Demand_Report", demand_path, demand_size),
+        ):
+            try:
+                write_latest_pointer(folder, path, bytes=size, submitted_at=submitted_at)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to update latest pointer for {folder}: {e}")
+
+        return {
+            "supply_path": supply_path,
+            "supply_bytes": supply_size,
+            "demand_path": demand_path,
+            "demand_bytes": demand_size,
+        }
+
     except Exception:
         logger.exception("❌ Error processing Typeform elasticity upload.")
+        raise
@@ -1,6 +1,7 @@
 import os
 import requests
 from Engine.Files.auth import get_supabase_headers
+from Engine.Files.compression import decoded_text_object
 from logger import logger
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -17,7 +18,7 @@ def move_supabase_file(from_path, to_path, skipped_files):
         return
 
     put_url = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{to_path}"
-    put_resp = requests.put(put_url, headers=headers, data=get_resp.content)
+    put_resp = requests.put(put_url, headers=headers, data=decoded_text_object(from_path, get_resp.content))
     if put_resp.status_code not in (200, 201):
         logger.warning(f"❌ Failed to write {to_path}")
         skipped_files.append(from_path)
@@ -60,7 +61,7 @@ def copy_supabase_file(from_path, to_path, skipped_files):
         return
 
     put_url = f"{SUPABASE_URL}/storage/v1/object/{SUPABASE_BUCKET}/{to_path}"
-    put_resp = requests.put(put_url, headers=headers, data=get_resp.content)
+    put_resp = requests.put(put_url, headers=headers, data=decoded_text_object(from_path, get_resp.content))
     if put_resp.status_code not in (200, 201):
         logger.warning(f"❌ Failed to copy to {to_path}")
         skipped_files.append(from_path)
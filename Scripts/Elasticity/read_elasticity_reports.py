@@ -0,0 +1,109 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logger import logger
+from supabase import create_client
+from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Files.compression import decompress
+from Engine.Files.latest_pointer import read_latest_pointer
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET", "panelitix")
+ROOT_FOLDER = os.getenv("SUPABASE_ROOT_FOLDER", "The_Big_Question")
+
+MAX_RETRIES = 6
+RETRY_DELAY_SECONDS = 2
+
+REPORT_FOLDERS = {
+    "supply": "Elasticity/Supply_Report",
+    "demand": "Elasticity/Demand_Report",
+}
+
+supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+# --- Fallback: list the folder and take the newest file ---
+def _read_newest_by_listing(kind: str) -> str:
+    target_folder = f"{ROOT_FOLDER}/{REPORT_FOLDERS[kind]}"
+
+    logger.info(f"📁 Listing files in: {target_folder}")
+    file_list = supabase.storage.from_(SUPABASE_BUCKET).list(target_folder)
+
+    if not file_list:
+        raise FileNotFoundError(f"No {kind} report files found in Supabase.")
+
+    # Sort by most recent
+    file_list.sort(key=lambda x: x.get("last_modified") or x.get("updated_at") or x.get("created_at"), reverse=True)
+    most_recent_file = file_list[0]["name"]
+    supabase_path = f"{target_folder}/{most_recent_file}"
+
+    logger.info(f"📄 Most recent {kind} report: {most_recent_file}")
+
+    retries = 0
+    while retries < MAX_RETRIES:
+        try:
+            logger.info(f"📥 Attempting to read: {supabase_path} (try {retries + 1})")
+            response = supabase.storage.from_(SUPABASE_BUCKET).download(supabase_path)
+            content = decompress(response).decode("utf-8")
+            logger.info("✅ File read successfully")
+            return content.strip()
+        except Exception as e:
+            logger.warning(f"⏳ Retry {retries + 1}/{MAX_RETRIES} — error: {e}")
+            time.sleep(RETRY_DELAY_SECONDS * (2 ** retries))
+            retries += 1
+
+    raise TimeoutError(f"{kind.capitalize()} report file not available after {MAX_RETRIES} retries.")
+
+def read_latest_report(kind: str) -> str:
+    """
+    Newest supply/demand report: one pointer lookup plus one download when
+    elasticity_typeform has recorded a pointer, otherwise the folder listing.
+    """
+    folder = REPORT_FOLDERS[kind]
+    pointer = read_latest_pointer(folder)
+    if pointer:
+        try:
+            logger.info(f"📌 Reading latest {kind} report via pointer: {pointer['path']}")
+            return read_supabase_file(pointer["path"]).strip()
+        except Exception as e:
+            # e.g. the report was moved into a client folder after the last run
+            logger.warning(f"⚠️ Latest {kind} pointer is stale ({e}); falling back to listing")
+    return _read_newest_by_listing(kind)
+
+def read_report_response(kind: str):
+    try:
+        return {
+            "status": "success",
+            f"{kind}_report": read_latest_report(kind)
+        }
+    except (FileNotFoundError, TimeoutError) as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    except Exception as e:
+        logger.exception(f"❌ Error in read_{kind}_report")
+        return {
+            "status": "error",
+            "message": f"Server error while reading {kind} report: {str(e)}"
+        }
+
+# --- Both reports in one call ---
+def run_prompt(data):
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="elasticity-read") as pool:
+        futures = {kind: pool.submit(read_report_response, kind) for kind in REPORT_FOLDERS}
+        results = {kind: future.result() for kind, future in futures.items()}
+
+    response = {"status": "success"}
+    errors = {}
+    for kind, result in results.items():
+        if result["status"] == "success":
+            response[f"{kind}_report"] = result[f"{kind}_report"]
+        else:
+            errors[kind] = result["message"]
+
+    if errors:
+        response["status"] = "error"
+        response["message"] = "; ".join(errors.values())
+        response["errors"] = errors
+    return response
@@ -0,0 +1,199 @@
+import os
+import io
+import csv
+import json
+import uuid
+from typing import Any, Dict, List
+
+import numpy as np
+
+from logger import logger
+from Engine.Files.write_supabase_file import write_supabase_file
+from Scripts.Elasticity.write_elasticity_maths import (
+    calculation_string,
+    expected_price_change,
+    parse_elasticity,
+    parse_percent,
+)
+
+# =========================
+# Config
+# =========================
+
+ELASTICITY_GRID_MAX_SCENARIOS = int(os.getenv("ELASTICITY_GRID_MAX_SCENARIOS", "250000"))
+# Relative distance from a .x5 tie within which float rounding is re-done in Decimal
+TIE_TOLERANCE = 1e-9
+
+FIELDS = ("supply_change", "demand_change", "supply_elasticity", "demand_elasticity")
+PARSERS = {
+    "supply_change": parse_percent,
+    "demand_change": parse_percent,
+    "supply_elasticity": parse_elasticity,
+    "demand_elasticity": parse_elasticity,
+}
+
+# =========================
+# Scenario expansion
+# =========================
+
+def _as_list(value) -> List[Any]:
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+def expand_scenarios(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Either `scenarios` (a list of {supply_change, demand_change, supply_elasticity,
+    demand_elasticity}) or `grid` (a list or scalar per field; the cartesian
+    product is evaluated). Returns the parsed Decimal values per field (used for
+    exact fallbacks and calculation strings) and float arrays for the batch.
+    """
+    if payload.get("scenarios"):
+        rows = payload["scenarios"]
+        if len(rows) > ELASTICITY_GRID_MAX_SCENARIOS:
+            raise ValueError(f"{len(rows)} scenarios exceeds ELASTICITY_GRID_MAX_SCENARIOS={ELASTICITY_GRID_MAX_SCENARIOS}")
+        decimals = {f: [PARSERS[f](row.get(f)) for row in rows] for f in FIELDS}
+        shape = [len(rows)]
+        axes = None
+    elif payload.get("grid"):
+        grid = payload["grid"]
+        axes = {f: [PARSERS[f](v) for v in _as_list(grid.get(f, "0"))] for f in FIELDS}
+        shape = [len(axes[f]) for f in FIELDS]
+        total = int(np.prod(shape))
+        if total > ELASTICITY_GRID_MAX_SCENARIOS:
+            raise ValueError(f"Grid of {total} scenarios exceeds ELASTICITY_GRID_MAX_SCENARIOS={ELASTICITY_GRID_MAX_SCENARIOS}")
+        # Row-major cartesian product, supply_change varying slowest
+        index = np.indices(shape).reshape(len(FIELDS), -1)
+        decimals = {f: [axes[f][i] for i in index[n]] for n, f in enumerate(FIELDS)}
+    else:
+        raise ValueError("Provide either 'scenarios' or 'grid'")
+
+    arrays = {f: np.array([float(v) for v in decimals[f]], dtype=np.float64) for f in FIELDS}
+    return {"decimals": decimals, "arrays": arrays, "shape": shape, "axes": axes}
+
+# =========================
+# Vectorised maths
+# =========================
+
+def round_half_up_1dp(raw: np.ndarray) -> np.ndarray:
+    """Decimal ROUND_HALF_UP to 0.1 (ties away from zero), in float."""
+    scaled = np.abs(raw) * 10.0
+    return np.copysign(np.floor(scaled + 0.5), raw) / 10.0
+
+def near_ties(raw: np.ndarray) -> np.ndarray:
+    """Scenarios whose float result sits too close to a .x5 tie to trust."""
+    scaled = np.abs(raw) * 10.0
+    frac = scaled - np.floor(scaled)
+    return np.abs(frac - 0.5) <= TIE_TOLERANCE * np.maximum(scaled, 1.0)
+
+def evaluate(scenarios: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    a = scenarios["arrays"]
+    numerator = a["demand_change"] - a["supply_change"]
+    denominator = a["supply_elasticity"] + np.abs(a["demand_elasticity"])
+    zero = denominator == 0
+    raw = np.divide(numerator, denominator, out=np.zeros_like(numerator), where=~zero)
+    rounded = round_half_up_1dp(raw)
+
+    # Exact Decimal fallback where float rounding could differ from the single path
+    d = scenarios["decimals"]
+    ties = np.flatnonzero(near_ties(raw) & ~zero)
+    for i in ties:
+        _, _, raw_i, rounded_i = expected_price_change(
+            d["supply_change"][i], d["demand_change"][i],
+            d["supply_elasticity"][i], d["demand_elasticity"][i],
+        )
+        raw[i] = float(raw_i)
+        rounded[i] = float(rounded_i)
+    if ties.size:
+        logger.info(f"[ElasticityGrid] {ties.size} near-tie scenario(s) rounded in Decimal")
+
+    return {"raw": raw, "rounded": rounded, "zero_denominator": zero}
+
+def summarise(result: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    rounded = result["rounded"]
+    p5, p25, p50, p75, p95 = np.percentile(rounded, [5, 25, 50, 75, 95])
+    return {
+        "count": int(rounded.size),
+        "min": f"{rounded.min():.1f}%",
+        "max": f"{rounded.max():.1f}%",
+        "mean": f"{rounded.mean():.2f}%",
+        "std": f"{rounded.std():.2f}%",
+        "percentiles": {
+            "P5": f"{p5:.1f}%", "P25": f"{p25:.1f}%", "P50": f"{p50:.1f}%",
+            "P75": f"{p75:.1f}%", "P95": f"{p95:.1f}%",
+        },
+        "price_up": int((rounded > 0).sum()),
+        "price_down": int((rounded < 0).sum()),
+        "unchanged": int((rounded == 0).sum()),
+        "zero_denominator": int(result["zero_denominator"].sum()),
+    }
+
+# =========================
+# Output
+# =========================
+
+def _calculations(scenarios: Dict[str, Any]) -> List[str]:
+    d = scenarios["decimals"]
+    return [
+        calculation_string(d["supply_change"][i], d["demand_change"][i], d["supply_elasticity"][i], d["demand_elasticity"][i])
+        for i in range(len(d["supply_change"]))
+    ]
+
+def build_csv(scenarios: Dict[str, Any], result: Dict[str, np.ndarray], calculations: List[str] = None) -> str:
+    d = scenarios["decimals"]
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    header = list(FIELDS) + ["elasticity_change"]
+    if calculations:
+        header.append("elasticity_calculation")
+    writer.writerow(header)
+    for i, change in enumerate(result["rounded"]):
+        row = [str(d[f][i]) for f in FIELDS] + [f"{change:.1f}%"]
+        if calculations:
+            row.append(calculations[i])
+        writer.writerow(row)
+    return buf.getvalue()
+
+def run_prompt(data):
+    try:
+        run_id = data.get("run_id") or str(uuid.uuid4())
+        payload = data.get("data", data)
+
+        scenarios = expand_scenarios(payload)
+        result = evaluate(scenarios)
+        summary = summarise(result)
+        logger.info(f"📊 Elasticity grid {run_id}: {summary['count']} scenarios, P50 {summary['percentiles']['P50']}")
+
+        calculations = _calculations(scenarios) if payload.get("include_calculations") else None
+
+        surface: Dict[str, Any] = {
+            "shape": scenarios["shape"],
+            "fields": list(FIELDS),
+            "elasticity_change": [float(f"{v:.1f}") for v in result["rounded"]],
+        }
+        if scenarios["axes"] is not None:
+            surface["axes"] = {f: [str(v) for v in vals] for f, vals in scenarios["axes"].items()}
+        if calculations:
+            surface["elasticity_calculation"] = calculations
+
+        response = {
+            "status": "success",
+            "run_id": run_id,
+            "summary": summary,
+            "surface": surface,
+        }
+
+        base = f"Elasticity/Ai_Responses/Elasticity_Grid/{run_id}"
+        write_supabase_file(f"{base}.txt", json.dumps({"summary": summary, "surface": surface}, indent=2))
+        if payload.get("csv"):
+            csv_path = f"{base}.csv"
+            write_supabase_file(csv_path, build_csv(scenarios, result, calculations), content_type="text/csv")
+            response["csv_path"] = csv_path
+        logger.info(f"✅ Elasticity grid written to Supabase: {base}")
+
+        return response
+
+    except Exception as e:
+        logger.exception("❌ Failed to calculate elasticity grid")
+        return {
+            "status": "error",
+            "message": f"Elasticity grid calculation failed: {str(e)}"
+        }
@@ -2,12 +2,46 @@ import uuid
 from decimal import Decimal, ROUND_HALF_UP
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Runtime.artifacts import publish_artifact
 
 # --- Format decimal as percent string ---
 def format_decimal(value: Decimal, dp: int = 1) -> str:
     precision = '1.' + ('0' * dp)
     return f"{value.quantize(Decimal(precision), rounding=ROUND_HALF_UP)}%"
 
+# --- Input parsing (shared with the batch grid) ---
+def parse_percent(raw) -> Decimal:
+    return Decimal(str(raw or "0").replace('%', '').strip())
+
+def parse_elasticity(raw) -> Decimal:
+    return Decimal(str(raw or "0"))
+
+# --- Elasticity maths ---
+def expected_price_change(supply_change: Decimal, demand_change: Decimal,
+                          supply_elasticity: Decimal, demand_elasticity: Decimal):
+    """Returns (numerator, denominator, raw_change, rounded_change)."""
+    numerator = demand_change - supply_change
+    denominator = supply_elasticity + abs(demand_elasticity)
+
+    if denominator == 0:
+        raw_change = Decimal("0.0")
+    else:
+        raw_change = numerator / denominator
+
+    rounded_change = raw_change.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP)
+    return numerator, denominator, raw_change, rounded_change
+
+def calculation_string(supply_change: Decimal, demand_change: Decimal,
+                       supply_elasticity: Decimal, demand_elasticity: Decimal) -> str:
+    numerator, denominator, raw_change, rounded_change = expected_price_change(
+        supply_change, demand_change, supply_elasticity, demand_elasticity
+    )
+    return (
+        f"Expected Price Change = ({demand_change:+.1f}% - ({supply_change:+.1f}%)) / "
+        f"({supply_elasticity} + |{demand_elasticity}|) = "
+        f"[{numerator:+.1f}% / {denominator}] = {raw_change:.2f}%, rounded to {rounded_change:.1f}%."
+    )
+
 # --- Main function ---
 def run_prompt(data):
     try:
@@ -26,10 +60,10 @@ def run_prompt(data):
         demand_elasticity_raw = payload.get("demand_elasticity") or "0"
 
         # Parse using safe string conversion
-        supply_change = Decimal(str(supply_change_raw).replace('%', '').strip())
-        demand_change = Decimal(str(demand_change_raw).replace('%', '').strip())
-        supply_elasticity = Decimal(str(supply_elasticity_raw))
-        demand_elasticity = Decimal(str(demand_elasticity_raw))
+        supply_change = parse_percent(supply_change_raw)
+        demand_change = parse_percent(demand_change_raw)
+        supply_elasticity = parse_elasticity(supply_elasticity_raw)
+        demand_elasticity = parse_elasticity(demand_elasticity_raw)
 
         # Debug log
         logger.info("📥 Raw inputs:")
@@ -44,28 +78,17 @@ def run_prompt(data):
         logger.info(f"  supply_elasticity = {supply_elasticity}")
         logger.info(f"  demand_elasticity = {demand_elasticity}")
 
-        # Elasticity maths
-        numerator = demand_change - supply_change
-        denominator = supply_elasticity + abs(demand_elasticity)
-
-        if denominator == 0:
-            raw_change = Decimal("0.0")
-        else:
-            raw_change = numerator / denominator
-
-        rounded_change = raw_change.quantize(Decimal("0.1"), rounding=ROUND_HALF_UP)
-
-        # Calculation explanation string
-        calc_string = (
-            f"Expected Price Change = ({demand_change:+.1f}% - ({supply_change:+.1f}%)) / "
-            f"({supply_elasticity} + |{demand_elasticity}|) = "
-            f"[{numerator:+.1f}% / {denominator}] = {raw_change:.2f}%, rounded to {rounded_change:.1f}%."
+        # Elasticity maths + calculation explanation string
+        _, _, _, rounded_change = expected_price_change(
+            supply_change, demand_change, supply_elasticity, demand_elasticity
         )
+        calc_string = calculation_string(supply_change, demand_change, supply_elasticity, demand_elasticity)
 
         # Save output to Supabase
         filename = f"{run_id}.txt"
         supabase_path = f"Elasticity/Ai_Responses/Elasticity_Maths/{filename}"
         write_supabase_file(supabase_path, calc_string)
+        publish_artifact(supabase_path, calc_string, final=True)
         logger.info(f"✅ Elasticity calculation written to Supabase: {supabase_path}")
 
         return {
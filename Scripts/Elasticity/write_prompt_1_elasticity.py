@@ -3,30 +3,28 @@ import json
 from openai import OpenAI
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
-
-def safe_escape(value):
-    return str(value).replace("{", "{{").replace("}", "}}")
+from Engine.Runtime.artifacts import publish_artifact
+from Engine.Prompts.template_registry import get_template
 
 def run_prompt(data):
     try:
         run_id = data.get("run_id") or str(uuid.uuid4())
         data["run_id"] = run_id  # ensure it's injected if missing
 
-        # Extract and escape all inputs
-        commodity = safe_escape(data["commodity"])
-        report_date = safe_escape(data["report_date"])
-        time_range = safe_escape(data["time_range"])
-        region = safe_escape(data["region"])
-        supply_change = safe_escape(data["supply_change"])
-        demand_change = safe_escape(data["demand_change"])
-        supply_report = safe_escape(data["supply_report"])
-        demand_report = safe_escape(data["demand_report"])
+        # Extract inputs (values are inserted verbatim by the template registry)
+        commodity = data["commodity"]
+        report_date = data["report_date"]
+        time_range = data["time_range"]
+        region = data["region"]
+        supply_change = data["supply_change"]
+        demand_change = data["demand_change"]
+        supply_report = data["supply_report"]
+        demand_report = data["demand_report"]
 
-        # Load and populate prompt template
-        with open("Prompts/Elasticity/prompt_1_elasticity.txt", "r", encoding="utf-8") as f:
-            template = f.read()
+        # Load and populate prompt template (compiled once, reloaded on change)
+        template = get_template("Prompts/Elasticity/prompt_1_elasticity.txt")
 
-        prompt = template.format(
+        prompt = template.render(
             commodity=commodity,
             report_date=report_date,
             time_range=time_range,
@@ -58,6 +56,7 @@ def run_prompt(data):
         # Write AI response to Supabase
         supabase_path = f"Elasticity/Ai_Responses/Prompt_1_Elasticity/{run_id}.txt"
         write_supabase_file(supabase_path, formatted)
+        publish_artifact(supabase_path, formatted, final=True)
         logger.info(f"✅ AI response written to Supabase: {supabase_path}")
 
         return {"status": "processing", "run_id": run_id}
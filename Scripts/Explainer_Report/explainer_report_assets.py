@@ -4,7 +4,8 @@ import os
 import re
 import json
 import time
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 
 import requests
 from openai import OpenAI
@@ -12,17 +13,22 @@ from logger import logger
 from Engine.Files.auth import get_supabase_headers
 from Engine.Files.read_supabase_file import read_supabase_file
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Prompts.template_registry import get_template
+from Engine.Prompts.prompt_assembler import estimate_tokens
 
 # =============================================================================
 # Config
 # =============================================================================
 
 PROMPT_PATH = "Prompts/Explainer_Report/prompt_2_report_assets.txt"
+SECTION_PROMPT_PATH = "Prompts/Explainer_Report/prompt_2_section_summary.txt"
+SECTIONS_PATH = "Prompts/Explainer_Report/Questions/section_titles_question_numbers.txt"
 AE_BE_PATH = "Prompts/American_to_British/american_to_british.txt"
 
 PARENT_DIR = "Explainer_Report/Ai_Responses/Question_Assets"
 MERGED_SUBDIR = "Merged_Question_Outputs"
 REPORT_SUBDIR = "Report_Assets"
+SECTION_SUMMARIES_SUBDIR = "Section_Summaries"
 
 # Default to gpt-5-mini
 DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-5-mini")
@@ -33,6 +39,14 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_BUCKET = "panelitix"
 SUPABASE_ROOT_FOLDER = os.getenv("SUPABASE_ROOT_FOLDER", "The_Big_Question")
 
+# Generation mode (payload "report_assets_mode" overrides):
+#   single     : one prompt with the whole merged document
+#   map_reduce : summarise each section in parallel, then one smaller report prompt
+#   auto       : map_reduce once the merged document exceeds MAP_REDUCE_MIN_TOKENS
+REPORT_ASSETS_MODE = os.getenv("EXPLAINER_REPORT_ASSETS_MODE", "single").strip().lower()
+MAP_REDUCE_MIN_TOKENS = int(os.getenv("EXPLAINER_MAP_REDUCE_MIN_TOKENS", "30000"))
+MAP_WORKERS = int(os.getenv("EXPLAINER_MAP_WORKERS", "4"))
+
 # Retry policy
 MAX_TRIES = 6
 BASE_BACKOFF = 1.0  # seconds
@@ -55,10 +69,6 @@ def normalize_date_for_filename(value: str) -> str:
     v = v.replace("/", "-").replace(" ", "_").replace(":", "")
     return v or "date"
 
-def safe_escape_braces(value: str) -> str:
-    # Prevent .format collisions
-    return str(value).replace("{", "{{").replace("}", "}}")
-
 def load_text(path: str) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
@@ -199,6 +209,94 @@ def clean_ai_output_to_json_text(ai_text: str) -> str:
     except json.JSONDecodeError:
         return cleaned
 
+# ---------------- Map-reduce over report sections ----------------
+
+_SECTION_RANGE_RE = re.compile(r"^Q(\d+)\s*-\s*(\d+)$", re.IGNORECASE)
+
+def load_sections(path: str = SECTIONS_PATH) -> List[Tuple[str, int, int]]:
+    """
+    Parse the section file: a title line followed by a 'Qa - b' line.
+    Returns [(title, first_question, last_question), ...] (1-based, inclusive).
+    """
+    sections: List[Tuple[str, int, int]] = []
+    title: Optional[str] = None
+    for line in load_text(path).splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        m = _SECTION_RANGE_RE.match(line)
+        if m and title:
+            sections.append((title, int(m.group(1)), int(m.group(2))))
+            title = None
+        else:
+            title = line
+    return sections
+
+def split_question_assets(merged_text: str) -> List[str]:
+    """Split the merged document (question JSONs back to back, in question order) into one text per question."""
+    decoder = json.JSONDecoder()
+    chunks: List[str] = []
+    pos, end = 0, len(merged_text)
+    while pos < end:
+        while pos < end and merged_text[pos].isspace():
+            pos += 1
+        if pos >= end:
+            break
+        _, stop = decoder.raw_decode(merged_text, pos)
+        chunks.append(merged_text[pos:stop])
+        pos = stop
+    return chunks
+
+def resolve_mode(data: Dict[str, Any], question_assets_text: str) -> str:
+    mode = str(data.get("report_assets_mode") or REPORT_ASSETS_MODE).strip().lower()
+    if mode == "auto":
+        tokens = estimate_tokens(question_assets_text)
+        mode = "map_reduce" if tokens >= MAP_REDUCE_MIN_TOKENS else "single"
+        logger.info(f"🧭 report_assets_mode=auto: ~{tokens} tokens -> {mode}")
+    return mode if mode in ("single", "map_reduce") else "single"
+
+def build_section_briefs(
+    question_assets_text: str,
+    profile: Dict[str, str],
+    run_id: str,
+    model: str
+) -> Optional[str]:
+    """
+    Map step: one summary prompt per section, MAP_WORKERS at a time. Returns
+    the briefs joined in section order, or None when the merged document does
+    not line up with the section file (the caller then runs single-shot).
+    """
+    sections = load_sections(SECTIONS_PATH)
+    questions = split_question_assets(question_assets_text)
+    expected = max((last for _, _, last in sections), default=0)
+    if not sections or len(questions) != expected:
+        logger.warning(
+            f"⚠️ Map-reduce skipped: {len(questions)} merged question(s) vs {expected} in {SECTIONS_PATH}"
+        )
+        return None
+
+    template = get_template(SECTION_PROMPT_PATH)
+
+    def summarise(section: Tuple[str, int, int]) -> str:
+        title, first, last = section
+        prompt = template.render(
+            **profile,
+            section_title=title,
+            question_range=f"Q{first} - {last}",
+            question_assets="\n".join(questions[first - 1:last]),
+        )
+        logger.info(f"🗺️ Summarising section '{title}' (Q{first}-{last})")
+        brief = clean_ai_output_to_json_text(call_openai(prompt, model=model, temperature=TEMPERATURE))
+        out_path = f"{PARENT_DIR}/{run_id}/{SECTION_SUMMARIES_SUBDIR}/{first:02d}_{normalize_name(title)}.txt"
+        write_supabase_file(out_path, brief, content_type="text/plain; charset=utf-8")
+        return brief
+
+    with ThreadPoolExecutor(max_workers=max(1, MAP_WORKERS), thread_name_prefix="explainer-map") as pool:
+        briefs = list(pool.map(summarise, sections))
+
+    logger.info(f"🧩 Built {len(briefs)} section briefs ({sum(len(b) for b in briefs)} chars, was {len(question_assets_text)})")
+    return "\n".join(briefs)
+
 # =============================================================================
 # Core
 # =============================================================================
@@ -256,21 +354,40 @@ def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
     question_assets_text = read_supabase_file(merged_file_rel, binary=False) or ""
     question_assets_text = question_assets_text.strip()
 
-    # ---- Build prompt: inject vars + merged text (as {question_assets})
-    prompt_template = load_text(PROMPT_PATH)
-    prompt = prompt_template.format(
-        condition=safe_escape_braces(condition),
-        age=safe_escape_braces(age),
-        gender=safe_escape_braces(gender),
-        ethnicity=safe_escape_braces(ethnicity),
-        region=safe_escape_braces(region),
-        todays_date=safe_escape_braces(todays_date),
-        run_id=safe_escape_braces(run_id),
-        question_assets=safe_escape_braces(question_assets_text),
+    model = data.get("model", DEFAULT_MODEL)
+    profile = {
+        "condition": condition,
+        "age": age,
+        "gender": gender,
+        "ethnicity": ethnicity,
+        "region": region,
+        "todays_date": todays_date,
+    }
+
+    # ---- Map step (optional): section briefs stand in for the full merged text
+    mode = resolve_mode(data, question_assets_text)
+    section_assets = question_assets_text
+    if mode == "map_reduce":
+        try:
+            briefs = build_section_briefs(question_assets_text, profile, run_id, model)
+        except Exception as e:
+            logger.warning(f"⚠️ Map step failed ({e}); falling back to single-shot")
+            briefs = None
+        if briefs is None:
+            mode = "single"
+        else:
+            section_assets = briefs
+
+    # ---- Build prompt: inject vars + merged text or section briefs (as {question_assets})
+    prompt_template = get_template(PROMPT_PATH)
+    prompt = prompt_template.render(
+        **profile,
+        run_id=run_id,
+        question_assets=section_assets,
     )
 
-    # ---- Call OpenAI
-    ai_text = call_openai(prompt, model=data.get("model", DEFAULT_MODEL), temperature=TEMPERATURE)
+    # ---- Call OpenAI (the reduce step in map_reduce mode)
+    ai_text = call_openai(prompt, model=model, temperature=TEMPERATURE)
 
     # ---- Clean to JSON text (no fences)
     json_text = clean_ai_output_to_json_text(ai_text)
@@ -295,5 +412,6 @@ def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "status": "ok",
         "run_id": run_id,
+        "mode": mode,
         "output_path": out_path
     }
@@ -4,6 +4,7 @@ import os
 import re
 import json
 import time
+from functools import lru_cache
 from typing import Dict, Any, List, Tuple
 
 import requests
@@ -11,6 +12,7 @@ from logger import logger
 from Engine.Files.auth import get_supabase_headers
 from Engine.Files.write_supabase_file import write_supabase_file
 from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Runtime.cpu_pool import run_cpu_transform
 
 # -------------------------------------------------------------------
 # Config
@@ -192,6 +194,15 @@ def american_to_british(text: str, compiled: Tuple[re.Pattern, Dict[str, str]])
     pattern, mapping = compiled
     return pattern.sub(lambda m: mapping.get(m.group(1), m.group(1)), text)
 
+@lru_cache(maxsize=4)
+def cached_ae_be_regex(path: str = AE_BE_PATH) -> Tuple[re.Pattern, Dict[str, str]]:
+    """Mapping + compiled regex, built once per process instead of per merge."""
+    return compile_ae_be_regex(load_ae_be_mapping(path))
+
+def convert_ae_to_be(text: str) -> str:
+    """Pure text transform (registered with the CPU pool)."""
+    return american_to_british(text, cached_ae_be_regex())
+
 # -------------------------------------------------------------------
 # Core
 # -------------------------------------------------------------------
@@ -262,9 +273,8 @@ def merge_questions(run_id: str, first_name: str, sur_name: str,
     merged_text = "\n".join(merged_chunks) + "\n"
 
     # ---- AE → BE conversion step ----
-    mapping = load_ae_be_mapping(AE_BE_PATH)
-    compiled = compile_ae_be_regex(mapping)
-    merged_text = american_to_british(merged_text, compiled)
+    mapping = cached_ae_be_regex()[1]
+    merged_text = run_cpu_transform("merge_questions", text=merged_text)
 
     # Build output filename
     first = normalize_name(first_name)
@@ -7,17 +7,20 @@ import uuid
 import time
 import threading
 import hashlib
-import random
-import requests
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Tuple, Optional
-from urllib.parse import urlparse
 from copy import deepcopy
-from requests.utils import requote_uri
-from requests.adapters import HTTPAdapter  # (1) persistent HTTP session: adapter for pooling
 from openai import OpenAI
 from logger import logger
+from Engine.Files.read_supabase_file import read_supabase_file
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Files.event_log import EventLog, compact_events, next_event_seq, read_events
+from Engine.Links.url_validator import validate_url, hostname
+from Engine.Links.link_store import DomainSuffixIndex, flagged_domains
+from Engine.Links.url_shortener import cached_short_url, request_short_url, flush_short_urls
+from Engine.Webhooks.outbound import enqueue_webhook
+from Engine.Prompts.template_registry import get_template, compile_template
+from Engine.Prompts.prompt_assembler import BudgetedBlock, estimate_tokens
 
 # =========================
 # Config
@@ -37,32 +40,31 @@ TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.2"))
 MAX_QA_IN_CONTEXT = int(os.getenv("EXPLAINER_MAX_QA_IN_CONTEXT", "12"))
 MAX_CONTEXT_CHARS = int(os.getenv("EXPLAINER_MAX_CONTEXT_CHARS", "16000"))
 
+# Per-section prompt budgets (estimated tokens; <= 0 = unlimited). Uniqueness is
+# still enforced against the full registry sets; these only bound what the model sees.
+BUDGET_HISTORY = int(os.getenv("EXPLAINER_BUDGET_HISTORY", str(MAX_CONTEXT_CHARS // 4)))
+BUDGET_URLS = int(os.getenv("EXPLAINER_BUDGET_URLS", "1500"))
+BUDGET_STATS = int(os.getenv("EXPLAINER_BUDGET_STATS", "1500"))
+BUDGET_INSIGHTS = int(os.getenv("EXPLAINER_BUDGET_INSIGHTS", "1500"))
+BUDGET_STAT_FPS = int(os.getenv("EXPLAINER_BUDGET_STAT_FPS", "1000"))
+BUDGET_INSIGHT_FPS = int(os.getenv("EXPLAINER_BUDGET_INSIGHT_FPS", "1000"))
+BUDGET_ACRONYMS = int(os.getenv("EXPLAINER_BUDGET_ACRONYMS", "200"))
+
 # Disallowed URL signatures (to block downloads)
 BAD_URL_HINTS = (".pdf", ".doc", ".docx", ".xls", ".xlsx", ".zip")
 BAD_URL_SNIPPETS = ("/pdf/", "/download", "?download=")
 
-HTTP_UA = os.getenv(
-    "HTTP_VALIDATION_UA",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-)
-HTTP_TIMEOUT = float(os.getenv("HTTP_VALIDATION_TIMEOUT", "8.0"))
-
-# (1) persistent HTTP session & connection pool
-HTTP_POOL_CONNS = int(os.getenv("HTTP_POOL_CONNS", "50"))
-HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "50"))
-
-_HTTP_SESSION = requests.Session()
-_HTTP_ADAPTER = HTTPAdapter(pool_connections=HTTP_POOL_CONNS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
-_HTTP_SESSION.mount("http://", _HTTP_ADAPTER)
-_HTTP_SESSION.mount("https://", _HTTP_ADAPTER)
-
 # (7) reuse a single OpenAI client
 _OPENAI_CLIENT = OpenAI()
 
 # --- Free URL Shortening (is.gd) ---
 URL_SHORTENING = os.getenv("URL_SHORTENING", "off").strip().lower()  # "off" | "isgd"
 URL_SHORTENING_MODE = os.getenv("URL_SHORTENING_MODE", "replace").strip().lower()  # "replace" | "sidecar"
+SHORTENER_FLUSH_TIMEOUT = float(os.getenv("SHORTENER_FLUSH_TIMEOUT", "120"))
+
+# Manifest persistence: "json" rewrites manifest.json on every change; "events"
+# appends one small event per change and materialises manifest.json at the end
+EXPLAINER_MANIFEST_FORMAT = os.getenv("EXPLAINER_MANIFEST_FORMAT", "json").strip().lower()
 
 # --- Zapier callback config ---
 ZAPIER_STAGE2_HOOK_URL = os.getenv("ZAPIER_STAGE2_HOOK_URL", "").strip()  # e.g. https://hooks.zapier.com/hooks/catch/21230623/usvk7gr/
@@ -74,6 +76,9 @@ ZAPIER_STAGE2_HOOK_URL = os.getenv("ZAPIER_STAGE2_HOOK_URL", "").strip()  # e.g.
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
+def _flag(value: Any) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
 def slugify(s: str) -> str:
     s = re.sub(r"[^a-z0-9]+", "-", s.strip().lower())
     return s.strip("-")
@@ -81,9 +86,6 @@ def slugify(s: str) -> str:
 def sha8(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()[:8]
 
-def safe_escape_braces(value: str) -> str:
-    return str(value).replace("{", "{{").replace("}", "}}")
-
 def load_text(path: str) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
@@ -105,14 +107,12 @@ def load_blacklist_domains() -> set:
         return set()
 
 def format_question(q_template: str, ctx: Dict[str, Any]) -> str:
-    safe_ctx = {k: safe_escape_braces(str(v)) for k, v in ctx.items()}
-    return q_template.format(**safe_ctx)
+    return compile_template(q_template).render(**ctx)
 
-def build_prior_context(history: List[str]) -> str:
-    if not history:
+def build_prior_context(history: BudgetedBlock, query: str = "") -> str:
+    if not len(history):
         return ""
-    joined = "\n\n".join(history[-MAX_QA_IN_CONTEXT:])
-    joined = joined[-MAX_CONTEXT_CHARS:]
+    joined = history.render(query)
     return (
         "\n\n---\n### PRIOR RESPONSES CONTEXT\n"
         "The following are previous question/answer JSONs from this same report run:\n"
@@ -139,20 +139,14 @@ def strip_links(text: str) -> str:
     text = MD_LINK_RE.sub(_strip_md, text)
     return URL_RE.sub('', text)
 
-def hostname(url: str) -> str:
-    try:
-        return urlparse(url).netloc.split(":")[0].lower()
-    except Exception:
-        return ""
+def build_blacklist_index(domains: set) -> DomainSuffixIndex:
+    return DomainSuffixIndex(domains)
 
-def host_is_blacklisted(host: str, blacklist: set) -> bool:
+def host_is_blacklisted(host: str, blacklist: DomainSuffixIndex) -> bool:
+    """Exact-or-parent-domain match via reversed-label suffix lookup."""
     if not host:
         return False
-    h = host.lower()
-    for dom in blacklist:
-        if h == dom or h.endswith("." + dom):
-            return True
-    return False
+    return host in blacklist
 
 def is_bad_article_url(url: str) -> bool:
     if not url or not url.startswith("https://"):
@@ -167,165 +161,9 @@ def is_bad_article_url(url: str) -> bool:
 def is_http_html_ok(url: str) -> Tuple[bool, str, str]:
     """
     Structural + reachability validator for public HTML article pages.
-    Returns (ok, reason, final_url).
+    Returns (ok, reason, final_url). Delegates to the shared, cached validator.
     """
-
-    try:
-        # Primary GET (your current UA)
-        r = _HTTP_SESSION.get(
-            url,
-            headers={
-                "User-Agent": HTTP_UA,
-                "Accept": "text/html,application/xhtml+xml",
-                "Accept-Language": "en-GB,en;q=0.9",
-                "Cache-Control": "no-cache",
-                "Pragma": "no-cache",
-            },
-            timeout=HTTP_TIMEOUT,
-            allow_redirects=True,
-        )
-        final_url = r.url
-        bl = (r.text or "")
-        bl_low = bl.lower()
-
-        # 1) HTTP OK
-        if r.status_code != 200:
-            return False, f"status={r.status_code}", final_url
-
-        # 2) HTML OK
-        ctype = (r.headers.get("Content-Type") or "").lower()
-        if "text/html" not in ctype or "<html" not in bl_low:
-            return False, f"content_type={ctype or 'unknown'}", final_url
-
-        # 3) Not AMP / Proxy
-        ful = final_url.lower()
-        if "/amp" in ful or ful.startswith("https://amp.") or "amp." in hostname(final_url):
-            return False, "amp_or_proxy_url", final_url
-
-        # ---- WAF/CDN cookie / header detection (domain-agnostic) ----
-        set_cookie = "; ".join([v.lower() for k, v in r.headers.items() if k.lower() == "set-cookie"])
-        waf_cookies = ("_abck", "bm_sv", "bm_sz", "bm_mi", "ak_bmsc", "akavpwr_", "aka_")
-        if any(tok in set_cookie for tok in waf_cookies):
-            return False, "waf_cookie_present", final_url
-
-        server_header = (r.headers.get("Server") or "").lower()
-        via_header = (r.headers.get("Via") or "").lower()
-        x_ak_err = (r.headers.get("X-Akamai-Error") or "").lower()
-        if ("akamai" in (server_header + via_header)) and any(t in (server_header + via_header + x_ak_err) for t in ("error", "deny", "denied", "blocked")):
-            return False, "header_block_server", final_url
-
-        # Meta refresh block pages
-        if 'http-equiv="refresh"' in bl_low and any(tag in bl_low for tag in ("accessdenied", "denied", "forbidden")):
-            return False, "meta_refresh_blockpage", final_url
-
-        # ---- Basic structure ----
-        has_article_tag = "<article" in bl_low
-        has_h1 = "<h1" in bl_low
-        p_count = bl_low.count("<p")
-        body_len = len(bl)
-        link_count = bl_low.count("<a ")
-
-        # 4) Article-Structure
-        if not (has_article_tag or (has_h1 and p_count >= 2 and body_len >= 1500)):
-            return False, "insufficient_article_signals", final_url
-
-        # 5) Structural-Minimum
-        if not (has_article_tag or (p_count >= 2 and body_len >= 5000)):
-            return False, "too_short_or_placeholder", final_url
-
-        # 6) No Access / Interstitial / Error Text (only blocks when structure is weak)
-        deny_phrases = (
-            "access denied","forbidden","not authorized","not authorised","authorization required","authorisation required",
-            "you don't have permission","you do not have permission","you don't have authorization","you do not have authorization",
-            "was denied","enable cookies","captcha","unusual traffic","reference #","page not found","404 not found",
-            "cannot be found","can't find","does not exist","error 404","regional restrictions","your location or country",
-            "not available in your region","geographic restrictions",
-        )
-        if any(phrase in bl_low for phrase in deny_phrases):
-            if not has_article_tag and (p_count < 2 or body_len < 5000):
-                return False, "access_or_error_interstitial", final_url
-
-        # 7) Link-density sanity (long but inert pages)
-        if link_count < 3 and p_count < 3:
-            return False, "no_links_low_content", final_url
-
-        # ---- Cross-UA GET consistency (detect WAF serving different content to browsers) ----
-        ua_desktop_safari = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
-        r2 = _HTTP_SESSION.get(
-            final_url,
-            headers={
-                "User-Agent": ua_desktop_safari,
-                "Accept": "text/html,application/xhtml+xml",
-                "Accept-Language": "en-GB,en;q=0.9",
-                "Cache-Control": "no-cache",
-                "Pragma": "no-cache",
-            },
-            timeout=HTTP_TIMEOUT,
-            allow_redirects=True,
-        )
-        ctype2 = (r2.headers.get("Content-Type") or "").lower()
-        bl2 = (r2.text or "")
-        if r2.status_code != 200 or "text/html" not in ctype2 or "<html" not in (bl2.lower()):
-            return False, "ua_inconsistent_blocked", r2.url
-        if len(bl2) < 0.5 * body_len:
-            return False, "ua_inconsistent_body_shrink", r2.url
-
-        # 8) Public reachability probes (robust: HEAD first, tiny GET fallback; majority wins)
-        def _probe_ok(u: str, ua: str) -> bool:
-            def _is_html_ctype(ct: str) -> bool:
-                ct = (ct or "").lower()
-                return ("text/html" in ct) or ("application/xhtml+xml" in ct)
-
-            try:
-                rr = _HTTP_SESSION.head(
-                    u,
-                    headers={"User-Agent": ua, "Accept-Language": "en-GB,en;q=0.9"},
-                    timeout=HTTP_TIMEOUT,
-                    allow_redirects=True,
-                )
-                if rr.status_code == 200 and _is_html_ctype(rr.headers.get("Content-Type")):
-                    return True
-
-                if rr.status_code in (403, 405, 406, 429) or not _is_html_ctype(rr.headers.get("Content-Type")):
-                    rg = _HTTP_SESSION.get(
-                        u,
-                        headers={
-                            "User-Agent": ua,
-                            "Accept": "text/html,application/xhtml+xml",
-                            "Accept-Language": "en-GB,en;q=0.9",
-                            "Range": "bytes=0-4095",
-                            "Cache-Control": "no-cache",
-                            "Pragma": "no-cache",
-                        },
-                        timeout=HTTP_TIMEOUT,
-                        allow_redirects=True,
-                    )
-                    if rg.status_code == 200:
-                        ctg = (rg.headers.get("Content-Type") or "").lower()
-                        body_start = (rg.text or "")[:4096].lower()
-                        if _is_html_ctype(ctg) or "<html" in body_start:
-                            return True
-                return False
-            except Exception:
-                return False
-
-        ua_desktop_chrome = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        ua_desktop_safari = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
-        ua_mobile_safari  = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
-
-        probes = [
-            _probe_ok(final_url, ua_desktop_chrome),
-            _probe_ok(final_url, ua_desktop_safari),
-            _probe_ok(final_url, ua_mobile_safari),
-        ]
-
-        if sum(1 for ok in probes if ok) < 2:
-            return False, "unreachable_for_common_UA", final_url
-
-        return True, "ok", final_url
-
-    except Exception as exc:
-        return False, f"exception={type(exc).__name__}", url
+    return validate_url(url)
 
 def fingerprint(text: str) -> str:
     t = (text or '').lower()
@@ -343,89 +181,52 @@ def is_recent_ddmmyyyy(ddmmyyyy: str, months_primary=6, months_max=12) -> Tuple[
     delta_days = (today - d).days
     return (delta_days <= months_primary * 30), (delta_days <= months_max * 30)
 
-# --- URL Shortening helpers (is.gd only, retry/backoff, no env vars) ---
-
-def shorten_url_isgd(long_url: str) -> Optional[str]:
+# --- URL Shortening (background stage; see Engine/Links/url_shortener.py) ---
+
+def _publish_short_url(
+    short_url: str,
+    canonical_url: str,
+    obj_out: Dict[str, Any],
+    outfile: str,
+    longurl_sidecar: str,
+    shorturl_sidecar: str,
+    rewrite_output: bool
+) -> None:
     """
-    Shorten via is.gd using POST, retries, and backoff.
-    Logs all failures to Render logs only. Returns short URL or None.
+    Apply a short URL to an item's outputs. With rewrite_output=True (the
+    background path) the already-written output JSON is patched in place.
     """
-    if not long_url:
-        return None
-
-    enc_url = requote_uri(long_url)
-    max_tries = 4
-    timeout_s = 8.0
-    backoff_base = 0.75
-    jitter_s = 0.35
-
-    for attempt in range(1, max_tries + 1):
-        try:
-            r = _HTTP_SESSION.post(
-                "https://is.gd/create.php",
-                data={"format": "simple", "url": enc_url},
-                timeout=timeout_s,
-            )
-            txt = (r.text or "").strip()
-
-            if r.status_code == 200 and txt.startswith("http"):
-                if attempt > 1:
-                    logger.info(f"[shorten:is.gd] success after retries attempt={attempt}")
-                return txt
-
-            body_preview = txt[:160].replace("\n", " ")
-            logger.warning(
-                f"[shorten:is.gd] attempt={attempt}/{max_tries} "
-                f"status={r.status_code} body_preview='{body_preview}'"
-            )
-
-        except Exception as e:
-            logger.warning(f"[shorten:is.gd] attempt={attempt}/{max_tries} error={e}")
-
-        sleep_s = backoff_base * (2 ** (attempt - 1)) + random.uniform(0, jitter_s)
-        time.sleep(min(sleep_s, 5.0))
-
-    logger.info(
-        f"[shorten:is.gd] giving up after {max_tries} attempts "
-        f"host={hostname(long_url)} url_len={len(long_url)}"
-    )
-    return None
-
-
-def maybe_shorten(long_url: str) -> Optional[str]:
-    if not long_url or not long_url.lower().startswith("https://"):
-        logger.info(f"[shorten] skip: non-https or empty url='{long_url}'")
-        return None
-    if URL_SHORTENING == "isgd":
-        return shorten_url_isgd(long_url)
-    logger.info(f"[shorten] disabled: URL_SHORTENING='{URL_SHORTENING}'")
-    return None
+    if URL_SHORTENING_MODE == "replace":
+        # Replace in the OUTPUT JSON, keep canonical sidecar for audit (in LongURL/)
+        ra_out = obj_out.get("Related Article") or {}
+        ra_out["Related Article URL"] = short_url
+        obj_out["Related Article"] = ra_out
+        supabase_write_txt(longurl_sidecar, canonical_url)
+        if rewrite_output:
+            supabase_write_txt(outfile, json.dumps(obj_out, ensure_ascii=False, indent=2))
+
+    elif URL_SHORTENING_MODE == "sidecar":
+        # Keep canonical in JSON; write short link sidecar (in LongURL/)
+        supabase_write_txt(shorturl_sidecar, short_url)
 
 # --- Zapier callback helper (no secret) ---
 
-def _post_zapier_callback(hook_url: str, payload: Dict[str, Any], max_tries: int = 5) -> None:
+def _post_zapier_callback(hook_url: str, payload: Dict[str, Any]) -> Optional[str]:
     """
-    POST a flat JSON payload to a Zapier Catch Hook.
-    Retries with exponential backoff.
+    Queue a flat JSON payload for a Zapier Catch Hook and return at once.
+    Retries/backoff happen in the durable outbound delivery queue.
     """
     if not hook_url:
         logger.warning("[Callback] ZAPIER_STAGE2_HOOK_URL not set; skipping callback")
-        return
-
-    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
-    headers = {"Content-Type": "application/json"}
+        return None
 
-    for attempt in range(1, max_tries + 1):
-        try:
-            r = _HTTP_SESSION.post(hook_url, data=body, headers=headers, timeout=10)
-            if 200 <= r.status_code < 300:
-                logger.info(f"[Callback] Sent to Zapier (attempt {attempt}) status={r.status_code}")
-                return
-            logger.warning(f"[Callback] Non-2xx from Zapier (attempt {attempt}) status={r.status_code} body={r.text[:200]}")
-        except Exception as e:
-            logger.warning(f"[Callback] Error posting to Zapier (attempt {attempt}): {e}")
-        time.sleep(min(2 ** attempt, 30))
-    logger.error("[Callback] Failed to notify Zapier after retries")
+    try:
+        delivery_id = enqueue_webhook(hook_url, payload)
+    except Exception as e:
+        logger.error(f"[Callback] Failed to queue Zapier callback: {e}")
+        return None
+    logger.info(f"[Callback] Queued Zapier callback delivery_id={delivery_id} stage={payload.get('stage')}")
+    return delivery_id
 
 # =========================
 # OpenAI call (Responses API + web_search)
@@ -472,6 +273,9 @@ def supabase_paths(run_id: str) -> Dict[str, str]:
         "base": base,
         "manifest": f"{base}/manifest.json",
         "checkpoint": f"{base}/checkpoint.json",
+        # append-only manifest events (EXPLAINER_MANIFEST_FORMAT=events) and their compaction
+        "events_dir": f"{base}/Events",
+        "events": f"{base}/events.jsonl",
         # single sidecar folder to keep working directory clean
         "sidecar_longurl_dir": f"{base}/LongURL",
     }
@@ -485,12 +289,13 @@ def sanitise_and_validate(
     run_seen_urls: set,
     run_seen_statfp: set,
     run_seen_insfp: set,
-    policy: Dict[str, Any]
+    policy: Dict[str, Any],
+    blacklist: Optional[DomainSuffixIndex] = None
 ) -> Tuple[Dict[str, Any], List[str]]:
     """
     Returns (clean_obj, warnings). Hard failures raise to trigger retry.
       - bad/missing article URL (download or invalid)
-      - domain blacklisted (file-driven)
+      - domain blacklisted (file-driven + auto-flagged by the link store)
       - live check not HTML/200, interstitial/AMP/proxy, or not article-like
       - recency beyond policy['max_months'] (if provided)
       - duplicate URL if policy['require_unique'] is True
@@ -521,8 +326,8 @@ def sanitise_and_validate(
         raise ValueError(f"Related Article URL is a download or invalid: {url}")
 
     host = hostname(url)
-    # File-driven blacklist hard check
-    if host_is_blacklisted(host, BLACKLISTED_DOMAINS_GLOBAL):
+    # File-driven (+ auto-flagged) blacklist hard check
+    if host_is_blacklisted(host, blacklist if blacklist is not None else BLACKLIST_INDEX_GLOBAL):
         raise ValueError(f"related_article_domain_blacklisted:{host}")
 
     ok, info, final_url = is_http_html_ok(url)
@@ -598,12 +403,219 @@ def _stage1_ready_to_callback(manifest: Dict[str, Any], ckpt: Dict[str, Any], to
 
     return True
 
+# =========================
+# Manifest journal
+# =========================
+#
+# Event types (EXPLAINER_MANIFEST_FORMAT=events):
+#   run_started    {"manifest": header + items kept by a resume}
+#   item_started   {"item": item_meta}
+#   item_updated   {"item": item_meta}
+#   registry_delta {"q_id", "added": {REGISTRY_KEY: [new values]}}
+#   run_finished   {"fields": final_registry, metrics, completed_at, updated_at}
+
+def materialize_manifest(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Fold manifest events into the same document the json format writes."""
+    manifest: Dict[str, Any] = {}
+    items: Dict[str, Dict[str, Any]] = {}
+    run_registry: Dict[str, List[str]] = {}
+    for ev in events:
+        kind = ev.get("type")
+        if kind == "run_started":
+            manifest = deepcopy(ev["manifest"])
+            items = {it["q_id"]: it for it in manifest.pop("items", [])}
+            run_registry = {}
+        elif kind in ("item_started", "item_updated"):
+            item = ev["item"]
+            # a re-started item (after a resume) replaces the stale in-flight entry
+            items[item["q_id"]] = dict(item)
+        elif kind == "registry_delta":
+            for key, values in (ev.get("added") or {}).items():
+                run_registry.setdefault(key, []).extend(values)
+        elif kind == "run_finished":
+            manifest.update(ev.get("fields") or {})
+        manifest["last_event_seq"] = ev.get("seq")
+        if kind != "run_finished":
+            manifest["updated_at"] = ev.get("ts", manifest.get("updated_at"))
+
+    manifest["items"] = sorted(items.values(), key=lambda it: it.get("index", 0))
+    if run_registry and "final_registry" not in manifest:
+        manifest["run_registry"] = run_registry
+    return manifest
+
+def load_manifest(paths: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Current manifest of a run in either format: materialised from events when a log exists."""
+    try:
+        events = read_events(paths["events_dir"], compacted_path=paths["events"])
+    except Exception as e:
+        logger.info(f"[Explainer.Manifest] no event log under {paths['events_dir']}: {e}")
+        events = []
+    if events:
+        return materialize_manifest(events)
+    return _read_json(paths["manifest"])
+
+class _ManifestJournal:
+    """
+    Persists manifest changes. "json" rewrites the whole document each time
+    (cost grows with the run); "events" appends one constant-size event and
+    writes manifest.json once, when the run finishes.
+    """
+
+    def __init__(self, paths: Dict[str, str], manifest: Dict[str, Any], fmt: str = EXPLAINER_MANIFEST_FORMAT):
+        self.paths = paths
+        self.manifest = manifest
+        self.events = fmt == "events"
+        # Continue after any earlier attempt's events; its run_started resets the view
+        self.log = EventLog(paths["events_dir"], start_seq=next_event_seq(paths["events_dir"])) if self.events else None
+
+    def _write_document(self) -> None:
+        supabase_write_textjson(self.paths["manifest"], self.manifest)
+
+    def started(self) -> None:
+        if self.events:
+            self.log.append("run_started", manifest=self.manifest)
+        else:
+            self._write_document()
+
+    def item_started(self, item: Dict[str, Any]) -> None:
+        if self.events:
+            self.log.append("item_started", item=item)
+        else:
+            self._write_document()
+
+    def item_updated(self, item: Dict[str, Any]) -> None:
+        if self.events:
+            self.log.append("item_updated", item=item)
+        else:
+            self._write_document()
+
+    def registry_delta(self, q_id: str, added: Dict[str, List[str]]) -> None:
+        # The json document only carries the registry once, as final_registry
+        added = {k: v for k, v in added.items() if v}
+        if self.events and added:
+            self.log.append("registry_delta", q_id=q_id, added=added)
+
+    def finished(self) -> None:
+        if not self.events:
+            self._write_document()
+            return
+        fields = {k: self.manifest[k] for k in ("final_registry", "metrics", "completed_at", "updated_at") if k in self.manifest}
+        self.log.append("run_finished", fields=fields)
+        # Compact once: downstream readers keep using manifest.json unchanged
+        events = compact_events(self.paths["events_dir"], self.paths["events"])
+        supabase_write_textjson(self.paths["manifest"], materialize_manifest(events))
+
+# =========================
+# Resume (continue a crashed run from its checkpoint)
+# =========================
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        return read_supabase_file(path)
+    except Exception as e:
+        logger.info(f"[Explainer.Resume] cannot read {path}: {e}")
+        return None
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    text = _read_text(path)
+    try:
+        return json.loads(text) if text else None
+    except json.JSONDecodeError:
+        logger.warning(f"[Explainer.Resume] {path} is not valid JSON")
+        return None
+
+def _canonical_output(item: Dict[str, Any], obj: Dict[str, Any], paths: Dict[str, str]) -> Dict[str, Any]:
+    """
+    The stored output with its long URL restored if "replace" shortening rewrote
+    it. A pending item counts too: the background callback may have patched the
+    output and written the sidecar before the previous process died.
+    """
+    if URL_SHORTENING_MODE != "replace" or not (item.get("short_url") or item.get("short_url_pending")):
+        return obj
+    longurl = _read_text(f'{paths["sidecar_longurl_dir"]}/{item["q_id"]}_longurl.txt')
+    if not longurl:
+        return obj
+    obj = deepcopy(obj)
+    ra = obj.get("Related Article") or {}
+    ra["Related Article URL"] = longurl.strip()
+    obj["Related Article"] = ra
+    return obj
+
+def _replay_item(item: Dict[str, Any], obj: Dict[str, Any], seen: Dict[str, BudgetedBlock], history: BudgetedBlock) -> None:
+    """
+    Re-apply one completed item to the registries and prompt history exactly as
+    the live loop did: fallbacks only feed history, salvaged items skip the URL
+    and acronyms, normal items register everything.
+    """
+    status = item.get("status")
+    if status != "done_with_fallback":
+        salvaged = "related_article_unavailable_salvaged" in (item.get("warnings") or [])
+        url = ((obj.get("Related Article") or {}).get("Related Article URL") or "").strip()
+        if not salvaged and url and url != "Unavailable":
+            seen["URLS_USED"].add(url)
+        st = obj.get("Statistic") or ""
+        ins = obj.get("Insight") or ""
+        if st:
+            seen["STATS_FINGERPRINTS_USED"].add(fingerprint(st)); seen["STATS_USED"].add(st.strip())
+        if ins:
+            seen["INSIGHTS_FINGERPRINTS_USED"].add(fingerprint(ins)); seen["INSIGHTS_USED"].add(ins.strip())
+        if not salvaged:
+            for fld in ("Header", "Sub-Header", "Summary", "Bullet Points", "Statistic", "Insight"):
+                for a in ACRO_RE.findall(obj.get(fld, "") or ""):
+                    seen["ACRONYMS_SEEN"].add(a)
+    history.append(json.dumps(obj, ensure_ascii=False))
+
+def load_resume_state(
+    paths: Dict[str, str],
+    ctx: Dict[str, Any],
+    total: int
+) -> Optional[Tuple[Dict[str, Any], List[Tuple[Dict[str, Any], Dict[str, Any]]]]]:
+    """
+    Load the manifest and checkpoint of an earlier attempt at this run_id and
+    verify its outputs. Returns (manifest, [(item, output), ...]) for the
+    contiguous prefix of completed items whose output files exist, or None
+    when there is nothing usable to resume from.
+    """
+    manifest = load_manifest(paths)
+    ckpt = _read_json(paths["checkpoint"])
+    if not manifest or not ckpt:
+        return None
+
+    prior_ctx = (manifest.get("payload_meta") or {}).get("ctx")
+    if prior_ctx != ctx:
+        logger.warning("[Explainer.Resume] payload context differs from the stored run; starting fresh")
+        return None
+    if manifest.get("total") != total:
+        logger.warning(f"[Explainer.Resume] question count changed ({manifest.get('total')} -> {total}); starting fresh")
+        return None
+
+    last = int(ckpt.get("last_completed_index", -1))
+    by_index = {it.get("index"): it for it in manifest.get("items", [])}
+    completed: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    for idx in range(last + 1):
+        item = by_index.get(idx)
+        if not item or (item.get("status") or "").lower() not in ALLOWED_DONE_STATUSES:
+            logger.warning(f"[Explainer.Resume] item {idx} not recorded as done; resuming from there")
+            break
+        obj = _read_json(item["output_path"])
+        if obj is None:
+            logger.warning(f"[Explainer.Resume] output missing for {item['q_id']}; resuming from there")
+            break
+        completed.append((item, obj))
+
+    # Items past the verified prefix (in flight when the process died) are redone
+    manifest["items"] = [item for item, _ in completed]
+    for key in ("final_registry", "metrics", "completed_at"):
+        manifest.pop(key, None)
+    return manifest, completed
+
 # =========================
 # Core worker
 # =========================
 
 # Load blacklist once at module import; also expose a fresh copy per run for prompt mapping
 BLACKLISTED_DOMAINS_GLOBAL: set = load_blacklist_domains()
+BLACKLIST_INDEX_GLOBAL: DomainSuffixIndex = build_blacklist_index(BLACKLISTED_DOMAINS_GLOBAL)
 
 def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
     try:
@@ -617,23 +629,37 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
             "todays_date": payload.get("todays_date", ""),
         }
 
-        prompt_template = load_text(PROMPT_PATH)
+        prompt_template = get_template(PROMPT_PATH)
         q_templates = load_questions(QUESTIONS_PATH)
         total = len(q_templates)
         paths = supabase_paths(run_id)
 
         # Seed REGISTRY memory from payload (cross-run)
         registry = payload.get("REGISTRY", {}) or {}
-        run_seen_urls: set = set(registry.get("URLS_USED", []) or [])
-        run_seen_statfp: set = set(registry.get("STATS_FINGERPRINTS_USED", []) or [])
-        run_seen_insfp: set = set(registry.get("INSIGHTS_FINGERPRINTS_USED", []) or [])
-        run_seen_stats_exact: set = set(registry.get("STATS_USED", []) or [])
-        run_seen_ins_exact: set = set(registry.get("INSIGHTS_USED", []) or [])
-        run_seen_acros: set = set(registry.get("ACRONYMS_SEEN", []) or [])
-
-        # Fresh read for this run (in case repo updated)
+        # Registry sets double as budgeted prompt blocks (insertion-ordered, incrementally rendered)
+        run_seen_urls = BudgetedBlock(registry.get("URLS_USED", []) or [], BUDGET_URLS)
+        run_seen_statfp = BudgetedBlock(registry.get("STATS_FINGERPRINTS_USED", []) or [], BUDGET_STAT_FPS, use_similarity=False)
+        run_seen_insfp = BudgetedBlock(registry.get("INSIGHTS_FINGERPRINTS_USED", []) or [], BUDGET_INSIGHT_FPS, use_similarity=False)
+        run_seen_stats_exact = BudgetedBlock(registry.get("STATS_USED", []) or [], BUDGET_STATS)
+        run_seen_ins_exact = BudgetedBlock(registry.get("INSIGHTS_USED", []) or [], BUDGET_INSIGHTS)
+        run_seen_acros = BudgetedBlock(registry.get("ACRONYMS_SEEN", []) or [], BUDGET_ACRONYMS, use_similarity=False)
+        registry_blocks = {
+            "URLS_USED": run_seen_urls,
+            "STATS_USED": run_seen_stats_exact,
+            "INSIGHTS_USED": run_seen_ins_exact,
+            "STATS_FINGERPRINTS_USED": run_seen_statfp,
+            "INSIGHTS_FINGERPRINTS_USED": run_seen_insfp,
+            "ACRONYMS_SEEN": run_seen_acros,
+        }
+
+        # Fresh read for this run (in case repo updated), plus domains the link
+        # store auto-flagged for repeatedly failing validation in earlier runs
+        # (flags lapse after DOMAIN_FLAG_TTL, so a recovered domain is re-validated)
         blacklisted_domains = load_blacklist_domains()
+        auto_flagged_domains = set(flagged_domains()) - blacklisted_domains
+        blacklisted_domains |= auto_flagged_domains
         blacklisted_domains_sorted = sorted(blacklisted_domains)
+        blacklist_index = build_blacklist_index(blacklisted_domains)
 
         manifest = {
             "run_id": run_id,
@@ -644,6 +670,7 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
             "payload_meta": {
                 "model": DEFAULT_MODEL,
                 "temperature": TEMPERATURE,
+                "prompt_template_version": prompt_template.version,
                 "ctx": ctx,
                 "seed_registry_counts": {
                     "URLS_USED": len(run_seen_urls),
@@ -654,13 +681,53 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
                     "ACRONYMS_SEEN": len(run_seen_acros),
                 },
                 "blacklist_domains_count": len(blacklisted_domains_sorted),
+                "auto_flagged_domains_count": len(auto_flagged_domains),
             },
         }
         ckpt = {"last_completed_index": -1, "updated_at": now_iso()}
-        supabase_write_textjson(paths["manifest"], manifest)
-        supabase_write_textjson(paths["checkpoint"], ckpt)
 
-        history_for_prompt: List[str] = []
+        history_for_prompt = BudgetedBlock(
+            budget_tokens=BUDGET_HISTORY, sep="\n\n", max_entries=MAX_QA_IN_CONTEXT, unique=False
+        )
+        blacklisted_domains_block = "\n".join(blacklisted_domains_sorted)
+
+        # Short links produced by the background shortening stage, keyed by q_id
+        short_urls_by_qid: Dict[str, str] = {}
+
+        # Resume: keep the verified items of an earlier attempt and rebuild the
+        # registries/history from their stored outputs instead of regenerating them
+        resumed = load_resume_state(paths, ctx, total) if _flag(payload.get("resume")) else None
+        if resumed:
+            prior_manifest, completed = resumed
+            for item, obj in completed:
+                obj = _canonical_output(item, obj, paths)
+                _replay_item(item, obj, registry_blocks, history_for_prompt)
+
+                # The previous process died before is.gd answered; queue those again
+                if item.get("short_url_pending") and URL_SHORTENING == "isgd":
+                    long_url = ((obj.get("Related Article") or {}).get("Related Article URL") or "").strip()
+
+                    def _on_shortened(short, _q_id=item["q_id"], _url=long_url, _obj=deepcopy(obj),
+                                      _out=item["output_path"],
+                                      _long=f'{paths["sidecar_longurl_dir"]}/{item["q_id"]}_longurl.txt',
+                                      _short=f'{paths["sidecar_longurl_dir"]}/{item["q_id"]}_shorturl.txt'):
+                        _publish_short_url(short, _url, _obj, _out, _long, _short, rewrite_output=True)
+                        short_urls_by_qid[_q_id] = short
+
+                    # The crashed run's stage may have cached it already; a hit never calls back
+                    hit = request_short_url(long_url, _on_shortened, group=run_id)
+                    if hit:
+                        _on_shortened(hit)
+
+            manifest["created_at"] = prior_manifest.get("created_at", manifest["created_at"])
+            manifest["items"] = prior_manifest["items"]
+            manifest["resumed_at"] = (prior_manifest.get("resumed_at") or []) + [now_iso()]
+            ckpt["last_completed_index"] = len(completed) - 1
+            logger.info(f"♻️ [Explainer.Run] resuming run_id={run_id} at question {len(completed) + 1}/{total}")
+
+        journal = _ManifestJournal(paths, manifest)
+        journal.started()
+        supabase_write_textjson(paths["checkpoint"], ckpt)
 
         for idx, q_tmpl in enumerate(q_templates):
             if idx <= ckpt["last_completed_index"]:
@@ -668,28 +735,25 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
 
             filled_q = format_question(q_tmpl, ctx)
 
-            # Helper to newline-join lists for prompt placeholders
-            def _lines(xs):
-                return "\n".join(sorted(xs)) if xs else ""
-
-            mapping = {k: safe_escape_braces(str(v)) for k, v in ctx.items()}
-            mapping["question"] = safe_escape_braces(filled_q)
+            mapping = dict(ctx)
+            mapping["question"] = filled_q
 
             # --- Inject REGISTRY placeholders + blacklist into mapping before formatting the prompt ---
             mapping.update({
-                "urls_used_each_on_new_line": _lines(run_seen_urls),
-                "stats_used_each_on_new_line": _lines(run_seen_stats_exact),
-                "insights_used_each_on_new_line": _lines(run_seen_ins_exact),
-                "stats_fps_each_on_new_line": _lines(run_seen_statfp),
-                "insights_fps_each_on_new_line": _lines(run_seen_insfp),
-                "acronyms_each_on_new_line": _lines(run_seen_acros),
+                "urls_used_each_on_new_line": run_seen_urls.render(filled_q),
+                "stats_used_each_on_new_line": run_seen_stats_exact.render(filled_q),
+                "insights_used_each_on_new_line": run_seen_ins_exact.render(filled_q),
+                "stats_fps_each_on_new_line": run_seen_statfp.render(),
+                "insights_fps_each_on_new_line": run_seen_insfp.render(),
+                "acronyms_each_on_new_line": run_seen_acros.render(),
                 # NEW: visible to prompt from Attempt-1
-                "blacklisted_domains_each_on_new_line": _lines(blacklisted_domains_sorted),
+                "blacklisted_domains_each_on_new_line": blacklisted_domains_block,
             })
 
-            # Build prompt (REGISTRY + blacklist + prior context)
-            prior_block = build_prior_context(history_for_prompt)
-            base_prompt = prompt_template.format(**mapping) + prior_block
+            # Build prompt (REGISTRY + blacklist + prior context), each section within its budget
+            prior_block = build_prior_context(history_for_prompt, filled_q)
+            base_prompt = prompt_template.render(**mapping) + prior_block
+            prompt_tokens_est = estimate_tokens(base_prompt)
 
             q_id = f"{idx+1:02d}_{slugify(filled_q)[:50]}_{sha8(filled_q)}"
             outfile = f'{paths["base"]}/{q_id}.txt'
@@ -697,12 +761,14 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
                 "q_id": q_id,
                 "index": idx,
                 "question_filled": filled_q,
+                "prompt_tokens_est": prompt_tokens_est,
                 "status": "started",
                 "started_at": now_iso(),
                 "output_path": outfile
             }
             manifest["items"].append(item_meta)
-            supabase_write_textjson(paths["manifest"], manifest)
+            journal.item_started(item_meta)
+            registry_marks = {key: len(block) for key, block in registry_blocks.items()}
 
             # Three attempts:
             # 1) strict: ≤6m, unique URL, live HTML required
@@ -742,7 +808,8 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
                         run_seen_urls,
                         run_seen_statfp,
                         run_seen_insfp,
-                        policy
+                        policy,
+                        blacklist=blacklist_index
                     )
                     elapsed = round(time.time() - t0, 3)
 
@@ -766,36 +833,46 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
                     if canonical_url and canonical_url != "Unavailable":
                         run_seen_urls.add(canonical_url)
 
-                    # Optional: shorten for output
-                    short_url = None
-                    if canonical_url and canonical_url != "Unavailable":
-                        # visibility log (nice-to-have)
-                        logger.info(
-                            f"[shorten] mode={URL_SHORTENING} replace_mode={URL_SHORTENING_MODE} "
-                            f"url_host={hostname(canonical_url)} url_len={len(canonical_url)}"
-                        )
-                        short_url = maybe_shorten(canonical_url)
-
                     # Sidecar paths (kept outside working folder)
                     longurl_sidecar = f'{paths["sidecar_longurl_dir"]}/{q_id}_longurl.txt'
                     shorturl_sidecar = f'{paths["sidecar_longurl_dir"]}/{q_id}_shorturl.txt'
 
-                    if short_url and URL_SHORTENING_MODE == "replace":
-                        # Replace in the OUTPUT JSON, keep canonical sidecar for audit (in LongURL/)
-                        ra_out = obj_out.get("Related Article") or {}
-                        ra_out["Related Article URL"] = short_url
-                        obj_out["Related Article"] = ra_out
-                        supabase_write_txt(longurl_sidecar, canonical_url)
-                        item_meta["short_url"] = short_url
-
-                    elif short_url and URL_SHORTENING_MODE == "sidecar":
-                        # Keep canonical in JSON; write short link sidecar (in LongURL/)
-                        supabase_write_txt(shorturl_sidecar, short_url)
-                        item_meta["short_url"] = short_url
+                    # Optional: shorten for output. Never waits on the shortener: a cached
+                    # short link is applied now, otherwise the background stage patches
+                    # the output/sidecar once is.gd answers.
+                    shorten = bool(canonical_url and canonical_url != "Unavailable" and URL_SHORTENING == "isgd")
+                    if shorten:
+                        logger.info(
+                            f"[shorten] mode={URL_SHORTENING} replace_mode={URL_SHORTENING_MODE} "
+                            f"url_host={hostname(canonical_url)} url_len={len(canonical_url)}"
+                        )
+                        short_url = cached_short_url(canonical_url)
+                        if short_url:
+                            _publish_short_url(short_url, canonical_url, obj_out, outfile,
+                                               longurl_sidecar, shorturl_sidecar, rewrite_output=False)
+                            item_meta["short_url"] = short_url
+                            shorten = False
+                        else:
+                            item_meta["short_url_pending"] = True
+                    elif canonical_url and canonical_url != "Unavailable":
+                        logger.info(f"[shorten] disabled: URL_SHORTENING='{URL_SHORTENING}'")
 
                     # Write the final (possibly shortened) output JSON to working folder
                     supabase_write_txt(outfile, json.dumps(obj_out, ensure_ascii=False, indent=2))
-                    supabase_write_textjson(paths["manifest"], manifest)
+                    journal.item_updated(item_meta)
+
+                    # Queue the shortening only after the long-URL output exists, so the
+                    # background patch can never be overwritten by it
+                    if shorten:
+                        def _on_shortened(short, _q_id=q_id, _url=canonical_url, _obj=deepcopy(obj_out),
+                                          _out=outfile, _long=longurl_sidecar, _short=shorturl_sidecar):
+                            _publish_short_url(short, _url, _obj, _out, _long, _short, rewrite_output=True)
+                            short_urls_by_qid[_q_id] = short
+
+                        # Another run may have cached it since the check above; a hit never calls back
+                        hit = request_short_url(canonical_url, _on_shortened, group=run_id)
+                        if hit:
+                            _on_shortened(hit)
 
                     # Advance checkpoint
                     ckpt.update({"last_completed_index": idx, "updated_at": now_iso()})
@@ -883,7 +960,7 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
                             "warnings": ["related_article_unavailable_salvaged"],
                             "error": hard_error
                         })
-                        supabase_write_textjson(paths["manifest"], manifest)
+                        journal.item_updated(item_meta)
 
                         ckpt.update({"last_completed_index": idx, "updated_at": now_iso()})
                         supabase_write_textjson(paths["checkpoint"], ckpt)
@@ -914,7 +991,7 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
                     "warnings": ["fallback_not_applicable"],
                     "error": hard_error
                 })
-                supabase_write_textjson(paths["manifest"], manifest)
+                journal.item_updated(item_meta)
 
                 ckpt.update({"last_completed_index": idx, "updated_at": now_iso()})
                 supabase_write_textjson(paths["checkpoint"], ckpt)
@@ -922,10 +999,25 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
                 # keep history minimal for fallback (do not add to run_seen to avoid poisoning uniqueness)
                 history_for_prompt.append(json.dumps(fb, ensure_ascii=False))
 
+            journal.registry_delta(q_id, {
+                key: block.entries_since(registry_marks[key]) for key, block in registry_blocks.items()
+            })
+
         # =========================
         # Finalise + readiness check + callback
         # =========================
 
+        # Let queued URL shortenings land before the outputs are declared final
+        if URL_SHORTENING == "isgd":
+            if not flush_short_urls(group=run_id, timeout=SHORTENER_FLUSH_TIMEOUT):
+                logger.warning(f"[shorten] flush timed out after {SHORTENER_FLUSH_TIMEOUT}s; some outputs keep long URLs")
+            for it in manifest["items"]:
+                if it.pop("short_url_pending", None):
+                    if it["q_id"] in short_urls_by_qid:
+                        it["short_url"] = short_urls_by_qid[it["q_id"]]
+                    if journal.events:
+                        journal.item_updated(it)
+
         # Finalise manifest and compute simple metrics
         manifest["final_registry"] = {
             "URLS_USED": sorted(run_seen_urls),
@@ -950,8 +1042,8 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
         manifest["completed_at"] = now_iso()
         manifest["updated_at"] = manifest["completed_at"]
 
-        # Persist manifest
-        supabase_write_textjson(paths["manifest"], manifest)
+        # Persist manifest (events format: log run_finished and compact into manifest.json)
+        journal.finished()
 
         # Positive, explicit readiness check
         ready = _stage1_ready_to_callback(manifest, ckpt, total)
@@ -1007,6 +1099,9 @@ def _process_run(run_id: str, payload: Dict[str, Any]) -> None:
 # =========================
 
 def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
+    if _flag(data.get("resume")) and not data.get("run_id"):
+        return {"status": "error", "message": "resume requires the run_id of the run to continue"}
+
     run_id = data.get("run_id") or f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
     data["run_id"] = run_id
 
@@ -1019,6 +1114,7 @@ def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
         "ethnicity": data.get("ethnicity"),
         "region": data.get("region"),
         "todays_date": data.get("todays_date"),
+        "resume": _flag(data.get("resume")),
         "model": DEFAULT_MODEL,
     }, ensure_ascii=False))
 
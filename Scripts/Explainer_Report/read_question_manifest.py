@@ -0,0 +1,41 @@
+# Scripts/Explainer_Report/read_question_manifest.py
+
+from typing import Any, Dict
+
+from logger import logger
+from Engine.Files.event_log import read_events
+from Scripts.Explainer_Report.question_assets import load_manifest, supabase_paths
+
+def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Current manifest of a question_assets run, in either manifest format.
+    With "since" (the last_event_seq a caller already has), returns only the
+    newer events so progress can be tailed without re-reading the run.
+    """
+    run_id = data.get("run_id")
+    if not run_id:
+        return {"status": "error", "message": "Missing run_id"}
+
+    paths = supabase_paths(run_id)
+    try:
+        if data.get("since") is not None:
+            events = read_events(paths["events_dir"], since=int(data["since"]), compacted_path=paths["events"])
+            return {
+                "status": "success",
+                "run_id": run_id,
+                "events": events,
+                "last_event_seq": events[-1]["seq"] if events else int(data["since"]),
+            }
+
+        manifest = load_manifest(paths)
+        if manifest is None:
+            return {"status": "error", "run_id": run_id, "message": "Manifest not yet available. Try again later."}
+        return {
+            "status": "success",
+            "run_id": run_id,
+            "manifest": manifest,
+            "last_event_seq": manifest.get("last_event_seq"),
+        }
+    except Exception as e:
+        logger.exception(f"❌ Error reading question manifest for run_id={run_id}")
+        return {"status": "error", "run_id": run_id, "message": str(e)}
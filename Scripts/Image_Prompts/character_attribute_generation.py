@@ -10,6 +10,7 @@ import requests
 from openai import OpenAI
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Prompts.template_registry import get_template
 
 # =============================================================================
 # Config
@@ -39,13 +40,9 @@ BASE_BACKOFF = 1.0  # seconds
 # Helpers
 # =============================================================================
 
-def load_text(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
-
-def safe_escape_braces(value: str) -> str:
-    """Prevent .format collisions inside prompt templates."""
-    return str(value or "").replace("{", "{{").replace("}", "}}")
+def as_text(value: Any) -> str:
+    """Template values are inserted verbatim by the registry; only normalise empties."""
+    return str(value or "")
 
 def clean_ai_output_to_json_text(ai_text: str) -> str:
     """
@@ -123,19 +120,19 @@ def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
 
     # ---- Load prompt template
     try:
-        prompt_template = load_text(PROMPT_PATH)
+        prompt_template = get_template(PROMPT_PATH)
     except FileNotFoundError:
         logger.error(f"❌ Prompt file not found at {PROMPT_PATH}")
         raise
 
     # ---- Inject variables
-    prompt = prompt_template.format(
-        condition=safe_escape_braces(condition),
-        age=safe_escape_braces(age),
-        gender=safe_escape_braces(gender),
-        ethnicity=safe_escape_braces(ethnicity),
-        region=safe_escape_braces(region),
-        run_id=safe_escape_braces(run_id),
+    prompt = prompt_template.render(
+        condition=as_text(condition),
+        age=as_text(age),
+        gender=as_text(gender),
+        ethnicity=as_text(ethnicity),
+        region=as_text(region),
+        run_id=as_text(run_id),
     )
 
     # ---- Call OpenAI
@@ -12,6 +12,7 @@ from logger import logger
 from Engine.Files.auth import get_supabase_headers
 from Engine.Files.read_supabase_file import read_supabase_file
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Prompts.template_registry import get_template, CompiledTemplate
 
 # =============================================================================
 # Config
@@ -46,13 +47,9 @@ SEMANTIC_RETRY_SLEEP = 0.4  # seconds
 # Helpers
 # =============================================================================
 
-def safe_escape_braces(value: str) -> str:
-    """Protect accidental braces in injected strings before str.format()."""
-    return str(value if value is not None else "").replace("{", "{{").replace("}", "}}")
-
-def load_text(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+def as_text(value: Any) -> str:
+    """Template values are inserted verbatim by the registry; only normalise None."""
+    return str(value if value is not None else "")
 
 def list_supabase_folder(prefix: str) -> List[Dict[str, Any]]:
     """
@@ -148,7 +145,7 @@ def call_openai(prompt: str, model: str = DEFAULT_MODEL, temperature: float = TE
 # Core worker
 # =============================================================================
 
-def _process_run(run_id: str, ctx: Dict[str, Any], prompt_template: str) -> None:
+def _process_run(run_id: str, ctx: Dict[str, Any], prompt_template: CompiledTemplate) -> None:
     """
     Heavy worker: read the single Report_Assets file, plus character_attributes,
     build one prompt, call OpenAI once (with semantic JSON validation & retries),
@@ -211,19 +208,19 @@ def _process_run(run_id: str, ctx: Dict[str, Any], prompt_template: str) -> None
 
         # ---- Build prompt mapping
         mapping = {
-            "character_attributes": safe_escape_braces(character_attributes_text),
-            "report_assets": safe_escape_braces(report_assets_text),
-            "condition": safe_escape_braces(ctx.get("condition", "")),
-            "age": safe_escape_braces(ctx.get("age", "")),
-            "gender": safe_escape_braces(ctx.get("gender", "")),
-            "ethnicity": safe_escape_braces(ctx.get("ethnicity", "")),
-            "region": safe_escape_braces(ctx.get("region", "")),
-            "todays_date": safe_escape_braces(ctx.get("todays_date", "")),
-            "run_id": safe_escape_braces(ctx.get("run_id", "")),
+            "character_attributes": as_text(character_attributes_text),
+            "report_assets": as_text(report_assets_text),
+            "condition": as_text(ctx.get("condition", "")),
+            "age": as_text(ctx.get("age", "")),
+            "gender": as_text(ctx.get("gender", "")),
+            "ethnicity": as_text(ctx.get("ethnicity", "")),
+            "region": as_text(ctx.get("region", "")),
+            "todays_date": as_text(ctx.get("todays_date", "")),
+            "run_id": as_text(ctx.get("run_id", "")),
         }
 
         try:
-            base_prompt = prompt_template.format(**mapping)
+            base_prompt = prompt_template.render(**mapping)
             logger.info(f"🧠 Built prompt (len={len(base_prompt)})")
         except Exception as e:
             logger.exception(f"❌ Error formatting prompt: {e}")
@@ -326,8 +323,11 @@ def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
     }, ensure_ascii=False))
 
     # ---- Load prompt template once
-    prompt_template = load_text(PROMPT_PATH)
-    logger.info(f"📝 Loaded prompt template from {PROMPT_PATH} (len={len(prompt_template)})")
+    prompt_template = get_template(PROMPT_PATH)
+    logger.info(
+        f"📝 Loaded prompt template from {PROMPT_PATH} "
+        f"(len={len(prompt_template.text)}, version={prompt_template.version})"
+    )
 
     # ---- Spawn background worker and RETURN IMMEDIATELY
     import threading
@@ -12,6 +12,7 @@ from logger import logger
 from Engine.Files.auth import get_supabase_headers
 from Engine.Files.read_supabase_file import read_supabase_file
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Prompts.template_registry import get_template, CompiledTemplate
 
 # =============================================================================
 # Config
@@ -46,9 +47,9 @@ BASE_BACKOFF = 1.0  # seconds
 # Loosened regex to capture leading question number with _, -, or space after it.
 _QFILE_RE = re.compile(r"^\s*(\d+)[_\-\s]")
 
-def safe_escape_braces(value: str) -> str:
-    """Protect accidental braces in injected strings before str.format()."""
-    return str(value if value is not None else "").replace("{", "{{").replace("}", "}}")
+def as_text(value: Any) -> str:
+    """Template values are inserted verbatim by the registry; only normalise None."""
+    return str(value if value is not None else "")
 
 def load_text(path: str) -> str:
     with open(path, "r", encoding="utf-8") as f:
@@ -230,7 +231,7 @@ def output_exists(run_id: str, qnum: int) -> bool:
 def _process_run(
     run_id: str,
     ctx: Dict[str, Any],
-    prompt_template: str,
+    prompt_template: CompiledTemplate,
     character_attributes_text: str,
     questions_prefix: str,
     targets: List[Tuple[int, str]],
@@ -259,19 +260,19 @@ def _process_run(
 
             # ---- Build prompt mapping
             mapping = {
-                "character_attributes": safe_escape_braces(character_attributes_text),
-                "question_assets": safe_escape_braces(question_text),
-                "condition": safe_escape_braces(ctx.get("condition", "")),
-                "age": safe_escape_braces(ctx.get("age", "")),
-                "gender": safe_escape_braces(ctx.get("gender", "")),
-                "ethnicity": safe_escape_braces(ctx.get("ethnicity", "")),
-                "region": safe_escape_braces(ctx.get("region", "")),
-                "todays_date": safe_escape_braces(ctx.get("todays_date", "")),
-                "run_id": safe_escape_braces(ctx.get("run_id", "")),
+                "character_attributes": as_text(character_attributes_text),
+                "question_assets": as_text(question_text),
+                "condition": as_text(ctx.get("condition", "")),
+                "age": as_text(ctx.get("age", "")),
+                "gender": as_text(ctx.get("gender", "")),
+                "ethnicity": as_text(ctx.get("ethnicity", "")),
+                "region": as_text(ctx.get("region", "")),
+                "todays_date": as_text(ctx.get("todays_date", "")),
+                "run_id": as_text(ctx.get("run_id", "")),
             }
 
             try:
-                prompt = prompt_template.format(**mapping)
+                prompt = prompt_template.render(**mapping)
                 logger.info(f"🧠 Built prompt for Q{qnum} (len={len(prompt)})")
             except Exception as e:
                 logger.exception(f"❌ Error formatting prompt for Q{qnum}: {e}")
@@ -428,8 +429,11 @@ def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
         logger.warning("⚠️ No questions selected (either none present or outputs already exist)")
 
     # ---- Load prompt template once
-    prompt_template = load_text(PROMPT_PATH)
-    logger.info(f"📝 Loaded prompt template from {PROMPT_PATH} (len={len(prompt_template)})")
+    prompt_template = get_template(PROMPT_PATH)
+    logger.info(
+        f"📝 Loaded prompt template from {PROMPT_PATH} "
+        f"(len={len(prompt_template.text)}, version={prompt_template.version})"
+    )
 
     # ---- Spawn background worker and RETURN IMMEDIATELY
     import threading
@@ -3,51 +3,58 @@ import json
 from openai import OpenAI
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
-
-def safe_escape(value):
-    return str(value).replace("{", "{{").replace("}", "}}")
+from Engine.Runtime.artifacts import publish_artifact
+from Engine.Prompts.template_registry import get_template
+from Engine.Runtime.stage_cache import cached_stage_output, stage_cache_key, store_stage_output
 
 def run_prompt(data):
     try:
         run_id = data.get("run_id") or str(uuid.uuid4())
         data["run_id"] = run_id  # ensure it's injected if missing
 
-        # Extract and escape all inputs
-        client = safe_escape(data["client"])
-        client_context = safe_escape(data["client_context"])
-        prompt_3_report_assets = safe_escape(data["prompt_3_report_assets"])
+        # Extract inputs (values are inserted verbatim by the template registry)
+        client = data["client"]
+        client_context = data["client_context"]
+        prompt_3_report_assets = data["prompt_3_report_assets"]
 
-        # Load and populate prompt template
-        with open("Prompts/Image_Prompts/report_image_prompts.txt", "r", encoding="utf-8") as f:
-            template = f.read()
+        # Load and populate prompt template (compiled once, reloaded on change)
+        template = get_template("Prompts/Image_Prompts/report_image_prompts.txt")
 
-        prompt = template.format(
+        prompt = template.render(
             client=client,
             client_context=client_context,
             prompt_3_report_assets=prompt_3_report_assets
         )
 
-        # Send prompt to OpenAI
-        client_openai = OpenAI()
-        response = client_openai.chat.completions.create(
-            model="gpt-4",
-            temperature=0.2,
-            messages=[{"role": "user", "content": prompt}]
+        # Skip the LLM call when nothing feeding this stage changed (STAGE_CACHE / use_cache)
+        cache_key = stage_cache_key(
+            "write_report_image_prompts", template.version, {"prompt": prompt}, {"model": "gpt-4", "temperature": 0.2}
         )
+        formatted = cached_stage_output("write_report_image_prompts", cache_key, data)
+        if formatted is None:
+            # Send prompt to OpenAI
+            client_openai = OpenAI()
+            response = client_openai.chat.completions.create(
+                model="gpt-4",
+                temperature=0.2,
+                messages=[{"role": "user", "content": prompt}]
+            )
 
-        raw_result = response.choices[0].message.content.strip()
+            raw_result = response.choices[0].message.content.strip()
 
-        # Try parsing the response into JSON if possible
-        try:
-            parsed = json.loads(raw_result)
-            formatted = json.dumps(parsed, indent=2)
-        except json.JSONDecodeError:
-            logger.warning("AI response is not valid JSON. Writing raw output.")
-            formatted = raw_result
+            # Try parsing the response into JSON if possible
+            try:
+                parsed = json.loads(raw_result)
+                formatted = json.dumps(parsed, indent=2)
+                store_stage_output("write_report_image_prompts", cache_key, formatted, data)
+            except json.JSONDecodeError:
+                logger.warning("AI response is not valid JSON. Writing raw output.")
+                formatted = raw_result
 
         # Write AI response to Supabase
         supabase_path = f"Predictive_Report/Ai_Responses/Report_Image_Prompts/{run_id}.txt"
         write_supabase_file(supabase_path, formatted)
+        publish_artifact(supabase_path, formatted, final=True)
         logger.info(f"✅ AI response written to Supabase: {supabase_path}")
 
         return {"status": "processing", "run_id": run_id}
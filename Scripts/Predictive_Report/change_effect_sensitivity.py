@@ -0,0 +1,243 @@
+import os
+import json
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from logger import logger
+from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Runtime.artifacts import publish_artifact
+from Scripts.Predictive_Report.write_change_effect_maths import (
+    build_structured_output,
+    format_decimal_percent,
+    parse_prompt_1,
+    quantize_1dp,
+    report_change,
+    wait_for_prompt_1_sections,
+)
+
+# =========================
+# Config (payload keys of the same name, lower-cased, override)
+# =========================
+
+SENSITIVITY_SAMPLES = int(os.getenv("SENSITIVITY_SAMPLES", "10000"))
+SENSITIVITY_MAX_SAMPLES = int(os.getenv("SENSITIVITY_MAX_SAMPLES", "100000"))
+SENSITIVITY_MAKEUP_SD = float(os.getenv("SENSITIVITY_MAKEUP_SD", "5.0"))          # absolute, percentage points
+SENSITIVITY_CHANGE_SD = float(os.getenv("SENSITIVITY_CHANGE_SD", "0.25"))         # relative to |change|
+SENSITIVITY_CHANGE_SD_MIN = float(os.getenv("SENSITIVITY_CHANGE_SD_MIN", "1.0"))  # floor, percentage points
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# =========================
+# Inputs
+# =========================
+
+def _percent(value: Any, default: str) -> float:
+    return float(str(value if value is not None else default).strip().replace('%', '') or 0)
+
+def extract_inputs(prompt_1_thinking: dict) -> Dict[str, Any]:
+    """
+    Point values as build_structured_output reads them: makeups to 1dp, changes
+    forced to integers. Sub-sections are flattened into arrays with the index
+    of their section, so every sample is computed in one batch.
+    """
+    section_keys: List[str] = []
+    section_titles: List[str] = []
+    section_makeup: List[float] = []
+    sub_section_idx: List[int] = []
+    sub_makeup: List[float] = []
+    sub_change: List[float] = []
+
+    for section_key in sorted(prompt_1_thinking.keys()):
+        if not section_key.lower().startswith("section "):
+            continue
+        section_data = prompt_1_thinking[section_key]
+        try:
+            makeup = float(quantize_1dp(_percent(section_data.get("Section MakeUp"), "0%")))
+        except Exception:
+            makeup = 0.0
+        k = len(section_keys)
+        section_keys.append(section_key)
+        section_titles.append(str(section_data.get("Section Title", "")).strip())
+        section_makeup.append(makeup)
+
+        for sub_key in sorted(section_data.keys()):
+            sub_data = section_data[sub_key]
+            if (
+                isinstance(sub_data, dict)
+                and sub_key.lower().startswith("sub-section ")
+                and "Sub-Section Title" in sub_data
+            ):
+                try:
+                    mk = float(quantize_1dp(_percent(sub_data.get("Sub-Section MakeUp"), "0%")))
+                    ch = float(int(round(_percent(sub_data.get("Sub-Section Change"), "0%"))))
+                except Exception:
+                    mk, ch = 0.0, 0.0
+                sub_section_idx.append(k)
+                sub_makeup.append(mk)
+                sub_change.append(ch)
+
+    if not section_keys:
+        raise ValueError("No 'Section N' entries found in prompt_1_thinking")
+
+    return {
+        "section_keys": section_keys,
+        "section_titles": section_titles,
+        "section_makeup": np.array(section_makeup, dtype=np.float64),
+        "sub_section_idx": np.array(sub_section_idx, dtype=np.intp),
+        "sub_makeup": np.array(sub_makeup, dtype=np.float64),
+        "sub_change": np.array(sub_change, dtype=np.float64),
+    }
+
+# =========================
+# Simulation
+# =========================
+
+def _sample_makeups(rng, centre: np.ndarray, sd: float, n: int, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Normal samples around `centre`, clipped at 0 and rescaled so each group's
+    makeups keep their stated total (a composition stays a composition).
+    """
+    samples = np.clip(rng.normal(centre, sd, size=(n, centre.size)), 0.0, None)
+    target = np.bincount(groups, weights=centre, minlength=n_groups)
+    indicator = np.zeros((centre.size, n_groups))
+    indicator[np.arange(centre.size), groups] = 1.0
+    totals = samples @ indicator
+    scale = np.divide(target, totals, out=np.ones_like(totals), where=totals > 0)
+    return samples * scale[:, groups]
+
+def simulate(
+    inputs: Dict[str, Any],
+    samples: int,
+    makeup_sd: float,
+    change_sd: float,
+    change_sd_min: float,
+    seed=None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (section_effects[samples, sections], report_change[samples]) using
+    the same formulas as build_structured_output, without intermediate rounding.
+    """
+    rng = np.random.default_rng(seed)
+    n_sections = len(inputs["section_keys"])
+    idx = inputs["sub_section_idx"]
+    sub_change0 = inputs["sub_change"]
+
+    if idx.size:
+        sub_mk = _sample_makeups(rng, inputs["sub_makeup"], makeup_sd, samples, idx, n_sections)
+        sd = np.maximum(np.abs(sub_change0) * change_sd, change_sd_min)
+        sub_ch = rng.normal(sub_change0, sd, size=(samples, sub_change0.size))
+        sub_effect = sub_mk * sub_ch / 100.0
+        indicator = np.zeros((idx.size, n_sections))
+        indicator[np.arange(idx.size), idx] = 1.0
+        section_change = sub_effect @ indicator
+    else:
+        section_change = np.zeros((samples, n_sections))
+
+    section_mk = _sample_makeups(
+        rng, inputs["section_makeup"], makeup_sd, samples,
+        np.zeros(n_sections, dtype=np.intp), 1,
+    )
+    section_effect = section_mk * section_change / 100.0
+    return section_effect, section_effect.sum(axis=1)
+
+def variance_shares(section_effect: np.ndarray, report: np.ndarray) -> np.ndarray:
+    """
+    Share of Var(Report Change) attributable to each section:
+    Cov(section_effect_k, report) / Var(report). The shares sum to 1.
+    """
+    centred = report - report.mean()
+    var = float(centred @ centred) / report.size
+    if var <= 0.0:
+        return np.zeros(section_effect.shape[1])
+    cov = (section_effect - section_effect.mean(axis=0)).T @ centred / report.size
+    return cov / var
+
+# =========================
+# Output
+# =========================
+
+def _fmt(value) -> str:
+    return format_decimal_percent(Decimal(float(value)))
+
+def _bands(values: np.ndarray, percentiles) -> Dict[str, str]:
+    return {f"P{p:g}": _fmt(v) for p, v in zip(percentiles, np.percentile(values, percentiles))}
+
+def build_sensitivity(prompt_data: dict, options: Dict[str, Any]) -> Dict[str, Any]:
+    samples = max(100, min(int(options.get("samples") or SENSITIVITY_SAMPLES), SENSITIVITY_MAX_SAMPLES))
+    makeup_sd = float(options.get("makeup_sd", SENSITIVITY_MAKEUP_SD))
+    change_sd = float(options.get("change_sd", SENSITIVITY_CHANGE_SD))
+    change_sd_min = float(options.get("change_sd_min", SENSITIVITY_CHANGE_SD_MIN))
+    percentiles = [float(p) for p in (options.get("percentiles") or DEFAULT_PERCENTILES)]
+    seed = options.get("seed")
+
+    inputs = extract_inputs(prompt_data)
+    section_effect, report = simulate(
+        inputs, samples, makeup_sd, change_sd, change_sd_min,
+        seed=int(seed) if seed is not None else None,
+    )
+    shares = variance_shares(section_effect, report)
+
+    sections = {}
+    for k, section_key in enumerate(inputs["section_keys"]):
+        sections[section_key] = {
+            "Section Title": inputs["section_titles"][k],
+            "Section Effect Bands": _bands(section_effect[:, k], percentiles),
+            "Variance Share": _fmt(shares[k] * 100.0),
+        }
+
+    drivers = [
+        {
+            "Section": inputs["section_keys"][k],
+            "Section Title": inputs["section_titles"][k],
+            "Variance Share": _fmt(shares[k] * 100.0),
+        }
+        for k in np.argsort(-shares)
+    ]
+
+    return {
+        "Report Change": format_decimal_percent(report_change(build_structured_output(prompt_data))),
+        "Report Change Mean": _fmt(report.mean()),
+        "Report Change Std": _fmt(report.std()),
+        "Report Change Bands": _bands(report, percentiles),
+        "Variance Drivers": drivers,
+        "Sections": sections,
+        "Simulation": {
+            "samples": samples,
+            "makeup_sd": makeup_sd,
+            "change_sd": change_sd,
+            "change_sd_min": change_sd_min,
+            "seed": seed,
+        },
+    }
+
+# =========================
+# Entrypoint
+# =========================
+
+def run_prompt(data: Dict[str, Any]) -> Dict[str, Any]:
+    run_id = data.get("run_id") or str(uuid.uuid4())
+    supabase_path = f"Predictive_Report/Ai_Responses/Change_Effect_Sensitivity/{run_id}.txt"
+
+    try:
+        if not data.get("prompt_1_thinking") and data.get("prompt_1_run_id"):
+            prompt_data = wait_for_prompt_1_sections(data["prompt_1_run_id"], data.get("number_sections"))
+        else:
+            prompt_data = parse_prompt_1(data.get("prompt_1_thinking", ""))
+
+        result = build_sensitivity(prompt_data, data)
+        logger.info(
+            f"📊 Sensitivity for {run_id}: {result['Simulation']['samples']} samples, "
+            f"bands {result['Report Change Bands']}"
+        )
+
+        output = json.dumps(result, indent=2)
+        write_supabase_file(supabase_path, output)
+        publish_artifact(supabase_path, output, final=True)
+
+        return {"status": "success", "run_id": run_id, **result}
+
+    except Exception as e:
+        logger.exception("❌ Error in change_effect_sensitivity")
+        return {"status": "error", "run_id": run_id, "message": str(e)}
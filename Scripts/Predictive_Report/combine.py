@@ -4,6 +4,9 @@ from collections import defaultdict
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
 from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Runtime.cpu_pool import run_cpu_transform
+from Engine.Runtime.artifacts import publish_artifact
+from Engine.Runtime.artifact_refs import resolve_artifact_refs
 
 def clean_text_block(text: str) -> str:
     text = text.replace('\r\n', '\n').replace('\r', '\n')
@@ -177,27 +180,40 @@ def build_output(kv_pairs: dict, structure: dict, section_tables: dict) -> str:
 
     return '\n'.join(output)
 
+def combine_blocks(prompt_1_thinking: str, prompt_2_section_assets: str,
+                   prompt_3_report_assets: str, prompt_4_tables: str) -> str:
+    """Pure text transform (registered with the CPU pool)."""
+    flat_blocks = {
+        "prompt_1_thinking": clean_text_block(prompt_1_thinking),
+        "prompt_2_section_assets": clean_text_block(prompt_2_section_assets),
+        "prompt_3_report_assets": clean_text_block(prompt_3_report_assets),
+        "prompt_4_tables": clean_text_block(prompt_4_tables)
+    }
+
+    kv_pairs = extract_key_value_pairs_by_block(flat_blocks)
+    structure = parse_hierarchical_blocks(flat_blocks)
+    section_tables = parse_section_tables(flat_blocks)
+
+    formatted_output = build_output(kv_pairs, structure, section_tables)
+    return formatted_output.replace('\\n', '\n')
+
 def run_prompt(data: dict) -> dict:
     try:
         run_id = data.get("run_id") or str(uuid.uuid4())
         data["run_id"] = run_id
+        resolve_artifact_refs(data, ("prompt_1_thinking", "prompt_2_section_assets", "prompt_3_report_assets", "prompt_4_tables"))
 
-        flat_blocks = {
-            "prompt_1_thinking": clean_text_block(data.get("prompt_1_thinking", "")),
-            "prompt_2_section_assets": clean_text_block(data.get("prompt_2_section_assets", "")),
-            "prompt_3_report_assets": clean_text_block(data.get("prompt_3_report_assets", "")),
-            "prompt_4_tables": clean_text_block(data.get("prompt_4_tables", ""))
-        }
-
-        kv_pairs = extract_key_value_pairs_by_block(flat_blocks)
-        structure = parse_hierarchical_blocks(flat_blocks)
-        section_tables = parse_section_tables(flat_blocks)
-
-        formatted_output = build_output(kv_pairs, structure, section_tables)
-        final_output = formatted_output.replace('\\n', '\n')
+        final_output = run_cpu_transform(
+            "combine",
+            prompt_1_thinking=data.get("prompt_1_thinking", ""),
+            prompt_2_section_assets=data.get("prompt_2_section_assets", ""),
+            prompt_3_report_assets=data.get("prompt_3_report_assets", ""),
+            prompt_4_tables=data.get("prompt_4_tables", "")
+        )
 
         supabase_path = f"Predictive_Report/Ai_Responses/Combine/{run_id}.txt"
         write_supabase_file(supabase_path, final_output)
+        publish_artifact(supabase_path, final_output, final=True)
         logger.info(f"✅ Structured section output written to: {supabase_path}")
 
         try:
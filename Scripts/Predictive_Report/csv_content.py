@@ -4,6 +4,8 @@ import uuid
 import re
 from Engine.Files.write_supabase_file import write_supabase_file
 from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Runtime.cpu_pool import run_cpu_transform
+from Engine.Runtime.artifact_refs import resolve_artifact_refs
 from logger import logger
 
 # ──────────── Intro / Outro Keys ────────────
@@ -126,13 +128,9 @@ def parse_sections_and_subsections(text: str):
 
     return rows
 
-# ──────────── Run Prompt ────────────
-def run_prompt(payload):
-    logger.info("📦 Running csv_content.py (combined mode)")
-
-    run_id = payload.get("run_id") or str(uuid.uuid4())
-    file_path = f"Predictive_Report/Ai_Responses/csv_Content/{run_id}.csv"
-    raw_text = strip_excluded_blocks(payload.get("format_combine", ""))
+# ──────────── CSV Build (registered with the CPU pool) ────────────
+def build_csv_text(format_combine: str) -> str:
+    raw_text = strip_excluded_blocks(format_combine)
 
     intro_outro = extract_intro_outro_assets(raw_text)
     section_rows = parse_sections_and_subsections(raw_text)
@@ -159,7 +157,18 @@ def run_prompt(payload):
     writer.writeheader()
     writer.writerows(merged_rows)
 
-    csv_bytes = output.getvalue().encode("utf-8")
+    return output.getvalue()
+
+# ──────────── Run Prompt ────────────
+def run_prompt(payload):
+    logger.info("📦 Running csv_content.py (combined mode)")
+
+    run_id = payload.get("run_id") or str(uuid.uuid4())
+    file_path = f"Predictive_Report/Ai_Responses/csv_Content/{run_id}.csv"
+    resolve_artifact_refs(payload, ("format_combine",))
+
+    csv_text = run_cpu_transform("csv_content", format_combine=payload.get("format_combine", ""))
+    csv_bytes = csv_text.encode("utf-8")
     write_supabase_file(path=file_path, content=csv_bytes, content_type="text/csv")
     csv_text = read_supabase_file(path=file_path, binary=False)
 
@@ -3,6 +3,9 @@ import re
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
 from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Runtime.cpu_pool import run_cpu_transform
+from Engine.Runtime.artifacts import publish_artifact
+from Engine.Runtime.artifact_refs import resolve_artifact_refs
 
 # Load American to British dictionary
 def load_american_to_british_dict(filepath):
@@ -86,6 +89,12 @@ asset_formatters = {
     "Recommendations": format_bullet_points,
 }
 
+# Compiled once per process: the alternation covers the whole dictionary
+_AE_BE_RE = re.compile(
+    r'\b(' + '|'.join(re.escape(word) for word in american_to_british.keys()) + r')\b',
+    flags=re.IGNORECASE
+)
+
 # Convert to British English
 def convert_to_british_english(text):
     def replace_match(match):
@@ -101,8 +110,7 @@ def convert_to_british_english(text):
                 return british
         return us_word
 
-    pattern = r'\b(' + '|'.join(re.escape(word) for word in american_to_british.keys()) + r')\b'
-    return re.sub(pattern, replace_match, text, flags=re.IGNORECASE)
+    return _AE_BE_RE.sub(replace_match, text)
 
 # Reformat assets with spacing preserved before each new block except Report Table/Section Tables
 
@@ -237,46 +245,33 @@ def reformat_assets(text):
 
     return '\n'.join(formatted_lines)
 
-# Format full report
-def run_prompt(data):
-    try:
-        run_id = str(uuid.uuid4())
-        client = data.get("client", "").strip()
-        website = data.get("client_website_url", "").strip()
-        context = data.get("client_context", "").strip()
-        question = data.get("main_question", "").strip()
-        report = data.get("report", "").strip()
-        year = data.get("year", "").strip()
-        combine = data.get("combine", "").strip()
-
-        if not combine:
-            raise ValueError("Missing 'combine' content in input data.")
-
-        combine_text = convert_to_british_english(combine)
-        combine_text = reformat_assets(combine_text)
-
-        # Post-formatting: ensure a blank line above and no blank line below for specific headers
-        def normalise_table_headers(text, keyword):
-            lines = text.split('\n')
-            new_lines = []
-            i = 0
-            while i < len(lines):
-                if lines[i].strip() == keyword:
-                    if new_lines and new_lines[-1].strip() != "":
-                        new_lines.append("")  # ensure blank line before
-                    new_lines.append(keyword)
-                    # skip any blank line after
-                    if i + 1 < len(lines) and lines[i + 1].strip() == "":
-                        i += 1
-                else:
-                    new_lines.append(lines[i])
+# Post-formatting: ensure a blank line above and no blank line below for specific headers
+def normalise_table_headers(text, keyword):
+    lines = text.split('\n')
+    new_lines = []
+    i = 0
+    while i < len(lines):
+        if lines[i].strip() == keyword:
+            if new_lines and new_lines[-1].strip() != "":
+                new_lines.append("")  # ensure blank line before
+            new_lines.append(keyword)
+            # skip any blank line after
+            if i + 1 < len(lines) and lines[i + 1].strip() == "":
                 i += 1
-            return '\n'.join(new_lines)
+        else:
+            new_lines.append(lines[i])
+        i += 1
+    return '\n'.join(new_lines)
+
+# Pure text transform (registered with the CPU pool)
+def format_combine_text(combine, client, website, context, question, report, year):
+    combine_text = convert_to_british_english(combine)
+    combine_text = reformat_assets(combine_text)
 
-        combine_text = normalise_table_headers(combine_text, "Report Table:")
-        combine_text = normalise_table_headers(combine_text, "Section Tables:")
+    combine_text = normalise_table_headers(combine_text, "Report Table:")
+    combine_text = normalise_table_headers(combine_text, "Section Tables:")
 
-        header = f"""Client:
+    header = f"""Client:
 {to_title_case(client)}
 
 Website:
@@ -295,9 +290,37 @@ Year:
 {year}
 
 """
-        final_text = f"{header}{combine_text.strip()}"
+    return f"{header}{combine_text.strip()}"
+
+# Format full report
+def run_prompt(data):
+    try:
+        run_id = str(uuid.uuid4())
+        resolve_artifact_refs(data, ("combine", "client_context"))
+        client = data.get("client", "").strip()
+        website = data.get("client_website_url", "").strip()
+        context = data.get("client_context", "").strip()
+        question = data.get("main_question", "").strip()
+        report = data.get("report", "").strip()
+        year = data.get("year", "").strip()
+        combine = data.get("combine", "").strip()
+
+        if not combine:
+            raise ValueError("Missing 'combine' content in input data.")
+
+        final_text = run_cpu_transform(
+            "format_combine",
+            combine=combine,
+            client=client,
+            website=website,
+            context=context,
+            question=question,
+            report=report,
+            year=year,
+        )
         supabase_path = f"Predictive_Report/Ai_Responses/Format_Combine/{run_id}.txt"
         write_supabase_file(supabase_path, final_text)
+        publish_artifact(supabase_path, final_text, final=True)
         logger.info(f"✅ New formatted file written to: {supabase_path}")
         try:
             content = read_supabase_file(supabase_path)
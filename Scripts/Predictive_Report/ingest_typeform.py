@@ -1,10 +1,12 @@
 import os
+import codecs
 import requests
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from logger import logger
-from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Files.write_supabase_file import write_supabase_stream
 
 # --- ENV VARS ---
 client_field_id = os.getenv("CLIENT_FIELD_ID")
@@ -20,27 +22,58 @@ logger.info(f"   LOGO_FIELD_ID = {logo_field_id}")
 logger.info(f"   SUPABASE_ROOT_FOLDER = {SUPABASE_ROOT_FOLDER}")
 logger.info(f"   SUPABASE_URL = {SUPABASE_URL}")
 
+# --- CONFIG ---
+DOWNLOAD_TIMEOUT = float(os.getenv("TYPEFORM_DOWNLOAD_TIMEOUT", "10"))  # connect / per-read seconds
+DOWNLOAD_CHUNK_BYTES = int(os.getenv("TYPEFORM_DOWNLOAD_CHUNK_BYTES", "65536"))
+
 # --- HELPERS ---
-def download_file(url: str, retries: int = 3, delay: int = 2) -> bytes:
-    """Downloads a file from a given URL and returns its binary content, with Typeform auth if needed."""
+def _download_headers(url: str) -> dict:
     headers = {}
-
     if "api.typeform.com/responses/files" in url:
         typeform_token = os.getenv("TYPEFORM_TOKEN")
         if not typeform_token:
             raise EnvironmentError("TYPEFORM_TOKEN not set in environment variables")
         headers["Authorization"] = f"Bearer {typeform_token}"
+    return headers
+
+def _utf8_checked(chunks):
+    """Pass chunks through unchanged, raising UnicodeDecodeError if they are not valid UTF-8."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="strict")
+    for chunk in chunks:
+        decoder.decode(chunk)
+        yield chunk
+    decoder.decode(b"", final=True)
+
+def stream_file_to_supabase(url: str, path: str, retries: int = 3, delay: int = 2, require_utf8: bool = False) -> int:
+    """
+    Streams a file (with Typeform auth if needed) straight into Supabase at `path`
+    and returns the number of bytes written. Each retry restarts the transfer.
+    """
+    headers = _download_headers(url)
 
     for attempt in range(1, retries + 1):
-        logger.info(f"🌐 Attempting download (try {attempt}) from URL: {url}")
+        logger.info(f"🌐 Attempting streamed download (try {attempt}) from URL: {url}")
         try:
-            res = requests.get(url, headers=headers, timeout=10)
-            if res.status_code != 200:
-                logger.warning(f"📡 HTTP {res.status_code} - Response headers: {res.headers}")
-                logger.warning(f"📡 Response content preview: {res.content[:200]}")
-            res.raise_for_status()
-            logger.info(f"📥 Download successful (size = {len(res.content)} bytes)")
-            return res.content
+            with requests.get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True) as res:
+                if res.status_code != 200:
+                    logger.warning(f"📡 HTTP {res.status_code} - Response headers: {res.headers}")
+                res.raise_for_status()
+
+                # Content-Length only describes the decoded body when nothing is content-encoded
+                length = res.headers.get("Content-Length")
+                if res.headers.get("Content-Encoding") or not (length and length.isdigit()):
+                    length = None
+
+                chunks = res.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES)
+                if require_utf8:
+                    chunks = _utf8_checked(chunks)
+                size = write_supabase_stream(path, chunks, content_length=length)
+
+            logger.info(f"📥 Download streamed to Supabase (size = {size} bytes)")
+            return size
+        except UnicodeDecodeError as e:
+            logger.error(f"❌ Failed to decode file as UTF-8: {e}")
+            raise
         except requests.RequestException as e:
             logger.warning(f"⚠️ Download failed (attempt {attempt}): {e}")
             if attempt < retries:
@@ -97,29 +130,26 @@ def process_typeform_submission(data):
         logger.info(f"   Question Context: {question_context_path}")
         logger.info(f"   Logo: {logo_path}")
 
-        # --- Question Context ---
-        logger.info(f"⬇️ Downloading question context from: {question_context_url}")
-        question_context_data = download_file(question_context_url)
-
-        try:
-            decoded_context = question_context_data.decode("utf-8")
-            logger.info("✅ Decoded question context as UTF-8 successfully")
-        except UnicodeDecodeError as e:
-            logger.error(f"❌ Failed to decode question context file as UTF-8: {e}")
-            raise
-
-        logger.info(f"🔎 Context content preview (first 100 chars): {repr(decoded_context[:100])}")
-        logger.info(f"📏 Context length (chars): {len(decoded_context)}")
-        write_supabase_file(question_context_path, decoded_context)
-
-        # --- Logo ---
-        logger.info(f"⬇️ Downloading logo from: {logo_url}")
-        logo_data = download_file(logo_url)
-        logger.info(f"📏 Logo file size: {len(logo_data)} bytes")
-        logger.info(f"🔎 Logo content preview (first 20 bytes): {logo_data[:20]}")
-        write_supabase_file(logo_path, logo_data)
+        # --- Question Context + Logo (concurrent, streamed) ---
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="typeform-dl") as pool:
+            context_future = pool.submit(
+                stream_file_to_supabase, question_context_url, question_context_path, require_utf8=True
+            )
+            logo_future = pool.submit(stream_file_to_supabase, logo_url, logo_path)
+            context_size = context_future.result()
+            logo_size = logo_future.result()
 
+        logger.info(f"📏 Context size: {context_size} bytes | Logo size: {logo_size} bytes")
         logger.info("✅ Files written to Supabase successfully.")
 
+        return {
+            "client": client,
+            "question_context_path": question_context_path,
+            "question_context_bytes": context_size,
+            "logo_path": logo_path,
+            "logo_bytes": logo_size,
+        }
+
     except Exception:
         logger.exception("❌ Failed to process Typeform submission and save files to Supabase.")
+        raise
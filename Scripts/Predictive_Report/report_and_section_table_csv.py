@@ -4,6 +4,7 @@ import uuid
 import re
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Runtime.artifact_refs import resolve_artifact_refs
 
 SAVE_DIR = "Predictive_Report/Ai_Responses/Report_and_Section_Tables"
 
@@ -51,6 +52,7 @@ def write_report_table_formatted(path: str, report_change_title: str, report_cha
 def run_prompt(payload):
     logger.info("\U0001F4E6 Running report_and_section_table_csv.py")
     run_id = payload.get("run_id") or str(uuid.uuid4())
+    resolve_artifact_refs(payload, ("format_combine",))
     raw_text = payload.get("format_combine", "")
 
     results = {"run_id": run_id, "report_table": None, "section_tables": []}
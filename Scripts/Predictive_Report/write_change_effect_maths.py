@@ -1,3 +1,4 @@
+import os
 import uuid
 import yaml
 import json
@@ -5,6 +6,13 @@ from threading import Thread
 from logger import logger
 from decimal import Decimal, ROUND_HALF_UP
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Runtime.artifacts import publish_artifact, wait_for_members
+from Engine.Runtime.llm_stream import partial_path_for
+from Engine.Runtime.artifact_refs import resolve_artifact_refs
+from Scripts.Predictive_Report.read_prompt_1_thinking import flatten_json_like_text
+
+# How long subscription mode waits for Prompt 1 sections before giving up
+STREAM_SUBSCRIBE_TIMEOUT = float(os.getenv("STREAM_SUBSCRIBE_TIMEOUT", "600"))
 
 # --- Formatters ---
 def format_integer_percent(value) -> str:
@@ -95,27 +103,163 @@ def build_structured_output(prompt_1_thinking: dict) -> dict:
 
     return result
 
+def report_change(structured_output: dict) -> Decimal:
+    """Report Change: sum of the (already rounded) Section Effects."""
+    section_effects = []
+    for section_data in structured_output.values():
+        effect_str = section_data.get("Section Effect", "0.0%").replace('%', '').strip()
+        try:
+            section_effects.append(Decimal(effect_str))
+        except Exception:
+            section_effects.append(Decimal("0.0"))
+    return quantize_1dp(sum(section_effects))
+
+# --- Report and Section Tables ---
+def format_signed_percent(value) -> str:
+    value = quantize_1dp(value)
+    return f"+{value}%" if value > 0 else f"{value}%"
+
+def _percent_value(value) -> Decimal:
+    try:
+        return Decimal(str(value or "0").strip().replace('%', '').replace('+', '') or "0")
+    except Exception:
+        return Decimal("0")
+
+def _table_sort_key(row: dict, prefix: str) -> tuple:
+    return tuple(-_percent_value(row[f"{prefix} {field}"]) for field in ("Makeup", "Change", "Effect"))
+
+def build_tables(structured_output: dict, report_change_title: str, report_change_value=None) -> dict:
+    """
+    Report Table and Section Tables in the shape prompt_4_tables.txt asks the
+    model for, built straight from build_structured_output: rows sorted by
+    makeup, then change, then effect (highest first); changes and effects signed.
+    A given `report_change_value` is used as passed, like the prompt does.
+    """
+    if report_change_value is None:
+        report_change_value = format_decimal_percent(report_change(structured_output))
+
+    report_rows = []
+    section_tables = {}
+    for section_data in structured_output.values():
+        section_title = section_data.get("Section Title", "")
+        report_rows.append({
+            "Section Title": section_title,
+            "Section Makeup": format_integer_percent(_percent_value(section_data.get("Section MakeUp"))),
+            "Section Change": format_signed_percent(_percent_value(section_data.get("Section Change"))),
+            "Section Effect": format_signed_percent(_percent_value(section_data.get("Section Effect"))),
+        })
+        sub_rows = []
+        for sub_key, sub_data in section_data.items():
+            if not (isinstance(sub_data, dict) and sub_key.lower().startswith("sub-section ")):
+                continue
+            sub_rows.append({
+                "Sub-Section Title": sub_data.get("Sub-Section Title", ""),
+                "Sub-Section Makeup": format_integer_percent(_percent_value(sub_data.get("Sub-Section MakeUp"))),
+                "Sub-Section Change": format_signed_percent(_percent_value(sub_data.get("Sub-Section Change"))),
+                "Sub-Section Effect": format_signed_percent(_percent_value(sub_data.get("Sub-Section Effect"))),
+            })
+        sub_rows.sort(key=lambda row: _table_sort_key(row, "Sub-Section"))
+        section_tables[section_title] = sub_rows
+
+    report_rows.sort(key=lambda row: _table_sort_key(row, "Section"))
+    return {
+        "Report Change": {
+            "Report Change Title": report_change_title,
+            "Report Change": str(report_change_value).strip(),
+        },
+        "Report Table": report_rows,
+        "Section Tables": {
+            row["Section Title"]: section_tables[row["Section Title"]] for row in report_rows
+        },
+    }
+
+# --- Subscription mode ---
+def parse_indented_text(text: str) -> dict:
+    """
+    Inverse of the read_* flatteners: nested "Key: value" lines by indentation.
+    Splits on the first colon only, so values keep any colons YAML would reject.
+    """
+    root: dict = {}
+    stack = [(-1, root)]
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        indent = len(line) - len(line.lstrip(" "))
+        key, sep, value = line.strip().partition(":")
+        if not sep:
+            continue
+        while stack[-1][0] >= indent:
+            stack.pop()
+        value = value.strip()
+        if value:
+            stack[-1][1][key.strip()] = value
+        else:
+            child: dict = {}
+            stack[-1][1][key.strip()] = child
+            stack.append((indent, child))
+    return root
+
+def parse_prompt_1(text: str) -> dict:
+    """
+    Prompt 1 sections from any of the forms it travels in: the model's JSON,
+    read_prompt_1_thinking's flattened text (what Zapier passes on), or
+    JSON-like model output that json rejects, which is flattened first.
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    if text.lstrip().startswith(("{", "```")):
+        text = flatten_json_like_text(text).replace("{:", "")
+    try:
+        parsed = yaml.safe_load(text)
+    except yaml.YAMLError:
+        parsed = None
+    if isinstance(parsed, dict) and _section_count(parsed):
+        return parsed
+    return parse_indented_text(text)
+
+def _section_count(members: dict) -> int:
+    return sum(1 for k in members if k.lower().startswith("section "))
+
+def wait_for_prompt_1_sections(prompt_1_run_id: str, number_sections) -> dict:
+    """
+    Prompt 1 sections for `prompt_1_run_id`, returned as soon as `number_sections`
+    of them have streamed in (or the final response exists), instead of waiting
+    for the whole completion and the read_prompt_1_thinking round trip.
+    """
+    key = f"Predictive_Report/Ai_Responses/Prompt_1_Thinking/{prompt_1_run_id}.txt"
+    try:
+        expected = int(number_sections or 0)
+    except (TypeError, ValueError):
+        expected = 0
+
+    members = wait_for_members(
+        key,
+        partial_path_for(key),
+        ready=lambda m, final: final or (expected > 0 and _section_count(m) >= expected),
+        timeout=STREAM_SUBSCRIBE_TIMEOUT,
+        parse_final=parse_prompt_1,
+    )
+    if members is None:
+        raise TimeoutError(f"Prompt 1 sections not available for run_id {prompt_1_run_id}")
+    logger.info(f"📡 Prompt 1 sections ready for {prompt_1_run_id} ({_section_count(members)} sections)")
+    return members
+
 # --- Write logic ---
 def background_task(run_id: str, raw_data: dict):
     filename = f"{run_id}.txt"
     supabase_path = f"Predictive_Report/Ai_Responses/Change_Effect_Maths/{filename}"
 
     try:
-        raw_prompt = raw_data.get("prompt_1_thinking", "")
-        prompt_data = yaml.safe_load(raw_prompt)
+        resolve_artifact_refs(raw_data, ("prompt_1_thinking",))
+        if not raw_data.get("prompt_1_thinking") and raw_data.get("prompt_1_run_id"):
+            prompt_data = wait_for_prompt_1_sections(raw_data["prompt_1_run_id"], raw_data.get("number_sections"))
+        else:
+            raw_prompt = raw_data.get("prompt_1_thinking", "")
+            prompt_data = parse_prompt_1(raw_prompt)
         structured_output = build_structured_output(prompt_data)
-
-        # Calculate Report Change from Section Effects
-        section_effects = []
-        for section_data in structured_output.values():
-            effect_str = section_data.get("Section Effect", "0.0%").replace('%', '').strip()
-            try:
-                section_effects.append(Decimal(effect_str))
-            except Exception:
-                section_effects.append(Decimal("0.0"))
-
-        report_change = quantize_1dp(sum(section_effects))
-        report_change_formatted = format_decimal_percent(report_change)
+        report_change_formatted = format_decimal_percent(report_change(structured_output))
 
         # Create report change block
         report_change_block = json.dumps({"Report Change": report_change_formatted}, indent=2)
@@ -131,6 +275,7 @@ def background_task(run_id: str, raw_data: dict):
         logger.error(full_text_output)
 
     write_supabase_file(supabase_path, full_text_output)
+    publish_artifact(supabase_path, full_text_output, final=True)
 
 def run_prompt(data):
     run_id = str(uuid.uuid4())
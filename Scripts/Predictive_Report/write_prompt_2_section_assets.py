@@ -1,61 +1,198 @@
+import os
+import time
 import uuid
 import json
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, OpenAIError
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Prompts.template_registry import get_template
+from Engine.Runtime.stage_cache import cached_stage_output, stage_cache_key, store_stage_output
+from Engine.Runtime.artifacts import publish_artifact
+from Engine.Runtime.llm_stream import partial_path_for, stream_chat_completion, streaming_enabled
+from Scripts.Predictive_Report.write_change_effect_maths import parse_prompt_1
 
-def safe_escape(value):
-    return str(value).replace("{", "{{").replace("}", "}}")
+PROMPT_PATH = "Prompts/Predictive_Report/prompt_2_section_assets.txt"
+MODEL = "gpt-4o"
+TEMPERATURE = 0.2
+
+# Fan-out: one completion per Prompt 1 section instead of one for the whole report
+PROMPT_2_FANOUT = os.getenv("PROMPT_2_FANOUT", "off").strip().lower()  # "on" | "off" (payload "section_fanout" overrides)
+PROMPT_2_FANOUT_WORKERS = int(os.getenv("PROMPT_2_FANOUT_WORKERS", "6"))
+PROMPT_2_SECTION_RETRIES = int(os.getenv("PROMPT_2_SECTION_RETRIES", "2"))
+PROMPT_2_RETRY_DELAY_SECONDS = float(os.getenv("PROMPT_2_RETRY_DELAY_SECONDS", "2"))  # doubled per API-error retry
+
+def fanout_enabled(data):
+    flag = data.get("section_fanout")
+    if flag is None:
+        return PROMPT_2_FANOUT == "on"
+    return str(flag).strip().lower() in ("1", "true", "yes", "on")
+
+def prompt_1_sections(prompt_1_thinking):
+    """
+    [("Section N", {...}), ...] in report order, or None if Prompt 1 has no
+    sections. Accepts the model's JSON or read_prompt_1_thinking's flattened text.
+    """
+    try:
+        parsed = parse_prompt_1(prompt_1_thinking)
+    except Exception:
+        return None
+    if not isinstance(parsed, dict):
+        return None
+    sections = [(k, v) for k, v in parsed.items() if k.lower().startswith("section ") and isinstance(v, dict)]
+    return sections or None
+
+def _strip_fences(text):
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
+
+def _section_from_response(raw_result, key):
+    """The assets for `key` from a one-section response (tolerates a renumbered single key)."""
+    parsed = json.loads(_strip_fences(raw_result))
+    if not isinstance(parsed, dict):
+        raise ValueError("response is not a JSON object")
+    if isinstance(parsed.get(key), dict):
+        return parsed[key]
+    sections = [v for k, v in parsed.items() if k.lower().startswith("section ") and isinstance(v, dict)]
+    if len(sections) == 1:
+        return sections[0]
+    raise ValueError(f"response does not contain {key}")
+
+def generate_by_section(template, values, sections, supabase_path, data):
+    """
+    One request per section, PROMPT_2_FANOUT_WORKERS at a time. A section whose
+    request fails (API error) or whose response is not valid JSON is retried on
+    its own (up to PROMPT_2_SECTION_RETRIES times); the results are merged back into the same
+    {"Section 1": {...}, ...} document the single-shot prompt returns.
+    """
+    client_openai = OpenAI()
+    params = {"model": MODEL, "temperature": TEMPERATURE}
+    stream = streaming_enabled(data)
+    done = {}
+
+    def run_section(item):
+        key, section = item
+        prompt = template.render(**values, prompt_1_thinking=json.dumps({key: section}, indent=2))
+        prompt += (
+            f"\n\n---\n### SCOPE\nThe section structure above contains only {key}. "
+            f"Return a JSON object whose single top-level key is \"{key}\".\n"
+        )
+        stage = "write_prompt_2_section_assets.section"
+        cache_key = stage_cache_key(stage, template.version, {"prompt": prompt}, params)
+        cached = cached_stage_output(stage, cache_key, data)
+        if cached is not None:
+            return key, json.loads(cached)
+
+        for attempt in range(1, PROMPT_2_SECTION_RETRIES + 2):
+            try:
+                response = client_openai.chat.completions.create(
+                    messages=[{"role": "user", "content": prompt}], **params
+                )
+            except OpenAIError as e:
+                logger.warning(f"🔁 [Prompt2.Fanout] {key} attempt {attempt} failed: {e}")
+                if attempt <= PROMPT_2_SECTION_RETRIES:
+                    time.sleep(PROMPT_2_RETRY_DELAY_SECONDS * (2 ** (attempt - 1)))
+                continue
+            try:
+                assets = _section_from_response(response.choices[0].message.content, key)
+            except ValueError as e:  # includes JSONDecodeError
+                logger.warning(f"🔁 [Prompt2.Fanout] {key} attempt {attempt} unusable: {e}")
+                continue
+            store_stage_output(stage, cache_key, json.dumps(assets, indent=2), data)
+            return key, assets
+        return key, None
+
+    with ThreadPoolExecutor(max_workers=max(1, PROMPT_2_FANOUT_WORKERS), thread_name_prefix="prompt2-fanout") as pool:
+        for key, assets in pool.map(run_section, sections):
+            done[key] = assets
+            if stream and assets is not None:
+                # Downstream readers see each section as soon as it (and those before it) finish
+                members = {k: v for k, v in done.items() if v is not None}
+                publish_artifact(supabase_path, json.dumps(members, indent=2), members=members)
+
+    failed = [key for key, assets in done.items() if assets is None]
+    if failed:
+        raise RuntimeError(f"Prompt 2 sections failed after {PROMPT_2_SECTION_RETRIES} retries: {', '.join(failed)}")
+    logger.info(f"🧩 [Prompt2.Fanout] merged {len(done)} section(s)")
+    return json.dumps({key: done[key] for key, _ in sections}, indent=2)
 
 def run_prompt(data):
     try:
         run_id = data.get("run_id") or str(uuid.uuid4())
         data["run_id"] = run_id  # ensure it's injected if missing
 
-        # Extract and escape all inputs
-        client = safe_escape(data["client"])
-        client_context = safe_escape(data["client_context"])
-        main_question = safe_escape(data["main_question"])
-        question_context = safe_escape(data["question_context"])
-        tone_of_voice = safe_escape(data["tone_of_voice"])
-        special_instructions = safe_escape(data["special_instructions"])
-        prompt_1_thinking = safe_escape(data["prompt_1_thinking"])
+        # Extract inputs (values are inserted verbatim by the template registry)
+        client = data["client"]
+        client_context = data["client_context"]
+        main_question = data["main_question"]
+        question_context = data["question_context"]
+        tone_of_voice = data["tone_of_voice"]
+        special_instructions = data["special_instructions"]
+        prompt_1_thinking = data["prompt_1_thinking"]
 
-        # Load and populate prompt template
-        with open("Prompts/Predictive_Report/prompt_2_section_assets.txt", "r", encoding="utf-8") as f:
-            template = f.read()
+        # Load and populate prompt template (compiled once, reloaded on change)
+        template = get_template(PROMPT_PATH)
 
-        prompt = template.format(
+        values = dict(
             client=client,
             client_context=client_context,
             main_question=main_question,
             question_context=question_context,
             tone_of_voice=tone_of_voice,
             special_instructions=special_instructions,
-            prompt_1_thinking=prompt_1_thinking
         )
+        prompt = template.render(**values, prompt_1_thinking=prompt_1_thinking)
 
-        # Send prompt to OpenAI
-        client_openai = OpenAI()
-        response = client_openai.chat.completions.create(
-            model="gpt-4o",
-            temperature=0.2,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        supabase_path = f"Predictive_Report/Ai_Responses/Prompt_2_Section_Assets/{run_id}.txt"
+
+        sections = prompt_1_sections(prompt_1_thinking) if fanout_enabled(data) else None
+        if fanout_enabled(data) and sections is None:
+            logger.warning("[Prompt2.Fanout] no sections found in Prompt 1 Thinking; using a single completion")
 
-        raw_result = response.choices[0].message.content.strip()
+        # Skip the LLM call when nothing feeding this stage changed (STAGE_CACHE / use_cache)
+        cache_key = stage_cache_key(
+            "write_prompt_2_section_assets", template.version, {"prompt": prompt}, {"model": MODEL, "temperature": TEMPERATURE}
+        )
+        formatted = cached_stage_output("write_prompt_2_section_assets", cache_key, data)
+        if formatted is None and sections:
+            formatted = generate_by_section(template, values, sections, supabase_path, data)
+            store_stage_output("write_prompt_2_section_assets", cache_key, formatted, data)
+        elif formatted is None:
+            # Send prompt to OpenAI (streamed when enabled, publishing members as they complete)
+            client_openai = OpenAI()
+            messages = [{"role": "user", "content": prompt}]
+            if streaming_enabled(data):
+                raw_result = stream_chat_completion(
+                    client_openai,
+                    model=MODEL,
+                    temperature=TEMPERATURE,
+                    messages=messages,
+                    artifact_key=supabase_path,
+                    partial_path=partial_path_for(supabase_path),
+                ).strip()
+            else:
+                response = client_openai.chat.completions.create(
+                    model=MODEL,
+                    temperature=TEMPERATURE,
+                    messages=messages
+                )
+                raw_result = response.choices[0].message.content.strip()
 
-        # Try parsing the response into JSON if possible
-        try:
-            parsed = json.loads(raw_result)
-            formatted = json.dumps(parsed, indent=2)
-        except json.JSONDecodeError:
-            logger.warning("AI response is not valid JSON. Writing raw output.")
-            formatted = raw_result
+            # Try parsing the response into JSON if possible
+            try:
+                parsed = json.loads(raw_result)
+                formatted = json.dumps(parsed, indent=2)
+                store_stage_output("write_prompt_2_section_assets", cache_key, formatted, data)
+            except json.JSONDecodeError:
+                logger.warning("AI response is not valid JSON. Writing raw output.")
+                formatted = raw_result
 
         # Write AI response to Supabase
-        supabase_path = f"Predictive_Report/Ai_Responses/Prompt_2_Section_Assets/{run_id}.txt"
         write_supabase_file(supabase_path, formatted)
+        publish_artifact(supabase_path, formatted, final=True)
         logger.info(f"✅ AI response written to Supabase: {supabase_path}")
 
         return {"status": "processing", "run_id": run_id}
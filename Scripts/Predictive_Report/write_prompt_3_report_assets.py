@@ -3,30 +3,30 @@ import json
 from openai import OpenAI
 from logger import logger
 from Engine.Files.write_supabase_file import write_supabase_file
-
-def safe_escape(value):
-    return str(value).replace("{", "{{").replace("}", "}}")
+from Engine.Prompts.template_registry import get_template
+from Engine.Runtime.stage_cache import cached_stage_output, stage_cache_key, store_stage_output
+from Engine.Runtime.artifacts import publish_artifact
+from Engine.Runtime.llm_stream import partial_path_for, stream_chat_completion, streaming_enabled
 
 def run_prompt(data):
     try:
         run_id = data.get("run_id") or str(uuid.uuid4())
         data["run_id"] = run_id  # ensure it's injected if missing
 
-        # Extract and escape all inputs
-        client = safe_escape(data["client"])
-        client_context = safe_escape(data["client_context"])
-        main_question = safe_escape(data["main_question"])
-        question_context = safe_escape(data["question_context"])
-        tone_of_voice = safe_escape(data["tone_of_voice"])
-        special_instructions = safe_escape(data["special_instructions"])
-        prompt_1_thinking = safe_escape(data["prompt_1_thinking"])
-        prompt_2_section_assets = safe_escape(data["prompt_2_section_assets"])
+        # Extract inputs (values are inserted verbatim by the template registry)
+        client = data["client"]
+        client_context = data["client_context"]
+        main_question = data["main_question"]
+        question_context = data["question_context"]
+        tone_of_voice = data["tone_of_voice"]
+        special_instructions = data["special_instructions"]
+        prompt_1_thinking = data["prompt_1_thinking"]
+        prompt_2_section_assets = data["prompt_2_section_assets"]
 
-        # Load and populate prompt template
-        with open("Prompts/Predictive_Report/prompt_3_report_assets.txt", "r", encoding="utf-8") as f:
-            template = f.read()
+        # Load and populate prompt template (compiled once, reloaded on change)
+        template = get_template("Prompts/Predictive_Report/prompt_3_report_assets.txt")
 
-        prompt = template.format(
+        prompt = template.render(
             client=client,
             client_context=client_context,
             main_question=main_question,
@@ -37,27 +37,46 @@ def run_prompt(data):
             prompt_2_section_assets=prompt_2_section_assets
         )
 
-        # Send prompt to OpenAI
-        client_openai = OpenAI()
-        response = client_openai.chat.completions.create(
-            model="gpt-4o",
-            temperature=0.2,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        supabase_path = f"Predictive_Report/Ai_Responses/Prompt_3_Report_Assets/{run_id}.txt"
 
-        raw_result = response.choices[0].message.content.strip()
+        # Skip the LLM call when nothing feeding this stage changed (STAGE_CACHE / use_cache)
+        cache_key = stage_cache_key(
+            "write_prompt_3_report_assets", template.version, {"prompt": prompt}, {"model": "gpt-4o", "temperature": 0.2}
+        )
+        formatted = cached_stage_output("write_prompt_3_report_assets", cache_key, data)
+        if formatted is None:
+            # Send prompt to OpenAI (streamed when enabled, publishing members as they complete)
+            client_openai = OpenAI()
+            messages = [{"role": "user", "content": prompt}]
+            if streaming_enabled(data):
+                raw_result = stream_chat_completion(
+                    client_openai,
+                    model="gpt-4o",
+                    temperature=0.2,
+                    messages=messages,
+                    artifact_key=supabase_path,
+                    partial_path=partial_path_for(supabase_path),
+                ).strip()
+            else:
+                response = client_openai.chat.completions.create(
+                    model="gpt-4o",
+                    temperature=0.2,
+                    messages=messages
+                )
+                raw_result = response.choices[0].message.content.strip()
 
-        # Try parsing the response into JSON if possible
-        try:
-            parsed = json.loads(raw_result)
-            formatted = json.dumps(parsed, indent=2)
-        except json.JSONDecodeError:
-            logger.warning("AI response is not valid JSON. Writing raw output.")
-            formatted = raw_result
+            # Try parsing the response into JSON if possible
+            try:
+                parsed = json.loads(raw_result)
+                formatted = json.dumps(parsed, indent=2)
+                store_stage_output("write_prompt_3_report_assets", cache_key, formatted, data)
+            except json.JSONDecodeError:
+                logger.warning("AI response is not valid JSON. Writing raw output.")
+                formatted = raw_result
 
         # Write AI response to Supabase
-        supabase_path = f"Predictive_Report/Ai_Responses/Prompt_3_Report_Assets/{run_id}.txt"
         write_supabase_file(supabase_path, formatted)
+        publish_artifact(supabase_path, formatted, final=True)
         logger.info(f"✅ AI response written to Supabase: {supabase_path}")
 
         return {"status": "processing", "run_id": run_id}
@@ -1,34 +1,84 @@
+import os
 import uuid
 import json
 from openai import OpenAI
 from logger import logger
+from Engine.Files.read_supabase_file import read_supabase_file
 from Engine.Files.write_supabase_file import write_supabase_file
+from Engine.Prompts.template_registry import get_template
+from Engine.Runtime.stage_cache import cached_stage_output, stage_cache_key, store_stage_output
+from Engine.Runtime.artifacts import final_artifact, publish_artifact
+from Engine.Runtime.llm_stream import partial_path_for, stream_chat_completion, streaming_enabled
+from Scripts.Predictive_Report.write_change_effect_maths import parse_prompt_1, build_structured_output, build_tables
 
-def safe_escape(value):
-    return str(value).replace("{", "{{").replace("}", "}}")
+# "llm"   : the model lays out the tables from the section structure (default)
+# "local" : the tables are built deterministically from the change-effect maths,
+#           with no model call; payload "tables_mode" overrides
+PROMPT_4_TABLES_MODE = os.getenv("PROMPT_4_TABLES_MODE", "llm").strip().lower()
+
+def tables_mode(data) -> str:
+    mode = str(data.get("tables_mode") or PROMPT_4_TABLES_MODE).strip().lower()
+    return mode if mode in ("llm", "local") else "llm"
+
+def load_structured_output(data) -> dict:
+    """
+    Change-effect maths sections for this report: read from the
+    Change_Effect_Maths artifact when `change_effect_maths_run_id` is given,
+    otherwise parsed from `prompt_1_thinking` (already computed sections are
+    used as-is; raw Prompt 1 sections go through build_structured_output).
+    """
+    maths_run_id = data.get("change_effect_maths_run_id")
+    if maths_run_id:
+        path = f"Predictive_Report/Ai_Responses/Change_Effect_Maths/{maths_run_id}.txt"
+        content = final_artifact(path) or read_supabase_file(path)
+        blocks = content.strip().split("}\n\n{", 1)
+        if len(blocks) != 2:
+            raise ValueError("Unexpected Change Effect Maths structure: expected two JSON blocks.")
+        return json.loads("{" + blocks[1])
+
+    parsed = parse_prompt_1(data["prompt_1_thinking"])
+    sections = {k: v for k, v in parsed.items() if k.lower().startswith("section ") and isinstance(v, dict)}
+    if sections and all(v.get("Section Effect") for v in sections.values()):
+        return sections
+    return build_structured_output(parsed)
+
+def write_local_tables(data, run_id: str, supabase_path: str):
+    title = f'{data["target_variable"]} of {data["commodity"]} in the {data["region"]} over the next {data["time_range"]}.'
+    tables = build_tables(load_structured_output(data), title, data.get("report_change") or None)
+    formatted = json.dumps(tables, indent=2)
+
+    write_supabase_file(supabase_path, formatted)
+    publish_artifact(supabase_path, formatted, final=True)
+    logger.info(f"✅ Local tables written to Supabase: {supabase_path} ({len(tables['Report Table'])} sections)")
 
 def run_prompt(data):
     try:
         run_id = data.get("run_id") or str(uuid.uuid4())
         data["run_id"] = run_id  # ensure it's injected if missing
 
-        # Extract and escape all inputs
-        client = safe_escape(data["client"])
-        client_context = safe_escape(data["client_context"])
-        main_question = safe_escape(data["main_question"])
-        question_context = safe_escape(data["question_context"])
-        target_variable = safe_escape(data["target_variable"])
-        commodity = safe_escape(data["commodity"])
-        region = safe_escape(data["region"])
-        time_range = safe_escape(data["time_range"])
-        prompt_1_thinking = safe_escape(data["prompt_1_thinking"])
-        report_change = safe_escape(data["report_change"])
-
-        # Load and populate prompt template
-        with open("Prompts/Predictive_Report/prompt_4_tables.txt", "r", encoding="utf-8") as f:
-            template = f.read()
-
-        prompt = template.format(
+        supabase_path = f"Predictive_Report/Ai_Responses/Prompt_4_Tables/{run_id}.txt"
+
+        # Tables are fully determined by the maths; skip the model round trip
+        if tables_mode(data) == "local":
+            write_local_tables(data, run_id, supabase_path)
+            return {"status": "processing", "run_id": run_id}
+
+        # Extract inputs (values are inserted verbatim by the template registry)
+        client = data["client"]
+        client_context = data["client_context"]
+        main_question = data["main_question"]
+        question_context = data["question_context"]
+        target_variable = data["target_variable"]
+        commodity = data["commodity"]
+        region = data["region"]
+        time_range = data["time_range"]
+        prompt_1_thinking = data["prompt_1_thinking"]
+        report_change = data["report_change"]
+
+        # Load and populate prompt template (compiled once, reloaded on change)
+        template = get_template("Prompts/Predictive_Report/prompt_4_tables.txt")
+
+        prompt = template.render(
             client=client,
             client_context=client_context,
             main_question=main_question,
@@ -41,27 +91,44 @@ def run_prompt(data):
             report_change=report_change
         )
 
-        # Send prompt to OpenAI
-        client_openai = OpenAI()
-        response = client_openai.chat.completions.create(
-            model="gpt-4o",
-            temperature=0.2,
-            messages=[{"role": "user", "content": prompt}]
+        # Skip the LLM call when nothing feeding this stage changed (STAGE_CACHE / use_cache)
+        cache_key = stage_cache_key(
+            "write_prompt_4_tables", template.version, {"prompt": prompt}, {"model": "gpt-4o", "temperature": 0.2}
         )
+        formatted = cached_stage_output("write_prompt_4_tables", cache_key, data)
+        if formatted is None:
+            # Send prompt to OpenAI (streamed when enabled, publishing members as they complete)
+            client_openai = OpenAI()
+            messages = [{"role": "user", "content": prompt}]
+            if streaming_enabled(data):
+                raw_result = stream_chat_completion(
+                    client_openai,
+                    model="gpt-4o",
+                    temperature=0.2,
+                    messages=messages,
+                    artifact_key=supabase_path,
+                    partial_path=partial_path_for(supabase_path),
+                ).strip()
+            else:
+                response = client_openai.chat.completions.create(
+                    model="gpt-4o",
+                    temperature=0.2,
+                    messages=messages
+                )
+                raw_result = response.choices[0].message.content.strip()
 
-        raw_result = response.choices[0].message.content.strip()
-
-        # Try parsing the response into JSON if possible
-        try:
-            parsed = json.loads(raw_result)
-            formatted = json.dumps(parsed, indent=2)
-        except json.JSONDecodeError:
-            logger.warning("AI response is not valid JSON. Writing raw output.")
-            formatted = raw_result
+            # Try parsing the response into JSON if possible
+            try:
+                parsed = json.loads(raw_result)
+                formatted = json.dumps(parsed, indent=2)
+                store_stage_output("write_prompt_4_tables", cache_key, formatted, data)
+            except json.JSONDecodeError:
+                logger.warning("AI response is not valid JSON. Writing raw output.")
+                formatted = raw_result
 
         # Write AI response to Supabase
-        supabase_path = f"Predictive_Report/Ai_Responses/Prompt_4_Tables/{run_id}.txt"
         write_supabase_file(supabase_path, formatted)
+        publish_artifact(supabase_path, formatted, final=True)
         logger.info(f"✅ AI response written to Supabase: {supabase_path}")
 
         return {"status": "processing", "run_id": run_id}
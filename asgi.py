@@ -0,0 +1,345 @@
+# asgi.py
+#
+# Async entry point with the same routes and dispatch tables as main.py:
+#     uvicorn asgi:app --host 0.0.0.0 --port $PORT
+# Blocking prompt modules run in the execution-class pools; polling read_*
+# prompts wait for their Supabase file on the event loop (no thread sleeps),
+# so one process can hold hundreds of waiting requests.
+
+import os
+import json
+import uuid
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from logger import logger
+from prompt_routing import BLOCKING_PROMPTS, PROMPT_MODULES, PROMPT_EXECUTION_CLASSES, RUN_ID_DEDUPE_EXEMPT, READ_ARTIFACT_PATHS
+from Scripts.Predictive_Report.ingest_typeform import process_typeform_submission
+from Scripts.Elasticity.elasticity_typeform import process_typeform_submission as process_elasticity_submission
+from Engine.Files.read_supabase_file import read_supabase_file
+from Engine.Webhooks.outbound import get_delivery_status, start_delivery_scheduler
+from Engine.Runtime.jobs import submit_job, get_job
+from Engine.Runtime.cpu_pool import start_cpu_pool
+from Engine.Runtime.batch import BatchRequestError, batch_key, batch_response, parse_batch
+from Engine.Runtime.artifacts import final_artifact, publish_artifact, subscribe_artifact, unsubscribe_artifact
+from Engine.Runtime.executors import (
+    INLINE,
+    ExecutorSaturated,
+    execution_class_for,
+    executor_stats,
+    submit_to_class,
+)
+from Engine.Webhooks.idempotency import (
+    typeform_key,
+    dispatch_key,
+    claim_idempotency_key,
+    complete_idempotency_key,
+    release_idempotency_key,
+    settle_idempotency_key,
+    wait_for_idempotency_key,
+)
+
+# --- ROUTE SAFEGUARD ---
+RENDER_ENV = os.getenv("RENDER_ENV", "/ingest-typeform-test")  # Optional default for dev
+if not RENDER_ENV.startswith("/"):
+    raise RuntimeError(f"❌ Invalid or missing RENDER_ENV: {RENDER_ENV!r} — must start with '/'")
+
+logger.info(f"📡 ASGI binding RENDER_ENV route: {RENDER_ENV}")
+
+# --- CONFIG ---
+EXECUTOR_RETRY_AFTER_SECONDS = os.getenv("EXECUTOR_RETRY_AFTER_SECONDS", "5")
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+# Same total budget as the read_* modules' 2+4+...+64s backoff
+ASYNC_READ_TIMEOUT = float(os.getenv("ASYNC_READ_TIMEOUT", "126"))
+ASYNC_READ_INITIAL_DELAY = float(os.getenv("ASYNC_READ_INITIAL_DELAY", "2"))
+ASYNC_READ_MAX_DELAY = float(os.getenv("ASYNC_READ_MAX_DELAY", "30"))
+
+# --- HELPERS ---
+async def _json_body(request: Request):
+    # Mirrors Flask's get_json(force=True): ignore the Content-Type header
+    return json.loads(await request.body())
+
+def _replay(record, extra=None):
+    if record["state"] == "completed":
+        return JSONResponse(
+            record["body"],
+            status_code=record["status_code"] or 200,
+            headers={"Idempotent-Replay": "true"},
+        )
+    body = {"status": "processing", "message": "Duplicate delivery; the original request is still running."}
+    body.update(extra or {})
+    return JSONResponse(body, status_code=202)
+
+async def _accept_typeform(kind, handler, data, message):
+    """Queue a Typeform submission as a job, once per form_response token."""
+    key = typeform_key(kind, data)
+    if key:
+        existing = await run_in_threadpool(claim_idempotency_key, key)
+        if existing:
+            return _replay(existing)
+    try:
+        job_id = await run_in_threadpool(submit_job, kind, handler, data)
+    except Exception:
+        if key:
+            await run_in_threadpool(release_idempotency_key, key)
+        raise
+    body = {
+        "status": "accepted",
+        "message": message,
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}"
+    }
+    if key:
+        await run_in_threadpool(complete_idempotency_key, key, body, 202)
+    return JSONResponse(body, status_code=202)
+
+async def await_read_artifact(path: str, timeout: float) -> bool:
+    """
+    Wait for `path` without holding a thread: poll Supabase with exponential
+    backoff (each GET in a worker thread), waking early if it is published in
+    this process. On success the content is published as a final artifact, so
+    the read_* module that runs next returns it immediately.
+    """
+    loop = asyncio.get_running_loop()
+    published = asyncio.Event()
+
+    def on_publish(snapshot):
+        if snapshot["final"]:
+            loop.call_soon_threadsafe(published.set)
+
+    subscribe_artifact(path, on_publish)
+    try:
+        deadline = loop.time() + timeout
+        delay = ASYNC_READ_INITIAL_DELAY
+        while True:
+            if final_artifact(path) is not None:
+                return True
+            try:
+                content = await asyncio.to_thread(read_supabase_file, path)
+                publish_artifact(path, content, final=True)
+                return True
+            except Exception as e:
+                logger.info(f"⏳ {path} not yet available: {e}")
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            try:
+                await asyncio.wait_for(published.wait(), min(delay, remaining))
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, ASYNC_READ_MAX_DELAY)
+    finally:
+        unsubscribe_artifact(path, on_publish)
+
+# --- ROUTES ---
+async def dynamic_ingest_typeform(request: Request):
+    try:
+        data = await _json_body(request)
+        logger.info(f"📩 Typeform webhook received via {RENDER_ENV}")
+        return await _accept_typeform(
+            "typeform_ingest", process_typeform_submission, data,
+            "Submission queued; files are being saved to Supabase."
+        )
+    except Exception as e:
+        logger.exception(f"❌ Error handling Typeform submission via {RENDER_ENV}")
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
+
+async def elasticity_typeform_handler(request: Request):
+    try:
+        data = await _json_body(request)
+        logger.info("📩 Elasticity Typeform webhook received")
+        return await _accept_typeform(
+            "elasticity_typeform_ingest", process_elasticity_submission, data,
+            "Elasticity submission queued; files are being saved."
+        )
+    except Exception as e:
+        logger.exception("❌ Error handling Elasticity Typeform submission")
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=500)
+
+async def job_status(request: Request):
+    job_id = request.path_params["job_id"]
+    job = await run_in_threadpool(get_job, job_id)
+    if not job:
+        return JSONResponse({"error": f"Unknown job: {job_id}"}, status_code=404)
+    return JSONResponse(job)
+
+async def dispatch_prompt(request: Request):
+    try:
+        data = await _json_body(request)
+        prompt_name = data.get("prompt")
+        if not prompt_name:
+            return JSONResponse({"error": "Missing 'prompt' key"}, status_code=400)
+
+        module_path = PROMPT_MODULES.get(prompt_name)
+        if not module_path:
+            return JSONResponse({"error": f"Unknown prompt: {prompt_name}"}, status_code=400)
+
+        blocking = prompt_name in BLOCKING_PROMPTS
+        idem_key = dispatch_key(
+            prompt_name, data, request.headers.get("Idempotency-Key"), prompt_name not in RUN_ID_DEDUPE_EXEMPT
+        )
+        if idem_key:
+            existing = await run_in_threadpool(claim_idempotency_key, idem_key)
+            if existing:
+                if existing["state"] != "completed" and blocking:
+                    waited = await run_in_threadpool(wait_for_idempotency_key, idem_key, IDEMPOTENCY_WAIT_SECONDS)
+                    existing = waited or existing
+                return _replay(existing, {"run_id": data.get("run_id")})
+
+        try:
+            module = await run_in_threadpool(importlib.import_module, module_path)
+        except Exception:
+            if idem_key:
+                await run_in_threadpool(release_idempotency_key, idem_key)
+            raise
+        exec_class = execution_class_for(prompt_name, PROMPT_EXECUTION_CLASSES.get(prompt_name), blocking)
+        logger.info(f"Dispatching prompt: {prompt_name} (class={exec_class}, blocking={blocking}, async)")
+        result_container = {}
+
+        if not blocking:
+            run_id = data.get("run_id") or str(uuid.uuid4())
+            data["run_id"] = run_id
+            result_container["run_id"] = run_id
+
+        # Polling reads: wait for the file on the event loop, not in a worker
+        read_path = READ_ARTIFACT_PATHS.get(prompt_name)
+        if read_path and data.get("run_id"):
+            path = read_path.format(run_id=data["run_id"])
+            if not await await_read_artifact(path, ASYNC_READ_TIMEOUT):
+                if idem_key:
+                    await run_in_threadpool(release_idempotency_key, idem_key)
+                return JSONResponse({
+                    "status": "error",
+                    "run_id": data["run_id"],
+                    "message": f"{prompt_name}: file not yet available. Try again later."
+                })
+
+        ack = {
+            "status": "processing",
+            "message": "Script launched, run_id will be available via follow-up.",
+            "run_id": result_container.get("run_id")
+        }
+
+        def run_and_capture():
+            try:
+                result = module.run_prompt(data)
+                result_container.update(result or {})
+            except Exception:
+                logger.exception("Background prompt execution failed.")
+                if idem_key:
+                    release_idempotency_key(idem_key)
+                return
+            if idem_key:
+                settle_idempotency_key(idem_key, dict(result_container), None if blocking else ack)
+
+        try:
+            if exec_class == INLINE:
+                # "Inline" means no pool handoff; here that is a threadpool hop off the event loop
+                future = await run_in_threadpool(submit_to_class, exec_class, run_and_capture)
+            else:
+                future = submit_to_class(exec_class, run_and_capture)
+        except ExecutorSaturated as e:
+            if idem_key:
+                await run_in_threadpool(release_idempotency_key, idem_key)
+            body = {"status": "busy", "message": str(e), "execution_class": e.class_name}
+            return JSONResponse(body, status_code=503, headers={"Retry-After": EXECUTOR_RETRY_AFTER_SECONDS})
+
+        if blocking:
+            await asyncio.wrap_future(future)
+            return JSONResponse(result_container)
+
+        return JSONResponse(ack)
+
+    except Exception as e:
+        logger.exception("Error in dispatch_prompt")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def _run_batch_member(member):
+    # Polling reads wait for their file on the event loop, as in dispatch_prompt
+    read_path = READ_ARTIFACT_PATHS.get(member.prompt)
+    if read_path and member.run_id:
+        if not await await_read_artifact(read_path.format(run_id=member.run_id), ASYNC_READ_TIMEOUT):
+            member.fail(f"{member.prompt}: file not yet available. Try again later.")
+            return
+    # Off the event loop: imports the module, and inline members run right here
+    await run_in_threadpool(member.submit)
+    if member.blocking and member.future is not None:
+        await asyncio.wrap_future(member.future)
+
+async def dispatch_batch(request: Request):
+    """Run several independent prompts on one shared payload concurrently (see Engine/Runtime/batch.py)."""
+    try:
+        data = await _json_body(request)
+        try:
+            members = parse_batch(data)
+        except BatchRequestError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        idem_key = batch_key(members, request.headers.get("Idempotency-Key"))
+        if idem_key:
+            existing = await run_in_threadpool(claim_idempotency_key, idem_key)
+            if existing:
+                if existing["state"] != "completed":
+                    waited = await run_in_threadpool(wait_for_idempotency_key, idem_key, IDEMPOTENCY_WAIT_SECONDS)
+                    existing = waited or existing
+                return _replay(existing)
+
+        logger.info(f"Dispatching batch: {', '.join(m.prompt for m in members)} (async)")
+        try:
+            await asyncio.gather(*(_run_batch_member(m) for m in members))
+        except Exception:
+            if idem_key:
+                await run_in_threadpool(release_idempotency_key, idem_key)
+            raise
+
+        body = batch_response(members)
+        if idem_key:
+            # A batch with failed members is retried whole, not replayed
+            if body["errors"]:
+                await run_in_threadpool(release_idempotency_key, idem_key)
+            else:
+                await run_in_threadpool(complete_idempotency_key, idem_key, body)
+        return JSONResponse(body)
+
+    except Exception as e:
+        logger.exception("Error in dispatch_batch")
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+async def executors_status(request: Request):
+    return JSONResponse(executor_stats())
+
+async def delivery_status(request: Request):
+    delivery_id = request.path_params["delivery_id"]
+    status = await run_in_threadpool(get_delivery_status, delivery_id)
+    if not status:
+        return JSONResponse({"error": f"Unknown delivery: {delivery_id}"}, status_code=404)
+    return JSONResponse(status)
+
+# --- APP ---
+@asynccontextmanager
+async def lifespan(app):
+    # Resume outbound webhook deliveries left queued by a previous process
+    start_delivery_scheduler()
+    # Warm the CPU worker processes for heavy text transforms (CPU_POOL=on only)
+    await run_in_threadpool(start_cpu_pool)
+    yield
+
+app = Starlette(
+    routes=[
+        Route(RENDER_ENV, dynamic_ingest_typeform, methods=["POST"]),
+        Route("/elasticity-typeform", elasticity_typeform_handler, methods=["POST"]),
+        Route("/jobs/{job_id}", job_status, methods=["GET"]),
+        Route("/", dispatch_prompt, methods=["POST"]),
+        Route("/batch", dispatch_batch, methods=["POST"]),
+        Route("/executors", executors_status, methods=["GET"]),
+        Route("/deliveries/{delivery_id}", delivery_status, methods=["GET"]),
+    ],
+    lifespan=lifespan,
+)
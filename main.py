@@ -1,10 +1,29 @@
 from flask import Flask, request, jsonify
 import importlib
-import threading
 import os
 from logger import logger
+from prompt_routing import BLOCKING_PROMPTS, PROMPT_MODULES, PROMPT_EXECUTION_CLASSES, RUN_ID_DEDUPE_EXEMPT
 from Scripts.Predictive_Report.ingest_typeform import process_typeform_submission
 from Scripts.Elasticity.elasticity_typeform import process_typeform_submission as process_elasticity_submission
+from Engine.Webhooks.outbound import get_delivery_status, start_delivery_scheduler
+from Engine.Runtime.jobs import submit_job, get_job
+from Engine.Runtime.cpu_pool import start_cpu_pool
+from Engine.Runtime.batch import BatchRequestError, batch_key, batch_response, parse_batch
+from Engine.Runtime.executors import (
+    ExecutorSaturated,
+    execution_class_for,
+    executor_stats,
+    submit_to_class,
+)
+from Engine.Webhooks.idempotency import (
+    typeform_key,
+    dispatch_key,
+    claim_idempotency_key,
+    complete_idempotency_key,
+    release_idempotency_key,
+    settle_idempotency_key,
+    wait_for_idempotency_key,
+)
 
 app = Flask(__name__)
 
@@ -15,97 +34,52 @@ if not RENDER_ENV.startswith("/"):
 
 logger.info(f"📡 Flask binding RENDER_ENV route: {RENDER_ENV}")
 
+# Resume outbound webhook deliveries left queued by a previous process
+start_delivery_scheduler()
+
+# Warm the CPU worker processes for heavy text transforms (CPU_POOL=on only)
+start_cpu_pool()
+
 # --- PROMPT ROUTING CONFIG ---
-BLOCKING_PROMPTS = {
-    "website",
-    "year",
-    "read_client_context",
-    "read_question_context",
-    "read_prompt_1_thinking",
-    "write_change_effect_maths",
-    "read_change_effect_maths",
-    "read_prompt_2_section_assets",
-    "read_prompt_3_report_assets",
-    "read_prompt_4_tables",
-    "combine",
-    "format_combine",
-    "read_section_image_prompts",
-    "read_report_image_prompts",
-    "format_image_prompts",
-    "csv_content",
-    "report_and_section_table_csv",
-    "write_create_folders",
-    "read_create_folders",
-    "move_files_1",
-    "move_files_2",
-    "read_supply_report",
-    "read_demand_report",
-    "write_prompt_1_elasticity",
-    "read_prompt_1_elasticity",
-    "write_elasticity_maths",
-    "elasticity_combine",
-    "elasticity_csv",
-    "write_create_elasticity_folders",
-    "read_create_elasticity_folders"
-    "move_elasticity_files_1",
-    "move_elasticity_files_2",
-    "question_assets",
-    "merge_questions",
-    "explainer_report_assets",
-    "character_attribute_generation",
-    "question_image_generation",
-    "explainer_report_image_prompts",
-    "merge_image_prompts"
-}
-
-PROMPT_MODULES = {
-    "website": "Scripts.Website_Year.website",
-    "year": "Scripts.Website_Year.year",
-    "read_client_context": "Scripts.Client_Context.read_client_context",
-    "write_client_context": "Scripts.Client_Context.write_client_context",
-    "read_question_context": "Scripts.Predictive_Report.read_question_context",
-    "write_prompt_1_thinking": "Scripts.Predictive_Report.write_prompt_1_thinking",
-    "write_change_effect_maths": "Scripts.Predictive_Report.write_change_effect_maths",
-    "read_change_effect_maths": "Scripts.Predictive_Report.read_change_effect_maths",
-    "read_prompt_1_thinking": "Scripts.Predictive_Report.read_prompt_1_thinking",
-    "write_prompt_2_section_assets": "Scripts.Predictive_Report.write_prompt_2_section_assets",
-    "read_prompt_2_section_assets": "Scripts.Predictive_Report.read_prompt_2_section_assets",
-    "write_prompt_3_report_assets": "Scripts.Predictive_Report.write_prompt_3_report_assets",
-    "read_prompt_3_report_assets": "Scripts.Predictive_Report.read_prompt_3_report_assets",
-    "write_prompt_4_tables": "Scripts.Predictive_Report.write_prompt_4_tables",
-    "read_prompt_4_tables": "Scripts.Predictive_Report.read_prompt_4_tables",
-    "combine": "Scripts.Predictive_Report.combine",
-    "format_combine": "Scripts.Predictive_Report.format_combine",
-    "write_section_image_prompts": "Scripts.Image_Prompts.write_section_image_prompts",
-    "read_section_image_prompts": "Scripts.Image_Prompts.read_section_image_prompts",
-    "write_report_image_prompts": "Scripts.Image_Prompts.write_report_image_prompts",
-    "read_report_image_prompts": "Scripts.Image_Prompts.read_report_image_prompts",
-    "format_image_prompts": "Scripts.Image_Prompts.format_image_prompts",
-    "csv_content": "Scripts.Predictive_Report.csv_content",
-    "report_and_section_table_csv": "Scripts.Predictive_Report.report_and_section_table_csv",
-    "write_create_folders": "Scripts.Predictive_Report.write_create_folders",
-    "read_create_folders": "Scripts.Predictive_Report.read_create_folders",
-    "move_files_1": "Scripts.Predictive_Report.move_files_1",
-    "move_files_2": "Scripts.Predictive_Report.move_files_2",
-    "read_supply_report": "Scripts.Elasticity.read_supply_report",
-    "read_demand_report": "Scripts.Elasticity.read_demand_report",
-    "write_prompt_1_elasticity": "Scripts.Elasticity.write_prompt_1_elasticity",
-    "read_prompt_1_elasticity": "Scripts.Elasticity.read_prompt_1_elasticity",
-    "write_elasticity_maths": "Scripts.Elasticity.write_elasticity_maths",
-    "elasticity_combine": "Scripts.Elasticity.elasticity_combine",
-    "elasticity_csv": "Scripts.Elasticity.elasticity_csv",
-    "write_create_elasticity_folders": "Scripts.Elasticity.write_create_elasticity_folders",
-    "read_create_elasticity_folders": "Scripts.Elasticity.read_create_elasticity_folders",
-    "move_elasticity_files_1": "Scripts.Elasticity.move_elasticity_files_1",
-    "move_elasticity_files_2": "Scripts.Elasticity.move_elasticity_files_2",
-    "question_assets": "Scripts.Explainer_Report.question_assets",
-    "merge_questions": "Scripts.Explainer_Report.merge_questions",
-    "explainer_report_assets": "Scripts.Explainer_Report.explainer_report_assets",
-    "character_attribute_generation": "Scripts.Image_Prompts.character_attribute_generation",
-    "question_image_generation": "Scripts.Image_Prompts.question_image_generation",
-    "explainer_report_image_prompts": "Scripts.Image_Prompts.explainer_report_image_prompts",
-    "merge_image_prompts": "Scripts.Image_Prompts.merge_image_prompts"
-}
+# BLOCKING_PROMPTS / PROMPT_MODULES / PROMPT_EXECUTION_CLASSES live in prompt_routing.py
+EXECUTOR_RETRY_AFTER_SECONDS = os.getenv("EXECUTOR_RETRY_AFTER_SECONDS", "5")
+
+# --- IDEMPOTENCY ---
+# How long a duplicate of a still-running blocking prompt waits for the original's result
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+
+def _replay(record, extra=None):
+    if record["state"] == "completed":
+        response = jsonify(record["body"])
+        response.status_code = record["status_code"] or 200
+        response.headers["Idempotent-Replay"] = "true"
+        return response
+    body = {"status": "processing", "message": "Duplicate delivery; the original request is still running."}
+    body.update(extra or {})
+    return jsonify(body), 202
+
+def _accept_typeform(kind, handler, data, message):
+    """Queue a Typeform submission as a job, once per form_response token."""
+    key = typeform_key(kind, data)
+    if key:
+        existing = claim_idempotency_key(key)
+        if existing:
+            return _replay(existing)
+    try:
+        job_id = submit_job(kind, handler, data)
+    except Exception:
+        if key:
+            release_idempotency_key(key)
+        raise
+    body = {
+        "status": "accepted",
+        "message": message,
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}"
+    }
+    if key:
+        complete_idempotency_key(key, body, 202)
+    return jsonify(body), 202
 
 # --- ROUTES ---
 @app.route(RENDER_ENV, methods=["POST"])
@@ -113,8 +87,10 @@ def dynamic_ingest_typeform():
     try:
         data = request.get_json(force=True)
         logger.info(f"📩 Typeform webhook received via {RENDER_ENV}")
-        process_typeform_submission(data)
-        return jsonify({"status": "success", "message": "Files processed and saved to Supabase."})
+        return _accept_typeform(
+            "typeform_ingest", process_typeform_submission, data,
+            "Submission queued; files are being saved to Supabase."
+        )
     except Exception as e:
         logger.exception(f"❌ Error handling Typeform submission via {RENDER_ENV}")
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -124,12 +100,21 @@ def elasticity_typeform_handler():
     try:
         data = request.get_json(force=True)
         logger.info("📩 Elasticity Typeform webhook received")
-        process_elasticity_submission(data)
-        return jsonify({"status": "success", "message": "Elasticity files processed and saved."})
+        return _accept_typeform(
+            "elasticity_typeform_ingest", process_elasticity_submission, data,
+            "Elasticity submission queued; files are being saved."
+        )
     except Exception as e:
         logger.exception("❌ Error handling Elasticity Typeform submission")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = get_job(job_id)
+    if not job:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job)
+
 @app.route("/", methods=["POST"])
 def dispatch_prompt():
     try:
@@ -142,36 +127,118 @@ def dispatch_prompt():
         if not module_path:
             return jsonify({"error": f"Unknown prompt: {prompt_name}"}), 400
 
-        module = importlib.import_module(module_path)
-        logger.info(f"Dispatching prompt asynchronously: {prompt_name}")
+        idem_key = dispatch_key(
+            prompt_name, data, request.headers.get("Idempotency-Key"), prompt_name not in RUN_ID_DEDUPE_EXEMPT
+        )
+        if idem_key:
+            existing = claim_idempotency_key(idem_key)
+            if existing:
+                if existing["state"] != "completed" and prompt_name in BLOCKING_PROMPTS:
+                    existing = wait_for_idempotency_key(idem_key, IDEMPOTENCY_WAIT_SECONDS) or existing
+                return _replay(existing, {"run_id": data.get("run_id")})
+
+        try:
+            module = importlib.import_module(module_path)
+        except Exception:
+            if idem_key:
+                release_idempotency_key(idem_key)
+            raise
+        blocking = prompt_name in BLOCKING_PROMPTS
+        exec_class = execution_class_for(prompt_name, PROMPT_EXECUTION_CLASSES.get(prompt_name), blocking)
+        logger.info(f"Dispatching prompt: {prompt_name} (class={exec_class}, blocking={blocking})")
         result_container = {}
 
         import uuid
-        if prompt_name not in BLOCKING_PROMPTS:
+        if not blocking:
             run_id = data.get("run_id") or str(uuid.uuid4())
             data["run_id"] = run_id
             result_container["run_id"] = run_id
 
+        ack = {
+            "status": "processing",
+            "message": "Script launched, run_id will be available via follow-up.",
+            "run_id": result_container.get("run_id")
+        }
+
         def run_and_capture():
             try:
                 result = module.run_prompt(data)
                 result_container.update(result or {})
             except Exception:
                 logger.exception("Background prompt execution failed.")
-
-        thread = threading.Thread(target=run_and_capture)
-        thread.start()
-
-        if prompt_name in BLOCKING_PROMPTS:
-            thread.join()
+                if idem_key:
+                    release_idempotency_key(idem_key)
+                return
+            if idem_key:
+                settle_idempotency_key(idem_key, dict(result_container), None if blocking else ack)
+
+        try:
+            future = submit_to_class(exec_class, run_and_capture)
+        except ExecutorSaturated as e:
+            if idem_key:
+                release_idempotency_key(idem_key)
+            body = {"status": "busy", "message": str(e), "execution_class": e.class_name}
+            return jsonify(body), 503, {"Retry-After": EXECUTOR_RETRY_AFTER_SECONDS}
+
+        if blocking:
+            future.result()
             return jsonify(result_container)
 
-        return jsonify({
-            "status": "processing",
-            "message": "Script launched, run_id will be available via follow-up.",
-            "run_id": result_container.get("run_id")
-        })
+        return jsonify(ack)
 
     except Exception as e:
         logger.exception("Error in dispatch_prompt")
         return jsonify({"error": str(e)}), 500
+
+@app.route("/batch", methods=["POST"])
+def dispatch_batch():
+    """Run several independent prompts on one shared payload concurrently (see Engine/Runtime/batch.py)."""
+    try:
+        data = request.get_json(force=True)
+        try:
+            members = parse_batch(data)
+        except BatchRequestError as e:
+            return jsonify({"error": str(e)}), 400
+
+        idem_key = batch_key(members, request.headers.get("Idempotency-Key"))
+        if idem_key:
+            existing = claim_idempotency_key(idem_key)
+            if existing:
+                if existing["state"] != "completed":
+                    existing = wait_for_idempotency_key(idem_key, IDEMPOTENCY_WAIT_SECONDS) or existing
+                return _replay(existing)
+
+        logger.info(f"Dispatching batch: {', '.join(m.prompt for m in members)}")
+        try:
+            for member in members:
+                member.submit()
+            for member in members:
+                member.wait()
+        except Exception:
+            if idem_key:
+                release_idempotency_key(idem_key)
+            raise
+
+        body = batch_response(members)
+        if idem_key:
+            # A batch with failed members is retried whole, not replayed
+            if body["errors"]:
+                release_idempotency_key(idem_key)
+            else:
+                complete_idempotency_key(idem_key, body)
+        return jsonify(body)
+
+    except Exception as e:
+        logger.exception("Error in dispatch_batch")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/executors", methods=["GET"])
+def executors_status():
+    return jsonify(executor_stats())
+
+@app.route("/deliveries/<delivery_id>", methods=["GET"])
+def delivery_status(delivery_id):
+    status = get_delivery_status(delivery_id)
+    if not status:
+        return jsonify({"error": f"Unknown delivery: {delivery_id}"}), 404
+    return jsonify(status)
@@ -0,0 +1,193 @@
+# prompt_routing.py
+#
+# Dispatch tables shared by the Flask service (main.py) and the ASGI service (asgi.py).
+
+from Engine.Runtime.executors import INLINE, LONG, POLL
+
+# --- PROMPT ROUTING CONFIG ---
+BLOCKING_PROMPTS = {
+    "website",
+    "year",
+    "read_client_context",
+    "read_question_context",
+    "read_prompt_1_thinking",
+    "write_change_effect_maths",
+    "read_change_effect_maths",
+    "change_effect_sensitivity",
+    "read_prompt_2_section_assets",
+    "read_prompt_3_report_assets",
+    "read_prompt_4_tables",
+    "combine",
+    "format_combine",
+    "read_section_image_prompts",
+    "read_report_image_prompts",
+    "format_image_prompts",
+    "csv_content",
+    "report_and_section_table_csv",
+    "write_create_folders",
+    "read_create_folders",
+    "move_files_1",
+    "move_files_2",
+    "read_supply_report",
+    "read_demand_report",
+    "read_elasticity_reports",
+    "write_prompt_1_elasticity",
+    "read_prompt_1_elasticity",
+    "write_elasticity_maths",
+    "write_elasticity_grid",
+    "elasticity_combine",
+    "elasticity_csv",
+    "write_create_elasticity_folders",
+    "read_create_elasticity_folders",
+    "move_elasticity_files_1",
+    "move_elasticity_files_2",
+    "question_assets",
+    "read_question_manifest",
+    "merge_questions",
+    "explainer_report_assets",
+    "character_attribute_generation",
+    "question_image_generation",
+    "explainer_report_image_prompts",
+    "merge_image_prompts"
+}
+
+PROMPT_MODULES = {
+    "website": "Scripts.Website_Year.website",
+    "year": "Scripts.Website_Year.year",
+    "read_client_context": "Scripts.Client_Context.read_client_context",
+    "write_client_context": "Scripts.Client_Context.write_client_context",
+    "read_question_context": "Scripts.Predictive_Report.read_question_context",
+    "write_prompt_1_thinking": "Scripts.Predictive_Report.write_prompt_1_thinking",
+    "write_change_effect_maths": "Scripts.Predictive_Report.write_change_effect_maths",
+    "read_change_effect_maths": "Scripts.Predictive_Report.read_change_effect_maths",
+    "change_effect_sensitivity": "Scripts.Predictive_Report.change_effect_sensitivity",
+    "read_prompt_1_thinking": "Scripts.Predictive_Report.read_prompt_1_thinking",
+    "write_prompt_2_section_assets": "Scripts.Predictive_Report.write_prompt_2_section_assets",
+    "read_prompt_2_section_assets": "Scripts.Predictive_Report.read_prompt_2_section_assets",
+    "write_prompt_3_report_assets": "Scripts.Predictive_Report.write_prompt_3_report_assets",
+    "read_prompt_3_report_assets": "Scripts.Predictive_Report.read_prompt_3_report_assets",
+    "write_prompt_4_tables": "Scripts.Predictive_Report.write_prompt_4_tables",
+    "read_prompt_4_tables": "Scripts.Predictive_Report.read_prompt_4_tables",
+    "combine": "Scripts.Predictive_Report.combine",
+    "format_combine": "Scripts.Predictive_Report.format_combine",
+    "write_section_image_prompts": "Scripts.Image_Prompts.write_section_image_prompts",
+    "read_section_image_prompts": "Scripts.Image_Prompts.read_section_image_prompts",
+    "write_report_image_prompts": "Scripts.Image_Prompts.write_report_image_prompts",
+    "read_report_image_prompts": "Scripts.Image_Prompts.read_report_image_prompts",
+    "format_image_prompts": "Scripts.Image_Prompts.format_image_prompts",
+    "csv_content": "Scripts.Predictive_Report.csv_content",
+    "report_and_section_table_csv": "Scripts.Predictive_Report.report_and_section_table_csv",
+    "write_create_folders": "Scripts.Predictive_Report.write_create_folders",
+    "read_create_folders": "Scripts.Predictive_Report.read_create_folders",
+    "move_files_1": "Scripts.Predictive_Report.move_files_1",
+    "move_files_2": "Scripts.Predictive_Report.move_files_2",
+    "read_supply_report": "Scripts.Elasticity.read_supply_report",
+    "read_demand_report": "Scripts.Elasticity.read_demand_report",
+    "read_elasticity_reports": "Scripts.Elasticity.read_elasticity_reports",
+    "write_prompt_1_elasticity": "Scripts.Elasticity.write_prompt_1_elasticity",
+    "read_prompt_1_elasticity": "Scripts.Elasticity.read_prompt_1_elasticity",
+    "write_elasticity_maths": "Scripts.Elasticity.write_elasticity_maths",
+    "write_elasticity_grid": "Scripts.Elasticity.write_elasticity_grid",
+    "elasticity_combine": "Scripts.Elasticity.elasticity_combine",
+    "elasticity_csv": "Scripts.Elasticity.elasticity_csv",
+    "write_create_elasticity_folders": "Scripts.Elasticity.write_create_elasticity_folders",
+    "read_create_elasticity_folders": "Scripts.Elasticity.read_create_elasticity_folders",
+    "move_elasticity_files_1": "Scripts.Elasticity.move_elasticity_files_1",
+    "move_elasticity_files_2": "Scripts.Elasticity.move_elasticity_files_2",
+    "question_assets": "Scripts.Explainer_Report.question_assets",
+    "read_question_manifest": "Scripts.Explainer_Report.read_question_manifest",
+    "merge_questions": "Scripts.Explainer_Report.merge_questions",
+    "explainer_report_assets": "Scripts.Explainer_Report.explainer_report_assets",
+    "character_attribute_generation": "Scripts.Image_Prompts.character_attribute_generation",
+    "question_image_generation": "Scripts.Image_Prompts.question_image_generation",
+    "explainer_report_image_prompts": "Scripts.Image_Prompts.explainer_report_image_prompts",
+    "merge_image_prompts": "Scripts.Image_Prompts.merge_image_prompts"
+}
+
+# --- IDEMPOTENCY ---
+# Reads are repeated with the same run_id on purpose (polling until a file
+# exists, tailing a manifest with "since"), so a run_id never marks them as
+# duplicates; only an explicit Idempotency-Key header does.
+RUN_ID_DEDUPE_EXEMPT = {name for name in PROMPT_MODULES if name.startswith("read_")}
+
+# --- EXECUTION CLASSES ---
+# Prompts not listed run in the "io" pool (LLM / Supabase-bound)
+PROMPT_EXECUTION_CLASSES = {
+    # Pure formatting / arithmetic: run on the request thread
+    "website": INLINE,
+    "year": INLINE,
+    "combine": INLINE,
+    "format_combine": INLINE,
+    "format_image_prompts": INLINE,
+    "csv_content": INLINE,
+    "write_change_effect_maths": INLINE,
+    "write_elasticity_maths": INLINE,
+    "elasticity_combine": INLINE,
+    "elasticity_csv": INLINE,
+    # Multi-minute pipelines: isolated so they never delay the above
+    "move_files_1": LONG,
+    "move_files_2": LONG,
+    "move_elasticity_files_1": LONG,
+    "move_elasticity_files_2": LONG,
+    "question_assets": LONG,
+    "merge_questions": LONG,
+    "explainer_report_assets": LONG,
+    "character_attribute_generation": LONG,
+    "question_image_generation": LONG,
+    "explainer_report_image_prompts": LONG,
+    "merge_image_prompts": LONG,
+    # Reads that sleep-poll (up to ~126s) for a file a write_* prompt produces:
+    # their own pool, so they never starve the io workers running those writes
+    "read_client_context": POLL,
+    "read_question_context": POLL,
+    "read_prompt_1_thinking": POLL,
+    "read_change_effect_maths": POLL,
+    "read_prompt_2_section_assets": POLL,
+    "read_prompt_3_report_assets": POLL,
+    "read_prompt_4_tables": POLL,
+    "read_section_image_prompts": POLL,
+    "read_report_image_prompts": POLL,
+    "read_prompt_1_elasticity": POLL,
+    "read_supply_report": POLL,
+    "read_demand_report": POLL,
+    "read_elasticity_reports": POLL,
+}
+
+# --- READ ARTIFACTS ---
+# Supabase path each polling read_* prompt waits for. The async service awaits
+# the file itself, publishes it as a final artifact, and only then runs the
+# module, which picks the content up from the artifact bus without sleeping.
+READ_ARTIFACT_PATHS = {
+    "read_client_context": "Predictive_Report/Ai_Responses/Client_Context/{run_id}.txt",
+    "read_prompt_1_thinking": "Predictive_Report/Ai_Responses/Prompt_1_Thinking/{run_id}.txt",
+    "read_change_effect_maths": "Predictive_Report/Ai_Responses/Change_Effect_Maths/{run_id}.txt",
+    "read_prompt_2_section_assets": "Predictive_Report/Ai_Responses/Prompt_2_Section_Assets/{run_id}.txt",
+    "read_prompt_3_report_assets": "Predictive_Report/Ai_Responses/Prompt_3_Report_Assets/{run_id}.txt",
+    "read_prompt_4_tables": "Predictive_Report/Ai_Responses/Prompt_4_Tables/{run_id}.txt",
+    "read_section_image_prompts": "Predictive_Report/Ai_Responses/Section_Image_Prompts/{run_id}.txt",
+    "read_report_image_prompts": "Predictive_Report/Ai_Responses/Report_Image_Prompts/{run_id}.txt",
+    "read_prompt_1_elasticity": "Elasticity/Ai_Responses/Prompt_1_Elasticity/{run_id}.txt",
+}
+
+# --- ARTIFACT REFERENCES ---
+# Stages that take a large artifact inline also accept a reference to it:
+# "{field}_run_id", or {"artifact": name, "run_id": ...} in place of the text
+# (see Engine/Runtime/artifact_refs.py). An artifact with a read_* prompt is
+# resolved through that prompt, so the stage sees exactly the text Zapier used
+# to fetch and pass on; stage outputs without one are read from their path.
+ARTIFACT_READ_PROMPTS = {
+    "client_context": "read_client_context",
+    "prompt_1_thinking": "read_prompt_1_thinking",
+    "change_effect_maths": "read_change_effect_maths",
+    "report_change": "read_change_effect_maths",
+    "prompt_2_section_assets": "read_prompt_2_section_assets",
+    "prompt_3_report_assets": "read_prompt_3_report_assets",
+    "prompt_4_tables": "read_prompt_4_tables",
+    "prompt_1_elasticity": "read_prompt_1_elasticity",
+}
+
+ARTIFACT_PATHS = {
+    "combine": "Predictive_Report/Ai_Responses/Combine/{run_id}.txt",
+    "format_combine": "Predictive_Report/Ai_Responses/Format_Combine/{run_id}.txt",
+    "elasticity_calculation": "Elasticity/Ai_Responses/Elasticity_Maths/{run_id}.txt",
+}
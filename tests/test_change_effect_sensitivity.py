@@ -0,0 +1,14 @@
+import json
+
+from Scripts.Predictive_Report.change_effect_sensitivity import build_sensitivity
+from Scripts.Predictive_Report.write_change_effect_maths import parse_prompt_1
+from test_write_prompt_4_tables import PROMPT_1, read_prompt_1_thinking_output
+
+OPTIONS = {"samples": 2000, "seed": 7}
+
+def test_sensitivity_from_read_prompt_1_thinking_output():
+    result = build_sensitivity(parse_prompt_1(read_prompt_1_thinking_output(PROMPT_1)), OPTIONS)
+
+    assert result["Report Change"] == "-0.5%"
+    assert [s["Section Title"] for s in result["Sections"].values()] == ["Supply", "Demand"]
+    assert result == build_sensitivity(parse_prompt_1(json.dumps(PROMPT_1)), OPTIONS)
@@ -0,0 +1,56 @@
+import json
+
+from Scripts.Predictive_Report.read_prompt_1_thinking import flatten_json_like_text
+from Scripts.Predictive_Report.write_change_effect_maths import build_tables
+from Scripts.Predictive_Report.write_prompt_4_tables import load_structured_output
+
+PROMPT_1 = {
+    "Section 1": {
+        "Section Title": "Supply",
+        "Section Summary": "Output is expected to fall: lower yields in key regions.",
+        "Section MakeUp": "40%",
+        "Sub-Section 1": {
+            "Sub-Section Title": "Yields",
+            "Sub-Section Summary": "Dry weather cuts yields.",
+            "Sub-Section MakeUp": "60%",
+            "Sub-Section Change": "5%",
+        },
+        "Sub-Section 2": {
+            "Sub-Section Title": "Stocks",
+            "Sub-Section Summary": "Stocks are drawn down.",
+            "Sub-Section MakeUp": "40%",
+            "Sub-Section Change": "-3%",
+        },
+    },
+    "Section 2": {
+        "Section Title": "Demand",
+        "Section Summary": "Feed demand softens.",
+        "Section MakeUp": "60%",
+        "Sub-Section 1": {
+            "Sub-Section Title": "Feed",
+            "Sub-Section Summary": "Livestock numbers fall.",
+            "Sub-Section MakeUp": "100%",
+            "Sub-Section Change": "-2%",
+        },
+    },
+}
+
+def read_prompt_1_thinking_output(prompt_1: dict) -> str:
+    """The text read_prompt_1_thinking returns, which Zapier passes on as prompt_1_thinking."""
+    return flatten_json_like_text(json.dumps(prompt_1, indent=2)).replace("{:", "")
+
+def test_local_tables_from_read_prompt_1_thinking_output():
+    structured = load_structured_output({"prompt_1_thinking": read_prompt_1_thinking_output(PROMPT_1)})
+    tables = build_tables(structured, "Price of Wheat in the UK over the next 6 months.")
+
+    assert tables["Report Change"]["Report Change"] == "-0.5%"
+    assert tables["Report Table"] == [
+        {"Section Title": "Demand", "Section Makeup": "60%", "Section Change": "-2.0%", "Section Effect": "-1.2%"},
+        {"Section Title": "Supply", "Section Makeup": "40%", "Section Change": "+1.8%", "Section Effect": "+0.7%"},
+    ]
+    assert [row["Sub-Section Title"] for row in tables["Section Tables"]["Supply"]] == ["Yields", "Stocks"]
+
+def test_local_tables_from_prompt_1_json():
+    from_json = load_structured_output({"prompt_1_thinking": json.dumps(PROMPT_1)})
+    from_yaml = load_structured_output({"prompt_1_thinking": read_prompt_1_thinking_output(PROMPT_1)})
+    assert from_json == from_yaml